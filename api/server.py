@@ -1,8 +1,10 @@
 
 import os
+import asyncio
 import shutil
 import tempfile
 import traceback
+import uuid
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from pydantic import BaseModel
 from typing import Optional
@@ -14,8 +16,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.voice import Voice
 from core.brain import Brain
 from core.action_engine import AutomationEngine
+from core.motor_executor import MotorExecutor
 from core.logger import nervous_system
+from core.metrics import metrics
 from core.tech_manager import tech_manager
+from core.tts_cache import tts_cache
 from core.engines.stt.faster_whisper_engine import FasterWhisperEngine
 
 # Initialize App
@@ -26,11 +31,14 @@ app = FastAPI(
 )
 
 # Initialize Components
+motor = None
 try:
     nervous_system.system("API: Initializing Core Components...")
     voice = Voice()
     brain = Brain()
     hands = AutomationEngine()
+    # Motor: un solo hilo dedicado (el escritorio es uno) fuera del threadpool por defecto
+    motor = MotorExecutor(hands)
 except Exception as e:
     nervous_system.error("API", f"Init components failed: {e}")
     print(traceback.format_exc())
@@ -54,9 +62,11 @@ class SpeakRequest(BaseModel):
 
 class ThinkRequest(BaseModel):
     prompt: str
+    session_id: Optional[str] = None  # Reutilizar para mantener contexto entre llamadas
 
 class CommandRequest(BaseModel):
     command: str
+    session_id: Optional[str] = None
 
 # --- Endpoints ---
 
@@ -69,6 +79,11 @@ def get_system_status():
     """Get current technology stack status"""
     return tech_manager.active_config
 
+@app.get("/v1/system/metrics")
+def get_system_metrics():
+    """Rolling latency histograms, counters, recent LLM call records and TTS cache stats"""
+    return {**metrics.snapshot(), "tts_cache": tts_cache.stats()}
+
 @app.post("/v1/tts/speak")
 def speak(request: SpeakRequest):
     """Make the agent speak"""
@@ -80,26 +95,28 @@ def speak(request: SpeakRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/v1/llm/think")
-def think(request: ThinkRequest):
+async def think(request: ThinkRequest):
     """Ask the LLM a question"""
     try:
-        response = brain.think(request.prompt)
-        return {"response": response}
+        session_id = request.session_id or uuid.uuid4().hex
+        response = await brain.athink(request.prompt, session_id=session_id)
+        return {"response": response, "session_id": session_id}
     except Exception as e:
         nervous_system.error("API", f"Think Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/v1/action/execute")
-def execute_command(request: CommandRequest):
+async def execute_command(request: CommandRequest):
     """Execute a natural language command (Brain -> Motor)"""
     try:
         # 1. Think (Getting the plan)
         nervous_system.system(f"API Command received: {request.command}")
-        action_plan = brain.think(request.command)
+        session_id = request.session_id or uuid.uuid4().hex
+        action_plan = await brain.athink(request.command, session_id=session_id)
         
         # 2. Check if valid plan
         if not action_plan or action_plan.get("action") == "error":
-             return {"status": "error", "message": "Brain could not understand command"}
+             return {"status": "error", "message": "Brain could not understand command", "session_id": session_id}
              
         # 3. Execute (Motor or Chat)
         action_type = action_plan.get("action")
@@ -120,24 +137,46 @@ def execute_command(request: CommandRequest):
                 "status": "success",
                 "plan": action_plan,
                 "executed": True,
-                "response_text": text_response
+                "response_text": text_response,
+                "session_id": session_id
             }
             
         else:
-            # Physical Action
-            success = hands.execute_task(action_plan)
+            # Physical Action (cancelable con /v1/action/cancel)
+            if motor is None:
+                raise HTTPException(status_code=503, detail="Motor unavailable")
+            job = motor.submit(action_plan)
+            await asyncio.wait({asyncio.wrap_future(job.future)})
+            success = not job.future.cancelled() and job.future.result()
             
             return {
-                "status": "success" if success else "failed",
+                "status": "cancelled" if job.status == "cancelled" else "success" if success else "failed",
+                "job_id": job.id,
                 "plan": action_plan,
-                "executed": success
+                "executed": success,
+                "session_id": session_id
             }
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = traceback.format_exc()
         nervous_system.error("API", f"CRITICAL 500 EXECUTE: {error_msg}")
         print(f"CRITICAL API ERROR: {error_msg}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/v1/action/cancel")
+def cancel_action():
+    """Cancel the running motor job before its next step"""
+    job = motor.cancel_current("api") if motor is not None else None
+    if job is None:
+        return {"status": "idle", "cancelled": False}
+    return {"status": "success", "cancelled": True, "job_id": job.id, "step": job.step, "total": job.total}
+
+@app.delete("/v1/llm/session/{session_id}")
+def reset_session(session_id: str):
+    """Forget the dialogue history of a session"""
+    return {"status": "success", "reset": brain.reset_session(session_id)}
+
 @app.post("/v1/stt/transcribe")
 def transcribe_audio(file: UploadFile = File(...)):
     """Transcribe an audio file"""
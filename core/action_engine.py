@@ -1,42 +1,73 @@
-import uiautomation as auto
-import subprocess
 import time
 import os
-import pyautogui
-import difflib
+from concurrent.futures import ThreadPoolExecutor
+from core.click_memory import click_memory
 from core.config import settings
+from core.engines.motor import create_motor_backend
 from core.logger import nervous_system
+from core.metrics import metrics
+from core.motor_trace import motor_trace
+from core.plan_compiler import plan_compiler
+from core.visual_verify import VisualVerifier
+from core.waits import Waiter
 
-# Aumentamos el timeout para búsquedas profundas si es necesario
-auto.SetGlobalSearchTimeout(5) 
+# Atajos tras los que cambia la ventana en primer plano (diálogo, otra app)
+FOCUS_CHANGING_KEYS = {
+    "alt+tab", "alt+f4", "ctrl+o", "ctrl+s", "ctrl+shift+s", "ctrl+n", "ctrl+p", "ctrl+f",
+    "ctrl+w", "win+d", "win+e", "win+r", "win+down", "win+up",
+}
 
 class AutomationEngine:
-    def __init__(self):
-        nervous_system.motor("Cortex Motor (Precision Mode) Inicializado.")
-        self.width, self.height = pyautogui.size()
+    def __init__(self, backend=None):
+        # Backend de escritorio: uiautomation en Windows, simulated para tests/benchmarks
+        self.backend = backend or create_motor_backend()
+        nervous_system.motor(f"Cortex Motor (Precision Mode) Inicializado [{self.backend.name}].")
+        self.width, self.height = self.backend.screen_size()
+        # Pasos de SO (create_file) en paralelo con la cadena de UI
+        self.os_executor = ThreadPoolExecutor(max_workers=2)
+        self._foreground_before = None
+        # Esperas por evento (proceso/ventana/control/portapapeles) en lugar de sleeps fijos
+        self.waiter = Waiter(self.backend.probe)
+        # Dónde estaba cada etiqueta en cada app (aprendido de clics anteriores)
+        self.click_memory = click_memory
+        # Verificación de clics por diferencia de píxeles en la ventana objetivo
+        self.verifier = VisualVerifier(self.backend.grab)
 
-    def execute_task(self, task_data):
+    def init_worker_thread(self):
+        """Backend per-thread setup (COM/UIA) for the motor executor thread"""
+        self.backend.init_thread()
+
+    def execute_task(self, task_data, job=None):
         """
         Ejecuta acciones con validación de errores.
+        job: MotorJob opcional; se consulta su cancelación entre pasos y recibe el progreso.
         """
         action = task_data.get("action", "").lower()
         params = task_data.get("parameters", {})
         
         nervous_system.motor(f"Impulso Recibido: {action} | Datos: {params}")
 
+        # Traza por paso (inicio/fin, espera vs trabajo, consultas UIA)
+        with motor_trace.record(action, params) as step:
+            step.ok = self._dispatch(action, params, job)
+            return step.ok
+
+    def _dispatch(self, action, params, job):
         if action == "chain":
-            steps = params.get("steps", [])
-            for step in steps:
-                if not self.execute_task(step):
-                    nervous_system.error("MOTOR", f"Cadena rota en paso: {step}")
-                    return False # Romper cadena si un paso falla (Seguridad)
-            return True
+            return self._execute_chain(params.get("steps", []), job)
+
+        if job is not None:
+            job.report(1, 1, action)
 
         method_name = f"_do_{action}"
         if hasattr(self, method_name):
             try:
                 method = getattr(self, method_name)
-                return method(params)
+                start = time.perf_counter()
+                result = method(params)
+                # Latencia real por acción: alimenta las estimaciones del compilador
+                metrics.histogram(f"motor.step.{action}_ms").record((time.perf_counter() - start) * 1000)
+                return result
             except Exception as e:
                 nervous_system.error("MOTOR", f"CRITICAL ERROR en {action}: {e}")
                 return False
@@ -44,35 +75,83 @@ class AutomationEngine:
             nervous_system.error("MOTOR", f"Acción desconocida: {action}")
             return False
 
+    def _execute_chain(self, steps, job=None):
+        """Compile the chain into a DAG: UI steps in order, OS steps concurrently"""
+        compiled = plan_compiler.compile(steps)
+        nervous_system.motor(
+            f"Plan compilado: {compiled.source_steps} -> {len(compiled.nodes)} pasos, "
+            f"predicho {compiled.predicted_ms:.0f}ms"
+            + (f" | {'; '.join(compiled.optimizations)}" if compiled.optimizations else ""))
+        nervous_system.motor(f"Plan optimizado:\n{compiled.describe()}")
+
+        start = time.perf_counter()
+        futures = {}
+        ok = True
+        for i, node in enumerate(compiled.nodes, 1):
+            if job is not None:
+                # Punto de cancelación entre pasos ("para", "cancela")
+                if job.cancelled:
+                    nervous_system.motor(f"Cadena cancelada antes del paso {i}/{len(compiled.nodes)}")
+                    for future in futures.values():
+                        future.cancel()
+                    ok = False
+                    break
+                job.report(i, len(compiled.nodes), f"{node.action} {node.step.get('parameters', {})}")
+            if node.lane == "os":
+                futures[node.id] = self.os_executor.submit(self._run_node, node, futures)
+                continue
+            if not self._run_node(node, futures):
+                nervous_system.error("MOTOR", f"Cadena rota en paso: {node.step}")
+                ok = False
+                break # Romper cadena si un paso falla (Seguridad)
+
+        # Los pasos de SO ya lanzados terminan igualmente (los pendientes se cancelaron)
+        for node_id, future in futures.items():
+            if future.cancelled():
+                continue
+            if not future.result():
+                nervous_system.error("MOTOR", f"Cadena rota en paso: {compiled.nodes[node_id].step}")
+                ok = False
+
+        actual_ms = (time.perf_counter() - start) * 1000
+        metrics.histogram("motor.plan.predicted_ms").record(compiled.predicted_ms)
+        metrics.histogram("motor.plan.actual_ms").record(actual_ms)
+        nervous_system.motor(f"Plan ejecutado en {actual_ms:.0f}ms (predicho {compiled.predicted_ms:.0f}ms)")
+        return ok
+
+    def _run_node(self, node, futures):
+        # Dependencias de SO (p.ej. el archivo que luego se abre)
+        for dep in node.deps:
+            if dep in futures and (futures[dep].cancelled() or not futures[dep].result()):
+                return False
+        return self.execute_task(node.step)
+
     # --- ACCIONES PRINCIPALES ---
 
     def _do_open_app(self, params):
         app_name = params.get("app_name", "").lower()
         nervous_system.motor(f"Intentando ejecutar proceso: {app_name}")
-        
-        # Mapeo extendido
-        apps = {
-            "notepad": "notepad.exe",
-            "calculator": "calc.exe",
-            "chrome": "chrome.exe",
-            "edge": "msedge.exe",
-            "cmd": "cmd.exe",
-            "explorer": "explorer.exe",
-            "spotify": "spotify.exe",
-            "code": "code",
-            "word": "winword.exe",
-            "excel": "excel.exe",
-            "powerpoint": "powerpnt.exe"
-        }
-        
-        cmd = apps.get(app_name, app_name)
+
         try:
-            # Opción 1: App Switcher (Si ya está abierta, traer al frente)
-            # Esto evita abrir 50 Chrome Tabs
-            # (Simplificado para esta versión, usaríamos pygetwindow para esto)
-            
-            subprocess.Popen(cmd, shell=True)
-            time.sleep(3) # Damos tiempo al sistema
+            self._foreground_before = self._foreground_handle()
+
+            # App Switcher: si ya está abierta, traer al frente (evita abrir 50 Chrome)
+            if not params.get("new_instance", False):
+                title = self.backend.activate(app_name)
+                if title is not None:
+                    metrics.incr("motor.open_app.focused")
+                    nervous_system.motor(f"Ventana existente al frente: '{title}'")
+                    # Ya está en primer plano: la espera de ventana posterior se cumple de inmediato
+                    self._foreground_before = 0
+                    return True
+
+            cmd = self.backend.launch(app_name)
+            metrics.incr("motor.open_app.launched")
+            if cmd.lower().endswith(".exe"):
+                self.waiter.for_process(os.path.basename(cmd))
+            if params.get("wait", True):
+                # En cadenas compiladas la espera de ventana es un nodo wait_window aparte
+                self._do_wait_window({"title": app_name})
             nervous_system.motor(f"Proceso lanzado: {cmd}")
             return True
         except Exception as e:
@@ -82,33 +161,18 @@ class AutomationEngine:
     def _do_type(self, params):
         text = params.get("text", "")
         nervous_system.motor(f"Escribiendo texto: '{text}'")
-        
-        try:
-            # Use clipboard method (more reliable for special characters)
-            import pyperclip
-            pyperclip.copy(text)
-            time.sleep(0.1)
-            pyautogui.hotkey('ctrl', 'v')
-            time.sleep(0.2)
-            return True
-        except ImportError:
-            # Fallback to direct typing if pyperclip not available
-            nervous_system.motor("Pyperclip no disponible, usando método directo...")
-            for char in text:
-                pyautogui.press(char)
-                time.sleep(0.01)
-            return True
-        except Exception as e:
-            nervous_system.error("MOTOR", f"Error al escribir: {e}")
-            return False
+        return self.backend.type(text, strategy=params.get("strategy"))
 
     def _do_press_key(self, params):
         keys = params.get("key", "").split('+')
         clean_keys = [k.strip().lower() for k in keys]
         nervous_system.motor(f"Simulando pulsación: {clean_keys}")
         try:
-            pyautogui.hotkey(*clean_keys)
-            time.sleep(0.3)  # Wait for action to complete
+            before = self.waiter.probe.foreground_window()
+            self.backend.hotkey(*clean_keys)
+            # Atajos que abren diálogos o cambian de ventana: listo en cuanto cambia el primer plano
+            if "+".join(clean_keys) in FOCUS_CHANGING_KEYS:
+                self.waiter.for_foreground_change(before, timeout=0.5)
             return True
         except Exception as e:
             nervous_system.error("MOTOR", f"Error en hotkey: {e}")
@@ -143,108 +207,96 @@ class AutomationEngine:
             nervous_system.motor(f"Usando atajo de teclado inteligente: {shortcut}")
             return self._do_press_key({"key": shortcut})
         
-        window = auto.GetForegroundControl()
-        if not window:
-            nervous_system.error("MOTOR", "No hay ventana activa (Ceguera temporal).")
+        # Memoria de clics: esta etiqueta en esta app ya se encontró antes
+        foreground = self.backend.foreground_window() if settings.CLICK_MEMORY_ENABLED else None
+        window = foreground[0] if foreground else None
+        context = self.backend.window_context(window) if window else None
+        control = self._remembered_control(context, window, target_name)
+        remembered = control is not None
+        if not remembered:
+            start = time.perf_counter()
+            control = self.backend.find_control(target_name)
+            scan_ms = (time.perf_counter() - start) * 1000
+        if control is None:
+            nervous_system.error("MOTOR", f"Objetivo '{target_name}' no encontrado. Smart fallback no disponible.")
             return False
+        # Se describe antes del clic, que puede cerrar o cambiar la ventana donde se encontró
+        target = self.backend.describe(control, window) if context is not None and not remembered else None
+        clicked = self._verified_click(control) if settings.CLICK_VERIFY else self.backend.click(control)
 
-        # 1. Búsqueda Directa (Rápida)
-        found = window.Control(Name=target_name, searchDepth=3)
-        if found.Exists():
-            nervous_system.motor("Objetivo encontrado (Visual Directo).")
-            self._click_element(found)
-            return True
-
-        # 2. Búsqueda Profunda + Fuzzy (Lenta pero Poderosa)
-        nervous_system.motor("Objetivo no visible. Iniciando Escaneo Profundo (Deep Scan)...")
-        best_match = self._fuzzy_find_recursive(window, target_name, max_depth=10)
-        
-        if best_match:
-            nervous_system.motor(f"Objetivo encontrado (Fuzzy Logic): '{best_match.Name}'")
-            self._click_element(best_match)
-            return True
-        
-        nervous_system.error("MOTOR", f"Objetivo '{target_name}' no encontrado. Smart fallback no disponible.")
-        return False
+        if remembered and not clicked:
+            self.click_memory.forget(*context, target_name)  # Recordaba otro elemento
+        elif clicked and target is not None:
+            target.scan_ms = scan_ms
+            self.click_memory.record(*context, target_name, target)
+        return clicked
 
-    # --- UTILIDADES DE PRECISIÓN ---
+    def _remembered_control(self, context, window, label):
+        if context is None:
+            return None
+        target = self.click_memory.get(*context, label)
+        if target is None:
+            return None
+        start = time.perf_counter()
+        control = self.backend.locate(target, window)
+        if control is None:
+            self.click_memory.forget(*context, label)
+            return None
+        self.click_memory.hit(target, (time.perf_counter() - start) * 1000)
+        nervous_system.motor(f"Objetivo recordado: '{control.name}' (id '{target.automation_id}')")
+        return control
 
-    def _click_element(self, element):
+    def _verified_click(self, control):
         """
-        Realiza un clic seguro. 
-        Mueve el mouse visualmente hacia el objetivo antes de hacer clic (Feedback visual).
+        Click and check that the screen visibly changed within CLICK_VERIFY_TIMEOUT_S.
+        No change only marks the click unverified: many clicks (a checkbox
+        already set, a focus change) legitimately leave no visible trace.
         """
-        rect = element.BoundingRectangle
-        if rect:
-            center_x = (rect.left + rect.right) // 2
-            center_y = (rect.top + rect.bottom) // 2
-            
-            # Movimiento humano
-            nervous_system.motor(f"Moviendo extremidad a: ({center_x}, {center_y})")
-            pyautogui.moveTo(center_x, center_y, duration=0.3)
-            # Clic UIA (más robusto que pyautogui click)
-            element.Click()
-        else:
-            # Fallback si no tiene rect (raro)
-            nervous_system.motor("Clic ciego (sin coordenadas visuales).")
-            element.Click()
+        # El control puede estar en un popup o en la barra de tareas: se vigila su ventana y la activa
+        region = self._clip_to_screen(self._union_rect(self.backend.foreground_rect(),
+                                                       self.backend.window_rect(control) or control.rect))
+        # Referencia capturada con el cursor ya encima: el resaltado de hover no cuenta
+        if not self.backend.click(control, on_hover=lambda: self.verifier.arm(region)):
+            return False
+        if self.verifier.wait_change() is False:
+            metrics.incr("motor.click.unverified")
+            nervous_system.motor(f"Clic en '{control.name}' sin cambio visible: se da por hecho (sin verificar)")
+        return True
 
-    def _fuzzy_find_recursive(self, root_control, target_text, max_depth=5):
-        """
-        Recorre el árbol de UI y busca el mejor match de texto.
-        Devuelve el Control si la similitud > 0.8
-        """
-        best_control = None
-        best_ratio = 0.0
-        
-        try:
-            # FIXED: TreeWalker no existe en uiautomation 2.0.29
-            # Usamos FindAll directamente que es más eficiente
-            
-            # Optimization: Solo buscar tipos clickeables
-            conditions = auto.OrCondition(
-                auto.ControlTypeCondition(auto.ControlType.ButtonControl),
-                auto.ControlTypeCondition(auto.ControlType.MenuItemControl),
-                auto.ControlTypeCondition(auto.ControlType.TextControl),
-                auto.ControlTypeCondition(auto.ControlType.TabItemControl),
-                auto.ControlTypeCondition(auto.ControlType.HyperlinkControl)
-            )
-            
-            # Buscar en todos los descendientes
-            matches = root_control.FindAll(auto.TreeScope.Descendants, conditions)
-            
-            target_lower = target_text.lower()
-            
-            for el in matches:
-                name = el.Name
-                if not name: continue
-                
-                name_lower = name.lower()
-                
-                # Match Exacto
-                if target_lower == name_lower:
-                    return el
-                
-                # Match Parcial ("Guardar" in "Guardar Todo")
-                if target_lower in name_lower:
-                    ratio = 0.9 if len(name_lower) < len(target_lower)*2 else 0.7
-                    if ratio > best_ratio:
-                        best_ratio = ratio
-                        best_control = el
-                    continue
-                
-                # Fuzzy (Levenshtein)
-                ratio = difflib.SequenceMatcher(None, target_lower, name_lower).ratio()
-                if ratio > best_ratio and ratio > 0.6:
-                    best_ratio = ratio
-                    best_control = el
-
-            return best_control
+    @staticmethod
+    def _union_rect(*rects):
+        rects = [r for r in rects if r]
+        if not rects:
+            return None
+        return (min(r[0] for r in rects), min(r[1] for r in rects),
+                max(r[2] for r in rects), max(r[3] for r in rects))
 
-        except Exception as e:
-            nervous_system.error("MOTOR", f"Error en escaneo profundo: {e}")
+    def _clip_to_screen(self, rect):
+        if not rect:
             return None
-    
+        left, top, right, bottom = rect
+        left, top = max(0, left), max(0, top)
+        right, bottom = min(self.width, right), min(self.height, bottom)
+        return (left, top, right, bottom) if right > left and bottom > top else None
+
+    def _do_wait_window(self, params):
+        """Readiness wait: return as soon as the launched app's window is in the foreground"""
+        title = params.get("title", "").lower().replace(".exe", "")
+        timeout = params.get("timeout", 10)
+        # Título coincide, o apareció una ventana nueva en primer plano
+        window = self.waiter.for_window(title, timeout=timeout, changed_from=self._foreground_before)
+        if window:
+            nervous_system.motor(f"Ventana lista: '{window[1]}'")
+        else:
+            nervous_system.motor(f"Sin ventana '{title}' tras {timeout}s, continuando...")
+        return True
+
+    # --- UTILIDADES DE PRECISIÓN ---
+
+    def _foreground_handle(self):
+        window = self.waiter.probe.foreground_window()
+        return window[0] if window else None
+
     def _get_keyboard_shortcut(self, target_text: str) -> str:
         """
         Smart keyboard shortcut mapping for common actions
@@ -308,45 +360,48 @@ class AutomationEngine:
     def _do_minimize(self, params):
         """Minimize current window"""
         nervous_system.motor("Minimizando ventana activa...")
-        pyautogui.hotkey('win', 'down')
+        self.backend.hotkey('win', 'down')
         return True
     
     def _do_maximize(self, params):
         """Maximize current window"""
         nervous_system.motor("Maximizando ventana activa...")
-        pyautogui.hotkey('win', 'up')
+        self.backend.hotkey('win', 'up')
         return True
     
     def _do_close_window(self, params):
         """Close current window"""
         nervous_system.motor("Cerrando ventana activa...")
-        pyautogui.hotkey('alt', 'f4')
+        self.backend.hotkey('alt', 'f4')
         return True
     
     def _do_save(self, params):
         """Universal save command"""
         nervous_system.motor("Guardando documento (Ctrl+S)...")
-        pyautogui.hotkey('ctrl', 's')
-        time.sleep(0.5)
+        before = self.waiter.probe.foreground_window()
+        self.backend.hotkey('ctrl', 's')
+        # Diálogo "Guardar como" o título sin '*': listo
+        self.waiter.for_foreground_change(before, timeout=0.5)
         return True
     
     def _do_refresh(self, params):
         """Refresh/Reload"""
         nervous_system.motor("Actualizando (F5)...")
-        pyautogui.press('f5')
+        self.backend.hotkey('f5')
         return True
     
     def _do_screenshot(self, params):
         """Take screenshot"""
         nervous_system.motor("Capturando pantalla...")
-        pyautogui.hotkey('win', 'shift', 's')  # Windows Snipping Tool
+        self.backend.hotkey('win', 'shift', 's')  # Windows Snipping Tool
         return True
     
     def _do_switch_app(self, params):
         """Switch between applications (Alt+Tab)"""
         nervous_system.motor("Cambiando de aplicación...")
-        pyautogui.hotkey('alt', 'tab')
-        time.sleep(0.5)
+        before = self.waiter.probe.foreground_window()
+        self.backend.hotkey('alt', 'tab')
+        self.waiter.for_foreground_change(before, timeout=0.5)
         return True
 
 if __name__ == "__main__":
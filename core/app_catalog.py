@@ -0,0 +1,412 @@
+"""
+App Catalogue - Installed applications indexed from Start Menu, PATH and App Paths
+Scanned once, persisted to configs/app_catalog.json and refreshed incrementally:
+only directories whose mtime changed are listed again. Lookup is fuzzy over
+display names (NameIndex) with Spanish/English synonyms.
+"""
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.name_index import NameIndex, fold
+
+CATALOG_FILE = Path(__file__).parent.parent / "configs" / "app_catalog.json"
+CATALOG_VERSION = 3
+
+LAUNCHABLE = (".lnk", ".exe", ".url", ".appref-ms")
+# Accesos del menú Inicio que no son la app en sí
+SKIP_WORDS = ("uninstall", "desinstalar", "readme", "léame", "help", "ayuda", "website", "release notes")
+
+# Sinónimos es <-> en (claves ya normalizadas con fold)
+SYNONYMS = {
+    "bloc de notas": "notepad",
+    "calculadora": "calculator",
+    "explorador de archivos": "file explorer",
+    "explorador": "file explorer",
+    "configuracion": "settings",
+    "ajustes": "settings",
+    "panel de control": "control panel",
+    "simbolo del sistema": "command prompt",
+    "terminal": "windows terminal",
+    "administrador de tareas": "task manager",
+    "recortes": "snipping tool",
+    "herramienta recortes": "snipping tool",
+    "navegador": "microsoft edge",
+    "correo": "mail",
+    "calendario": "calendar",
+    "fotos": "photos",
+    "reloj": "clock",
+    "camara": "camera",
+    "mapas": "maps",
+    "musica": "media player",
+    "tienda": "microsoft store",
+    "visual studio code": "code",
+    "vs code": "code",
+}
+
+
+class AppEntry:
+    __slots__ = ("name", "target", "source", "exe")
+
+    def __init__(self, name, target, source, exe=None):
+        self.name = name      # nombre visible: "Google Chrome"
+        self.target = target  # lo que se lanza: el acceso directo conserva argumentos y carpeta de inicio
+        self.source = source  # start_menu | app_paths | path
+        self.exe = exe        # ejecutable real si se conoce (para reconocer su proceso)
+
+    def __repr__(self):
+        return f"AppEntry({self.name!r}, {self.target!r}, {self.source})"
+
+    def to_list(self):
+        return [self.name, self.target, self.source, self.exe]
+
+
+# --- SISTEMA DE ARCHIVOS ---
+
+class OSFileSystem:
+    def mtime(self, path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def listdir(self, path):
+        """(files, subdirs) names"""
+        files, dirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    (dirs if entry.is_dir() else files).append(entry.name)
+        except OSError:
+            pass
+        return files, dirs
+
+    def read_head(self, path, size=4096):
+        try:
+            with open(path, "rb") as f:
+                return f.read(size)
+        except OSError:
+            return b""
+
+
+class FakeFileSystem:
+    """
+    In-memory tree for building and testing the catalogue on any OS:
+        fs = FakeFileSystem()
+        fs.add_file("C:/PM/Programs/Google Chrome.lnk", target="C:/Chrome/chrome.exe")
+    Paths use '/'; adding or removing a file bumps its directory's mtime.
+    """
+
+    def __init__(self):
+        self.dirs = {}   # ruta -> mtime
+        self.files = {}  # ruta -> contenido (bytes)
+        self.listings = 0
+        self._clock = 1.0
+
+    def _tick(self):
+        self._clock += 1.0
+        return self._clock
+
+    def add_dir(self, path):
+        path = path.rstrip("/")
+        while path and path not in self.dirs:
+            self.dirs[path] = self._tick()
+            parent = os.path.dirname(path)
+            if parent in self.dirs:
+                self.dirs[parent] = self._tick()
+            if parent == path:
+                break
+            path = parent
+
+    def add_file(self, path, target=None, data=b""):
+        self.add_dir(os.path.dirname(path))
+        self.files[path] = make_shortcut(target) if target else data
+        self.dirs[os.path.dirname(path)] = self._tick()
+
+    def remove(self, path):
+        self.files.pop(path, None)
+        self.dirs[os.path.dirname(path)] = self._tick()
+
+    def mtime(self, path):
+        return self.dirs.get(path.rstrip("/"))
+
+    def listdir(self, path):
+        self.listings += 1
+        path = path.rstrip("/")
+        files = [os.path.basename(p) for p in self.files if os.path.dirname(p) == path]
+        dirs = [os.path.basename(p) for p in self.dirs if os.path.dirname(p) == path and p != path]
+        return files, dirs
+
+    def read_head(self, path, size=4096):
+        return self.files.get(path, b"")[:size]
+
+
+# --- ACCESOS DIRECTOS (.lnk) ---
+
+def read_shortcut_target(data):
+    """Local target path of a Shell Link (.lnk) from its LinkInfo block, or None"""
+    if len(data) < 0x4C or data[:4] != b"\x4c\x00\x00\x00":
+        return None
+    flags = struct.unpack_from("<I", data, 0x14)[0]
+    pos = 0x4C
+    if flags & 0x01:  # HasLinkTargetIDList
+        if len(data) < pos + 2:
+            return None
+        pos += 2 + struct.unpack_from("<H", data, pos)[0]
+    if not flags & 0x02 or len(data) < pos + 28:  # HasLinkInfo
+        return None
+    header_size, info_flags, _, base_offset = struct.unpack_from("<IIII", data, pos + 4)
+    if not info_flags & 0x01:  # VolumeIDAndLocalBasePath
+        return None
+    if header_size >= 0x24:
+        unicode_offset = struct.unpack_from("<I", data, pos + 28)[0]
+        if unicode_offset:
+            start = pos + unicode_offset
+            end = data.find(b"\x00\x00", start)
+            while end != -1 and (end - start) % 2:
+                end = data.find(b"\x00\x00", end + 1)
+            if end != -1:
+                return data[start:end].decode("utf-16-le", "ignore") or None
+    start = pos + base_offset
+    end = data.find(b"\x00", start)
+    if end == -1:
+        return None
+    return data[start:end].decode("mbcs" if sys.platform == "win32" else "latin-1", "ignore") or None
+
+
+def make_shortcut(target):
+    """Minimal .lnk with a LinkInfo local base path (for FakeFileSystem)"""
+    path = target.encode("latin-1") + b"\x00"
+    link_info = struct.pack("<IIIIIII", 28 + len(path), 28, 0x01, 0, 28, 0, 0) + path
+    header = b"\x4c\x00\x00\x00" + b"\x00" * 16 + struct.pack("<I", 0x02) + b"\x00" * (0x4C - 0x18)
+    return header + link_info
+
+
+# --- REGISTRO (App Paths) ---
+
+def read_app_paths():
+    """{exe name: path} from HKCU/HKLM App Paths"""
+    if sys.platform != "win32":
+        return {}
+    import winreg
+    key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths"
+    found = {}
+    for hive in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+        try:
+            root = winreg.OpenKey(hive, key_path)
+        except OSError:
+            continue
+        with root:
+            for i in range(winreg.QueryInfoKey(root)[0]):
+                exe = winreg.EnumKey(root, i)
+                try:
+                    with winreg.OpenKey(root, exe) as key:
+                        value, _ = winreg.QueryValueEx(key, None)
+                except OSError:
+                    continue
+                found[exe] = os.path.expandvars(str(value).strip('"'))
+    return found
+
+
+def default_roots():
+    """Start Menu program folders and PATH directories of this machine"""
+    start_menu = []
+    for base in (os.environ.get("PROGRAMDATA"), os.environ.get("APPDATA")):
+        if base:
+            start_menu.append(os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"))
+    path_dirs = [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+    return start_menu, path_dirs
+
+
+# --- CATÁLOGO ---
+
+class AppCatalog:
+    """
+    Per-directory scan state {dir: {"mtime", "apps", "dirs"}}. refresh() stats
+    every known directory and lists only those whose mtime moved.
+    """
+
+    def __init__(self, fs=None, start_menu=None, path_dirs=None, app_paths=read_app_paths, cache_file=CATALOG_FILE):
+        if start_menu is None or path_dirs is None:
+            default_menu, default_path = default_roots()
+            start_menu = default_menu if start_menu is None else start_menu
+            path_dirs = default_path if path_dirs is None else path_dirs
+        self.fs = fs or OSFileSystem()
+        self.start_menu = list(start_menu)
+        self.path_dirs = list(path_dirs)
+        self.app_paths = app_paths
+        self.cache_file = cache_file
+        self.dirs = {}
+        self.registry = {}
+        self.entries = []
+        self.index = None
+        self.refreshed = 0.0
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # --- API ---
+
+    def lookup(self, name, min_score=0.6):
+        """Best AppEntry for a spoken name (es/en), or None"""
+        self.ensure_loaded()
+        query = fold(name)
+        if not query:
+            return None
+        with self._lock:
+            index, entries = self.index, self.entries
+        if index is None:
+            return None
+        ranked = [(score, -_SOURCE_RANK[entries[i].source], -i)
+                  for candidate in {query, SYNONYMS.get(query, query)}
+                  for i, score in index.search(candidate, k=5, min_score=min_score)]
+        if not ranked:
+            metrics.incr("motor.catalog.misses")
+            return None
+        metrics.incr("motor.catalog.hits")
+        return entries[-max(ranked)[2]]
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.load()
+            self.refresh()
+            self._loaded = True
+
+    def warm(self):
+        """Load + refresh on a background thread (startup)"""
+        threading.Thread(target=self.ensure_loaded, daemon=True, name="app-catalog").start()
+
+    def load(self):
+        if self.cache_file is None or not Path(self.cache_file).exists():
+            return False
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Catálogo de apps ilegible, se reconstruye: {e}")
+            return False
+        if data.get("version") != CATALOG_VERSION:
+            return False
+        with self._lock:
+            self.dirs = {d: {"mtime": s["mtime"], "dirs": s["dirs"], "apps": [AppEntry(*a) for a in s["apps"]]}
+                         for d, s in data.get("dirs", {}).items()}
+            self.registry = data.get("registry", {})
+            self._rebuild()
+        return True
+
+    def save(self):
+        if self.cache_file is None:
+            return
+        with self._lock:
+            data = {
+                "version": CATALOG_VERSION,
+                "registry": self.registry,
+                "dirs": {d: {"mtime": s["mtime"], "dirs": s["dirs"], "apps": [a.to_list() for a in s["apps"]]}
+                         for d, s in self.dirs.items()},
+            }
+        try:
+            Path(self.cache_file).parent.mkdir(exist_ok=True)
+            tmp = f"{self.cache_file}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"No se pudo guardar el catálogo de apps: {e}")
+
+    def refresh(self):
+        """Incremental rescan; returns the number of directories listed again"""
+        start = time.perf_counter()
+        with self._lock:
+            changed = 0
+            seen = set()
+            for root in self.start_menu:
+                changed += self._scan(root, "start_menu", recursive=True, seen=seen)
+            for root in self.path_dirs:
+                changed += self._scan(root, "path", recursive=False, seen=seen)
+            for gone in [d for d in self.dirs if d not in seen]:
+                del self.dirs[gone]
+                changed += 1
+
+            try:
+                registry = self.app_paths() if self.app_paths else {}
+            except Exception as e:
+                nervous_system.error("MOTOR", f"Error leyendo App Paths: {e}")
+                registry = self.registry
+            if registry != self.registry:
+                self.registry = registry
+                changed += 1
+
+            if changed or self.index is None:
+                self._rebuild()
+                self.save()
+            self.refreshed = time.monotonic()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.histogram("motor.catalog.refresh_ms").record(elapsed_ms)
+        if changed:
+            nervous_system.motor(f"Catálogo de apps: {len(self.entries)} entradas ({changed} carpetas nuevas o "
+                                 f"cambiadas, {elapsed_ms:.0f}ms)")
+        return changed
+
+    # --- ESCANEO ---
+
+    def _scan(self, directory, source, recursive, seen):
+        directory = directory.rstrip("/\\")
+        if directory in seen:
+            return 0
+        seen.add(directory)
+        mtime = self.fs.mtime(directory)
+        if mtime is None:
+            return 0
+
+        changed = 0
+        state = self.dirs.get(directory)
+        if state is None or state["mtime"] != mtime:
+            files, subdirs = self.fs.listdir(directory)
+            apps = [entry for entry in (self._entry(directory, f, source) for f in files) if entry]
+            state = self.dirs[directory] = {"mtime": mtime, "apps": apps, "dirs": sorted(subdirs)}
+            changed = 1
+        if recursive:
+            for sub in state["dirs"]:
+                changed += self._scan(os.path.join(directory, sub), source, recursive, seen)
+        return changed
+
+    def _entry(self, directory, filename, source):
+        stem, ext = os.path.splitext(filename)
+        ext = ext.lower()
+        if ext not in LAUNCHABLE or (source == "path" and ext != ".exe"):
+            return None
+        if source == "start_menu" and any(word in stem.lower() for word in SKIP_WORDS):
+            return None
+        path = os.path.join(directory, filename)
+        if ext == ".exe":
+            return AppEntry(stem, path, source, exe=path)
+        if ext != ".lnk":
+            return AppEntry(stem, path, source)
+        # Se lanza el .lnk (argumentos y carpeta de inicio); el exe solo identifica su proceso
+        resolved = read_shortcut_target(self.fs.read_head(path))
+        exe = resolved if resolved and resolved.lower().endswith(".exe") else None
+        return AppEntry(stem, path, source, exe=exe)
+
+    def _rebuild(self):
+        entries = [app for state in self.dirs.values() for app in state["apps"]]
+        entries += [AppEntry(os.path.splitext(exe)[0], path, "app_paths", exe=path)
+                    for exe, path in self.registry.items()]
+        self.entries = entries
+        self.index = NameIndex([e.name for e in entries])
+
+
+# Menor = preferido ante empate (un acceso del menú Inicio es lo que el usuario "ve")
+_SOURCE_RANK = {"start_menu": 0, "app_paths": 1, "path": 2}
+
+
+# Instancia global
+app_catalog = AppCatalog()
@@ -0,0 +1,159 @@
+"""
+App Launcher - Resolves spoken app names to executables and starts them without a shell
+Resolution (alias table, PATH, App Paths registry key, then the installed-app
+catalogue) is cached per name, so repeated "abre X" skip the lookup and never
+pay cmd.exe start-up. Misses are not cached: an unknown name triggers a
+rate-limited catalogue rescan, so freshly installed apps are found.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from core.app_catalog import app_catalog
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+
+# Nombre hablado -> ejecutable
+KNOWN_APPS = {
+    "notepad": "notepad.exe",
+    "bloc de notas": "notepad.exe",
+    "calculator": "calc.exe",
+    "calculadora": "calc.exe",
+    "chrome": "chrome.exe",
+    "edge": "msedge.exe",
+    "cmd": "cmd.exe",
+    "explorer": "explorer.exe",
+    "explorador": "explorer.exe",
+    "spotify": "spotify.exe",
+    "code": "code",
+    "word": "winword.exe",
+    "excel": "excel.exe",
+    "powerpoint": "powerpnt.exe",
+}
+
+DIRECT_EXTENSIONS = (".exe", ".com", ".bat", ".cmd")
+APP_PATHS_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths"
+
+
+class AppLauncher:
+    def __init__(self):
+        self._cache = {}  # nombre -> ruta absoluta o None
+        self._lock = threading.Lock()
+
+    def command_for(self, app_name):
+        app = app_name.lower().strip()
+        return KNOWN_APPS.get(app, app)
+
+    def resolve(self, app_name):
+        """Absolute executable path for an app name, or None"""
+        app = app_name.lower().strip()
+        with self._lock:
+            if app in self._cache:
+                metrics.incr("motor.launch.resolve.hits")
+                return self._cache[app]
+        metrics.incr("motor.launch.resolve.misses")
+
+        cmd = self.command_for(app)
+        path = shutil.which(cmd) or self._app_paths(cmd) or self._catalog(app)
+        if path is None and self._refresh_catalog(app):
+            path = self._catalog(app)
+        if path is None:
+            # Sin cachear: la app puede instalarse mientras el agente corre
+            if not _is_path(app):
+                nervous_system.motor(f"'{app}' no está en PATH, App Paths ni en el catálogo de apps")
+            return None
+        with self._lock:
+            self._cache[app] = path
+        return path
+
+    def process_names(self, app_name):
+        """Process base names an instance of this app would run under (empty if unknown)"""
+        names = set()
+        app = app_name.lower().strip()
+        if app in KNOWN_APPS:
+            names.add(os.path.splitext(os.path.basename(KNOWN_APPS[app]))[0])
+        path = self.resolve(app_name)
+        if path and not path.lower().endswith(DIRECT_EXTENSIONS):
+            # Acceso directo: el catálogo sabe qué ejecutable arranca (si lo resolvió)
+            entry = self._entry(app)
+            path = entry.exe if entry else None
+        if path:
+            names.add(os.path.splitext(os.path.basename(path))[0].lower())
+        return names
+
+    def display_name(self, app_name):
+        """Catalog name ("Google Chrome") for an app name, or None"""
+        entry = self._entry(app_name.lower().strip())
+        return entry.name if entry else None
+
+    def launch(self, app_name):
+        """Start the app; returns the resolved path (or the name handed to the shell association)"""
+        path = self.resolve(app_name)
+        if path and path.lower().endswith(DIRECT_EXTENSIONS):
+            subprocess.Popen([path], close_fds=True)
+            return path
+        if path and hasattr(os, "startfile"):
+            os.startfile(path)  # Acceso directo (.lnk/.url) del catálogo
+            return path
+        # Sin ejecutable conocido: asociación del shell (URIs como ms-settings:, documentos)
+        if hasattr(os, "startfile"):
+            cmd = self.command_for(app_name)
+            os.startfile(cmd)
+            return cmd
+        raise FileNotFoundError(f"Ejecutable no encontrado: {app_name}")
+
+    def forget(self, app_name=None):
+        with self._lock:
+            if app_name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(app_name.lower().strip(), None)
+
+    def _app_paths(self, cmd):
+        """HKCU/HKLM App Paths: where installers register chrome.exe, winword.exe..."""
+        if sys.platform != "win32":
+            return None
+        import winreg
+        exe = cmd if cmd.endswith(".exe") else f"{cmd}.exe"
+        for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(hive, f"{APP_PATHS_KEY}\\{exe}") as key:
+                    value, _ = winreg.QueryValueEx(key, None)
+            except OSError:
+                continue
+            value = os.path.expandvars(value.strip('"'))
+            if os.path.isfile(value):
+                return value
+        return None
+
+    @staticmethod
+    def _entry(app):
+        return None if _is_path(app) else app_catalog.lookup(app)
+
+    def _catalog(self, app):
+        if _is_path(app):
+            return None  # Rutas y URIs van directo a la asociación del shell
+        entry = app_catalog.lookup(app)
+        if entry is None:
+            return None
+        nervous_system.motor(f"'{app}' -> {entry.name} ({entry.source})")
+        return entry.target
+
+    @staticmethod
+    def _refresh_catalog(app):
+        """Incremental rescan on a miss, at most once per APP_CATALOG_MISS_REFRESH_S; True if something changed"""
+        if _is_path(app) or time.monotonic() - app_catalog.refreshed < settings.APP_CATALOG_MISS_REFRESH_S:
+            return False
+        metrics.incr("motor.catalog.miss_refreshes")
+        return app_catalog.refresh() > 0
+
+
+def _is_path(app):
+    return any(sep in app for sep in ("/", "\\", ":"))
+
+
+# Instancia global
+app_launcher = AppLauncher()
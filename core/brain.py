@@ -1,81 +1,30 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import httpx
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from core.config import settings
+from core.dialogue import SessionStore
 from core.logger import nervous_system
+from core.metrics import metrics, LLMCallRecord
+from core.plan_validator import plan_validator, format_errors
+from core.router import ComplexityRouter
+from core.tech_manager import tech_manager
 
 # Import local LLM engine
 try:
     from core.engines.llm.ollama_engine import OllamaEngine
+    from core.engines.llm.ollama_residency import residency
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
     nervous_system.cognitive("Ollama no disponible, usando cloud LLM")
 
-class Brain:
-    def __init__(self):
-        # LOCAL LLM (Primary - if available)
-        self.local_llm = None
-        if OLLAMA_AVAILABLE:
-            try:
-                self.local_llm = OllamaEngine(model="llama3.1:8b")
-                if self.local_llm.is_available():
-                    nervous_system.cognitive("✓ Ollama LLaMA (local) disponible")
-                else:
-                    self.local_llm = None
-            except Exception as e:
-                nervous_system.error("COGNITIVE", f"Error inicializando Ollama: {e}")
-        
-        # CLOUD LLM (Fallback - SambaNova)
-        # SambaNova es compatible con la librería de OpenAI si cambiamos la URL base
-        self.client = OpenAI(
-            base_url=settings.SAMBANOVA_URL,
-            api_key=settings.SAMBANOVA_API_KEY
-        )
-        # Using Llama 3.3 70B - current SambaNova model (405B is deprecated)
-        self.model = "Meta-Llama-3.3-70B-Instruct" 
-        nervous_system.cognitive(f"Cortex Central (Local+Cloud) Conectado.")
-
-    def think(self, user_message):
-        nervous_system.cognitive(f"Analizando intención: '{user_message}'...")
-        
-        # PRIMARY: Ollama (Local LLM - no rate limits)
-        if self.local_llm is not None:
-            try:
-                response = self.local_llm.think(user_message, self._get_system_prompt())
-                if response:
-                    nervous_system.cognitive(f"✓ Ollama (local): {response[:100]}...")
-                    return json.loads(response)
-            except json.JSONDecodeError as e:
-                nervous_system.error("COGNITIVE", f"Ollama JSON inválido: {e}")
-            except Exception as e:
-                nervous_system.error("COGNITIVE", f"Ollama error: {e}, usando fallback...")
-        
-        # FALLBACK: SambaNova (Cloud LLM)
-        try:
-            nervous_system.cognitive("Usando SambaNova (cloud fallback)...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.3,
-                max_tokens=512
-            )
-            
-            content = response.choices[0].message.content
-            nervous_system.cognitive(f"Sinapsis completada (SambaNova). Plan: {content[:100]}...")
-            return json.loads(content)
-            
-        except Exception as e:
-            nervous_system.error("COGNITIVE", f"Derrame cerebral (Error API): {e}")
-            return {"action": "error", "parameters": {}}
-    
-    def _get_system_prompt(self):
-        """
-        Returns the system prompt for the LLM.
-        """
-        return """
+# Prompt estático: se construye una sola vez y se envía idéntico en cada llamada
+# para que el prefijo quede cacheado en Ollama (llama.cpp prompt cache).
+SYSTEM_PROMPT = """
         Eres un Asistente de Accesibilidad para Windows (PC Agent).
         Tu objetivo es permitir que el usuario controle TODO el ordenador con voz.
         
@@ -89,7 +38,7 @@ class Brain:
         ACCIONES DISPONIBLES:
         
         BÁSICAS:
-        1. "open_app": {"app_name": "nombre_o_ruta"} -> Abrir programas, carpetas o archivos (Ej: "notepad", "C:/Users")
+        1. "open_app": {"app_name": "nombre_o_ruta"} -> Abrir programas, carpetas o archivos (Ej: "notepad", "C:/Users"). Si ya está abierto lo trae al frente; "new_instance": true fuerza otra ventana
         2. "type": {"text": "texto"} -> Escribir texto
         3. "press_key": {"key": "tecla"} -> Presionar tecla o combinación (enter, ctrl+c)
         4. "click": {"element": "nombre"} -> Clic en botones/menús (tiene fallback inteligente)
@@ -165,24 +114,503 @@ class Brain:
         }
         """
 
+class Brain:
+    def __init__(self):
+        self.system_prompt = SYSTEM_PROMPT
+        # Historial por sesión (voz = sesión por defecto, API = una por cliente)
+        self.sessions = SessionStore()
+
+        # LOCAL LLM (Primary - if available): un motor por tier del router
+        self.local_llms = {}
+        if OLLAMA_AVAILABLE:
+            for tier, model in (("fast", settings.LLM_FAST_MODEL), ("full", settings.LLM_FULL_MODEL)):
+                try:
+                    engine = OllamaEngine(model=model)
+                    if engine.is_available():
+                        nervous_system.cognitive(f"✓ Ollama {model} (local, tier {tier}) disponible")
+                        self.local_llms[tier] = engine
+                except Exception as e:
+                    nervous_system.error("COGNITIVE", f"Error inicializando Ollama ({model}): {e}")
+        if self.local_llms:
+            # Solo los modelos del stack activo se precargan y se mantienen calientes
+            self._sync_keepalive()
+            tech_manager.add_listener(self._on_config_changed)
+            residency.add_evict_listener(self._on_models_evicted)
+            threading.Thread(target=residency.preload_active, daemon=True, name="ollama-preload").start()
+            # Vigilar RAM: descargar modelos ajenos al stack activo si escasea
+            residency.start_monitor()
+        # Motor local "principal" (el más capaz disponible)
+        self.local_llm = self.local_llms.get("full") or self.local_llms.get("fast")
+        self.router = ComplexityRouter()
+        
+        # CLOUD LLM (Fallback - SambaNova)
+        # SambaNova es compatible con la librería de OpenAI si cambiamos la URL base
+        # Pools keep-alive compartidos: evitan un handshake TLS por comando
+        limits = httpx.Limits(max_connections=settings.LLM_MAX_CONCURRENCY,
+                              max_keepalive_connections=settings.LLM_MAX_CONCURRENCY)
+        self.client = OpenAI(
+            base_url=settings.SAMBANOVA_URL,
+            api_key=settings.SAMBANOVA_API_KEY,
+            timeout=settings.LLM_TIMEOUT_S,
+            http_client=httpx.Client(limits=limits, timeout=settings.LLM_TIMEOUT_S)
+        )
+        self.async_client = AsyncOpenAI(
+            base_url=settings.SAMBANOVA_URL,
+            api_key=settings.SAMBANOVA_API_KEY,
+            timeout=settings.LLM_TIMEOUT_S,
+            http_client=httpx.AsyncClient(limits=limits, timeout=settings.LLM_TIMEOUT_S)
+        )
+        # Using Llama 3.3 70B - current SambaNova model (405B is deprecated)
+        self.model = "Meta-Llama-3.3-70B-Instruct" 
+
+        # Hilos para lanzar local y cloud en paralelo (hedging)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="brain")
+        # Limitador de llamadas concurrentes para la ruta async (API)
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        nervous_system.cognitive("Cortex Central (Local+Cloud) Conectado.")
+
+    def _sync_keepalive(self):
+        """Ping in the background only the engines whose model the active stack keeps resident"""
+        active = set(residency.active_models())
+        for engine in self.local_llms.values():
+            if engine.model in active:
+                # Precarga + ping en reposo: modelo y prompt siempre calientes
+                engine.start_keepalive(self.system_prompt)
+            else:
+                engine.stop_keepalive()
+
+    def _on_config_changed(self, event):
+        if event in ("stack", "llm"):
+            self._sync_keepalive()
+
+    def _on_models_evicted(self, models):
+        # Un ping posterior volvería a cargar lo que el monitor acaba de liberar
+        for engine in self.local_llms.values():
+            if engine.model in models:
+                engine.stop_keepalive()
+
+    def think(self, user_message, session_id=None, speculative=False):
+        """
+        Plan an utterance. A speculative call (partial transcript) does not touch
+        the session history; remember() stores its plan once the final transcript confirms it.
+        """
+        nervous_system.cognitive(f"Analizando intención{' (especulativo)' if speculative else ''}: '{user_message}'...")
+        start = time.perf_counter()
+
+        memory = self.sessions.get(session_id)
+        history = memory.messages()
+
+        policy = tech_manager.get_llm_policy()
+        tier = self._route(user_message, history, policy)
+        plan, winner, reason = self._dispatch(user_message, history, session_id, policy, tier)
+        plan = self._validate(plan, user_message, history, session_id, winner, tier)
+
+        # Escalado: el tier rápido no produjo un plan válido ni reparable
+        if tier == "fast" and plan is None:
+            escalated = self._escalate(tier, policy)
+            if escalated:
+                plan, winner, reason = self._dispatch(user_message, history, session_id, policy, escalated)
+                plan = self._validate(plan, user_message, history, session_id, winner, escalated)
+                reason = reason or "escalated"
+
+        return self._finish(memory, user_message, plan, policy, winner, reason, start,
+                            remember=not speculative)
+
+    async def athink(self, user_message, session_id=None):
+        """
+        Async think() for the API: no threadpool thread is held during the
+        LLM round trip, and the losing hedged call is really cancelled.
+        """
+        memory = self.sessions.get(session_id)
+        async with self.semaphore:
+            nervous_system.cognitive(f"Analizando intención (async): '{user_message}'...")
+            start = time.perf_counter()
+            history = memory.messages()
+
+            policy = tech_manager.get_llm_policy()
+            tier = self._route(user_message, history, policy)
+            plan, winner, reason = await self._adispatch(user_message, history, session_id, policy, tier)
+            plan = await self._avalidate(plan, user_message, history, session_id, winner, tier)
+
+            if tier == "fast" and plan is None:
+                escalated = self._escalate(tier, policy)
+                if escalated:
+                    plan, winner, reason = await self._adispatch(user_message, history, session_id,
+                                                                 policy, escalated)
+                    plan = await self._avalidate(plan, user_message, history, session_id, winner, escalated)
+                    reason = reason or "escalated"
+
+        return self._finish(memory, user_message, plan, policy, winner, reason, start)
+
+    def remember(self, user_message, plan, session_id=None):
+        """Store a turn planned outside think() (e.g. a confirmed speculative plan)"""
+        if plan and plan.get("action") != "error":
+            self.sessions.get(session_id).record(user_message, plan)
+
+    def reset_session(self, session_id=None):
+        """Forget the dialogue history of a session"""
+        return self.sessions.reset(session_id)
+
+    def _finish(self, memory, user_message, plan, policy, winner, fallback_reason, start, remember=True):
+        """Account the whole Brain call and store the turn in the session history"""
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.histogram("brain.think_ms").record(elapsed_ms)
+        metrics.incr(f"brain.policy.{policy}")
+        if fallback_reason:
+            metrics.incr(f"brain.fallback.{fallback_reason}")
+
+        if plan is None:
+            metrics.incr("brain.errors")
+            nervous_system.cognitive(f"Métricas: policy={policy} sin plan ({elapsed_ms:.0f}ms)")
+            return {"action": "error", "parameters": {}}
+
+        metrics.incr(f"brain.winner.{winner}")
+        nervous_system.cognitive(
+            f"Métricas: policy={policy} backend={winner} fallback={fallback_reason or '-'} "
+            f"total={elapsed_ms:.0f}ms")
+        if remember:
+            memory.record(user_message, plan)
+        return plan
+
+    # --- ROUTER DE COMPLEJIDAD ---
+
+    def _route(self, user_message, history, policy):
+        """Pick the tier for this utterance and map it to what is actually available"""
+        if not settings.LLM_ROUTER_ENABLED:
+            return self._resolve_tier("full", policy)
+
+        decision = self.router.route(user_message, has_history=bool(history))
+        tier = self._resolve_tier(decision.tier, policy)
+        metrics.incr(f"router.tier.{tier}")
+        nervous_system.cognitive(
+            f"Router: tier={tier} (sugerido {decision.tier}; {', '.join(decision.reasons)}; "
+            f"palabras={decision.words}, verbos={decision.verbs})")
+        return tier
+
+    def _resolve_tier(self, tier, policy):
+        if tier == "cloud":
+            # local_only nunca sube al cloud si hay motor local
+            if policy == "local_only" and self.local_llms:
+                return self._resolve_tier("full", policy)
+            return "cloud"
+        if tier in self.local_llms:
+            return tier
+        other = "full" if tier == "fast" else "fast"
+        return other if other in self.local_llms else "cloud"
+
+    def _escalate(self, tier, policy):
+        """Next tier above `tier`, or None when nothing more capable is available"""
+        escalated = self._resolve_tier("full", policy)
+        if escalated == tier:
+            escalated = self._resolve_tier("cloud", policy)
+        if escalated == tier:
+            return None
+        metrics.incr("router.escalations")
+        nervous_system.cognitive(f"Router: plan inválido en tier {tier}, escalando a {escalated}")
+        return escalated
+
+    def _dispatch(self, user_message, history, session_id, policy, tier):
+        """Run one tier under the active policy. Returns (plan, winner, fallback_reason)"""
+        if tier == "cloud":
+            plan = self._think_cloud(user_message, history, session_id)
+            if plan is None and self.local_llm is not None:
+                return self._think_local(user_message, history, session_id, "full"), "local", "cloud_failed"
+            return plan, "cloud", None if self.local_llms else "no_local"
+        if policy == "local_only":
+            return self._think_local(user_message, history, session_id, tier), "local", None
+        return self._think_hedged(user_message, history, session_id, tier, race=(policy == "race"))
+
+    async def _adispatch(self, user_message, history, session_id, policy, tier):
+        if tier == "cloud":
+            plan = await self._athink_cloud(user_message, history, session_id)
+            if plan is None and self.local_llm is not None:
+                return await self._athink_local(user_message, history, session_id, "full"), "local", "cloud_failed"
+            return plan, "cloud", None if self.local_llms else "no_local"
+        if policy == "local_only":
+            return await self._athink_local(user_message, history, session_id, tier), "local", None
+        return await self._athink_hedged(user_message, history, session_id, tier, race=(policy == "race"))
+
+    # --- VALIDACIÓN Y REPARACIÓN DE PLANES ---
+
+    def _validate(self, plan, user_message, history, session_id, winner, tier):
+        """
+        Check the plan against the action schema. Trivial issues are repaired
+        locally; otherwise the same backend gets one targeted correction prompt.
+        Returns a valid plan or None.
+        """
+        if plan is None:
+            return None
+        result = self._check_plan(plan)
+        if result.ok:
+            return result.plan
+
+        correction, repair_history = self._repair_prompt(result, user_message, history)
+        if winner == "cloud":
+            retry = self._think_cloud(correction, repair_history, session_id)
+        else:
+            retry = self._think_local(correction, repair_history, session_id, self._local_tier(tier))
+        return self._check_retry(retry)
+
+    async def _avalidate(self, plan, user_message, history, session_id, winner, tier):
+        if plan is None:
+            return None
+        result = self._check_plan(plan)
+        if result.ok:
+            return result.plan
+
+        correction, repair_history = self._repair_prompt(result, user_message, history)
+        if winner == "cloud":
+            retry = await self._athink_cloud(correction, repair_history, session_id)
+        else:
+            retry = await self._athink_local(correction, repair_history, session_id, self._local_tier(tier))
+        return self._check_retry(retry)
+
+    def _check_plan(self, plan):
+        result = plan_validator.validate(plan)
+        if result.repairs:
+            nervous_system.cognitive(f"Plan reparado localmente: {'; '.join(result.repairs)}")
+        if not result.ok:
+            nervous_system.error("COGNITIVE", f"Plan inválido: {'; '.join(result.errors)}")
+        return result
+
+    def _repair_prompt(self, result, user_message, history):
+        """Targeted correction: the original turn plus the bad plan and its errors"""
+        metrics.incr("plan.reprompts")
+        repair_history = [
+            *history,
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": json.dumps(result.plan, ensure_ascii=False)},
+        ]
+        return format_errors(result.errors), repair_history
+
+    def _check_retry(self, retry):
+        if retry is None:
+            return None
+        result = self._check_plan(retry)
+        if result.ok:
+            metrics.incr("plan.reprompt_fixed")
+            return result.plan
+        return None
+
+    @staticmethod
+    def _local_tier(tier):
+        return "full" if tier == "cloud" else tier
+
+    # --- DESPACHO LOCAL / CLOUD ---
+
+    def _think_hedged(self, user_message, history, session_id=None, tier="full", race=False):
+        """
+        Start Ollama, and launch SambaNova as well if no valid plan arrived
+        within the hedge delay (immediately when racing). First valid plan wins.
+        Returns (plan, winner, fallback_reason).
+        """
+        pending = {self.executor.submit(self._think_local, user_message, history, session_id, tier): "local"}
+        cloud_started = False
+        reason = None
+
+        delay = 0.0 if race else self._hedge_delay(tier) / 1000.0
+        if race:
+            pending[self.executor.submit(self._think_cloud, user_message, history, session_id)] = "cloud"
+            cloud_started = True
+            reason = "race"
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Comando: {user_input}"}
-                ],
-                temperature=0.1,  # Determinista para acciones
-                response_format={"type": "json_object"} # Forzar JSON
-            )
-            
-            content = response.choices[0].message.content
-            nervous_system.cognitive(f"Sinapsis completada. Plan: {content[:100]}...") # Log resumido
-            return json.loads(content)
+            while pending:
+                done, _ = wait(pending, timeout=None if cloud_started else delay,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = pending.pop(future)
+                    plan = future.result()
+                    if plan is not None:
+                        if cloud_started and pending:
+                            nervous_system.cognitive(f"Hedge: gana {backend}")
+                        return plan, backend, reason
+
+                # Local lento o fallido: lanzar cloud (una sola vez)
+                if not cloud_started:
+                    if done:
+                        reason = "local_failed"
+                        nervous_system.cognitive("Hedge: Ollama sin plan válido, lanzando SambaNova...")
+                    else:
+                        reason = "hedge_timeout"
+                        nervous_system.cognitive(
+                            f"Hedge: Ollama sin plan tras {delay * 1000:.0f}ms, lanzando SambaNova...")
+                    pending[self.executor.submit(self._think_cloud, user_message, history, session_id)] = "cloud"
+                    cloud_started = True
+            return None, None, reason
+        finally:
+            # La llamada perdedora no se puede abortar a mitad de petición HTTP;
+            # cancelamos si aún no arrancó y descartamos su resultado si ya corre.
+            for future in pending:
+                future.cancel()
 
+    async def _athink_hedged(self, user_message, history, session_id=None, tier="full", race=False):
+        """Async counterpart of _think_hedged; the loser task is cancelled"""
+        pending = {asyncio.create_task(self._athink_local(user_message, history, session_id, tier)): "local"}
+        cloud_started = False
+        reason = None
+
+        delay = 0.0 if race else self._hedge_delay(tier) / 1000.0
+        if race:
+            pending[asyncio.create_task(self._athink_cloud(user_message, history, session_id))] = "cloud"
+            cloud_started = True
+            reason = "race"
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=None if cloud_started else delay,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = pending.pop(task)
+                    plan = task.result()
+                    if plan is not None:
+                        if cloud_started and pending:
+                            nervous_system.cognitive(f"Hedge: gana {backend}")
+                        return plan, backend, reason
+
+                if not cloud_started:
+                    reason = "local_failed" if done else "hedge_timeout"
+                    nervous_system.cognitive(f"Hedge: Ollama sin plan ({reason}), lanzando SambaNova...")
+                    pending[asyncio.create_task(self._athink_cloud(user_message, history, session_id))] = "cloud"
+                    cloud_started = True
+            return None, None, reason
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, tier="full"):
+        """Hedge delay in ms: fixed override or the tier's latency percentile, clamped"""
+        if settings.LLM_HEDGE_DELAY_MS is not None:
+            return settings.LLM_HEDGE_DELAY_MS
+
+        hist = metrics.histogram(f"llm.tier.{tier}.latency_ms")
+        if len(hist.samples) < 5:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_MS
+
+        delay = hist.percentile(settings.LLM_HEDGE_PERCENTILE)
+        return min(max(delay, settings.LLM_HEDGE_MIN_DELAY_MS), settings.LLM_HEDGE_MAX_DELAY_MS)
+
+    def _think_local(self, user_message, history=None, session_id=None, tier="full"):
+        """PRIMARY: Ollama (Local LLM - no rate limits). Returns plan dict or None"""
+        engine = self.local_llms.get(tier) or self.local_llm
+        record = LLMCallRecord("local", engine.model, session_id, tier=tier)
+        start = time.perf_counter()
+        try:
+            response = engine.think(user_message, self._get_system_prompt(), history, record)
+            return self._parse_plan(response, "Ollama", record)
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Ollama error: {e}")
+            record.outcome, record.error = "error", str(e)
+            return None
+        finally:
+            record.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            metrics.record_llm_call(record)
+
+    async def _athink_local(self, user_message, history=None, session_id=None, tier="full"):
+        engine = self.local_llms.get(tier) or self.local_llm
+        record = LLMCallRecord("local", engine.model, session_id, tier=tier)
+        start = time.perf_counter()
+        try:
+            response = await engine.athink(user_message, self._get_system_prompt(), history, record)
+            return self._parse_plan(response, "Ollama", record)
+        except asyncio.CancelledError:
+            record.outcome = "cancelled"
+            raise
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Ollama error: {e}")
+            record.outcome, record.error = "error", str(e)
+            return None
+        finally:
+            record.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            metrics.record_llm_call(record)
+
+    def _think_cloud(self, user_message, history=None, session_id=None):
+        """FALLBACK: SambaNova (Cloud LLM). Returns plan dict or None"""
+        record = LLMCallRecord("cloud", self.model, session_id, tier="cloud")
+        start = time.perf_counter()
+        try:
+            nervous_system.cognitive("Usando SambaNova (cloud)...")
+            response = self.client.chat.completions.create(**self._cloud_request(user_message, history))
+            self._record_usage(response, record)
+            return self._parse_plan(response.choices[0].message.content, "SambaNova", record)
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Derrame cerebral (Error API): {e}")
+            record.outcome, record.error = "error", str(e)
+            return None
+        finally:
+            record.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            metrics.record_llm_call(record)
+
+    async def _athink_cloud(self, user_message, history=None, session_id=None):
+        record = LLMCallRecord("cloud", self.model, session_id, tier="cloud")
+        start = time.perf_counter()
+        try:
+            nervous_system.cognitive("Usando SambaNova async (cloud)...")
+            response = await self.async_client.chat.completions.create(**self._cloud_request(user_message, history))
+            self._record_usage(response, record)
+            return self._parse_plan(response.choices[0].message.content, "SambaNova", record)
+        except asyncio.CancelledError:
+            record.outcome = "cancelled"
+            raise
         except Exception as e:
             nervous_system.error("COGNITIVE", f"Derrame cerebral (Error API): {e}")
-            return {"action": "error", "error": str(e)}
+            record.outcome, record.error = "error", str(e)
+            return None
+        finally:
+            record.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            metrics.record_llm_call(record)
+
+    @staticmethod
+    def _record_usage(response, record):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            record.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            record.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+    def _cloud_request(self, user_message, history=None):
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self._get_system_prompt()},
+                *(history or []),
+                {"role": "user", "content": user_message}
+            ],
+            temperature=0.3,
+            max_tokens=512
+        )
+
+    def _parse_plan(self, content, backend, record=None):
+        """Parse and sanity-check a raw LLM reply. Returns plan dict or None"""
+        if not content:
+            if record is not None:
+                record.outcome = "invalid_json"
+            return None
+        try:
+            plan = json.loads(content)
+        except json.JSONDecodeError as e:
+            nervous_system.error("COGNITIVE", f"{backend} JSON inválido: {e}")
+            if record is not None:
+                record.outcome = "invalid_json"
+            return None
+
+        if not self._is_valid_plan(plan):
+            nervous_system.error("COGNITIVE", f"{backend} plan sin acción: {content[:100]}")
+            if record is not None:
+                record.outcome = "no_action"
+            return None
+        nervous_system.cognitive(f"Sinapsis completada ({backend}). Plan: {content[:100]}...")
+        return plan
+
+    @staticmethod
+    def _is_valid_plan(plan):
+        return isinstance(plan, dict) and isinstance(plan.get("action"), str) and bool(plan["action"])
+
+    def _get_system_prompt(self):
+        """
+        Returns the system prompt for the LLM.
+        Always the same object: a byte-identical prefix lets llama.cpp reuse its KV cache.
+        """
+        return self.system_prompt
 
 if __name__ == "__main__":
     brain = Brain()
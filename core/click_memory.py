@@ -0,0 +1,185 @@
+"""
+Click Memory - Learned click targets per app and spoken label
+(process, window class, label) -> automation id, ancestor path and rect
+relative to the window, recorded after each successful click. The next
+click on the same label goes straight to the element instead of scanning.
+LRU-bounded and persisted to configs/click_memory.json.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.name_index import fold
+
+MEMORY_FILE = Path(__file__).parent.parent / "configs" / "click_memory.json"
+MEMORY_VERSION = 1
+
+
+class ClickTarget:
+    """
+    Where a label was found: automation_id (may be ""), path [[control_type, name], ...]
+    from the window down to the element, rect relative to the window's top-left.
+    """
+    __slots__ = ("name", "automation_id", "path", "rel_rect", "scan_ms", "hits", "last_used")
+
+    def __init__(self, name, automation_id="", path=(), rel_rect=None, scan_ms=0.0, hits=0, last_used=0.0):
+        self.name = name
+        self.automation_id = automation_id
+        self.path = [list(p) for p in path]
+        self.rel_rect = tuple(rel_rect) if rel_rect else None
+        self.scan_ms = scan_ms  # Lo que costó encontrarlo sin memoria
+        self.hits = hits
+        self.last_used = last_used
+
+    def to_list(self):
+        return [self.name, self.automation_id, self.path, self.rel_rect, round(self.scan_ms, 1),
+                self.hits, round(self.last_used)]
+
+    def __repr__(self):
+        return f"ClickTarget({self.name!r}, id={self.automation_id!r}, hits={self.hits})"
+
+
+class ClickMemory:
+    """
+    OrderedDict LRU keyed "process|window_class|folded label". Hits and
+    misses are counted; time saved is the learned scan cost minus the
+    remembered lookup cost.
+    """
+
+    def __init__(self, max_entries=None, cache_file=MEMORY_FILE):
+        self.max_entries = max_entries or settings.CLICK_MEMORY_MAX_ENTRIES
+        self.cache_file = cache_file
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._dirty = False
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(process, window_class, label):
+        return f"{process}|{window_class}|{fold(label)}"
+
+    # --- API ---
+
+    def get(self, process, window_class, label):
+        """Remembered ClickTarget or None (a miss)"""
+        self.ensure_loaded()
+        key = self.key(process, window_class, label)
+        with self._lock:
+            target = self.entries.get(key)
+            if target is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+        if target is None:
+            metrics.incr("motor.click_memory.misses")
+        return target
+
+    def hit(self, target, resolve_ms):
+        """The remembered target resolved in resolve_ms"""
+        saved = max(0.0, target.scan_ms - resolve_ms)
+        with self._lock:
+            target.hits += 1
+            target.last_used = time.time()
+            self.hits += 1
+            self.saved_ms += saved
+            self._dirty = True
+        metrics.incr("motor.click_memory.hits")
+        metrics.histogram("motor.click_memory.resolve_ms").record(resolve_ms)
+        metrics.histogram("motor.click_memory.saved_ms").record(saved)
+
+    def forget(self, process, window_class, label):
+        """Stale entry (element gone or moved): drop it"""
+        with self._lock:
+            removed = self.entries.pop(self.key(process, window_class, label), None) is not None
+            self.misses += removed
+            self._dirty |= removed
+        if removed:
+            metrics.incr("motor.click_memory.stale")
+
+    def record(self, process, window_class, label, target):
+        """Learn (or refresh) where a label is after a successful scanned click"""
+        self.ensure_loaded()
+        key = self.key(process, window_class, label)
+        target.last_used = time.time()
+        with self._lock:
+            known = self.entries.pop(key, None)
+            if known is not None:
+                target.hits = known.hits
+            self.entries[key] = target
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                metrics.incr("motor.click_memory.evictions")
+            self._dirty = True
+        self.save()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_ms": round(self.saved_ms, 1),
+            }
+
+    # --- PERSISTENCIA ---
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+        self.load()
+        if self.cache_file is not None:
+            atexit.register(self.save)  # Conserva contadores de aciertos de la sesión
+
+    def load(self):
+        if self.cache_file is None or not Path(self.cache_file).exists():
+            return False
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Memoria de clics ilegible, se descarta: {e}")
+            return False
+        if data.get("version") != MEMORY_VERSION:
+            return False
+        # El fichero guarda de menos a más reciente: el orden LRU se conserva
+        with self._lock:
+            for key, item in data.get("entries", []):
+                self.entries[key] = ClickTarget(*item)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return True
+
+    def save(self):
+        if self.cache_file is None or not self._dirty:
+            return
+        with self._lock:
+            data = {"version": MEMORY_VERSION,
+                    "entries": [[k, t.to_list()] for k, t in self.entries.items()]}
+            self._dirty = False
+        try:
+            Path(self.cache_file).parent.mkdir(exist_ok=True)
+            tmp = f"{self.cache_file}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"No se pudo guardar la memoria de clics: {e}")
+
+
+# Instancia global
+click_memory = ClickMemory()
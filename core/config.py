@@ -15,16 +15,79 @@ class Settings(BaseSettings):
     SAMBANOVA_API_KEY: str | None = None
     SAMBANOVA_URL: str = "https://api.sambanova.ai/v1"
 
+    # Brain (Ollama local)
+    OLLAMA_HOST: str = "http://localhost:11434"
+    OLLAMA_KEEP_ALIVE: str = "30m"  # Mantener el modelo residente entre comandos
+    OLLAMA_KEEPALIVE_INTERVAL: int = 240  # Segundos de inactividad antes del ping
+    OLLAMA_LIST_TTL_S: float = 60.0  # Cache de la lista de modelos instalados
+    OLLAMA_MIN_FREE_RAM_MB: int = 2048  # Por debajo, se descargan modelos fuera del stack
+    OLLAMA_RESIDENCY_CHECK_S: int = 30  # Intervalo del monitor de memoria
+
+    # Brain (Router de complejidad)
+    LLM_ROUTER_ENABLED: bool = True
+    LLM_FAST_MODEL: str = "llama3.2:1b"  # Órdenes simples de una acción
+    LLM_FULL_MODEL: str = "llama3.1:8b"  # Cadenas, ambigüedad, escalado
+
+    # Brain (Hedging local/cloud)
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Percentil de latencia local que dispara el cloud
+    LLM_HEDGE_DELAY_MS: int | None = None  # Retardo fijo (anula el cálculo por percentil)
+    LLM_HEDGE_MIN_DELAY_MS: int = 300
+    LLM_HEDGE_MAX_DELAY_MS: int = 4000
+    LLM_HEDGE_DEFAULT_DELAY_MS: int = 1500  # Hasta tener suficientes muestras
+
+    # Brain (Clientes HTTP)
+    LLM_TIMEOUT_S: float = 30.0
+    LLM_MAX_CONCURRENCY: int = 8  # Llamadas LLM simultáneas (pool keep-alive y limitador async)
+
+    # Brain (Memoria de diálogo)
+    DIALOGUE_TOKEN_BUDGET: int = 600  # Tokens máx. de historial enviados por llamada
+    DIALOGUE_MAX_SESSIONS: int = 64
+    DIALOGUE_SESSION_TTL_S: int = 1800
+
+    # Brain (Especulación sobre transcripciones parciales)
+    SPECULATION_ENABLED: bool = True
+    SPECULATION_MAX_CONCURRENCY: int = 1  # Thinks especulativos simultáneos (STT sigue usando CPU)
+
+    # Motor (Ejecución asíncrona)
+    MOTOR_BACKEND: str = ""  # uiautomation | simulated ("" = el motor del stack activo)
+    MOTOR_PREEMPT_ON_COMMAND: bool = False  # Un comando nuevo cancela la tarea en curso en vez de encolarse
+    WINDOW_REGISTRY_MAX_AGE_S: float = 0.5  # Antigüedad máx. de la tabla de ventanas antes de re-enumerar
+    APP_CATALOG_MISS_REFRESH_S: float = 30.0  # Nombre de app desconocido: re-escaneo del catálogo, como mucho uno por intervalo
+    TEXT_SENDINPUT_MAX_CHARS: int = 200  # Hasta aquí se escribe con SendInput (sin tocar el portapapeles)
+    TEXT_SENDINPUT_BATCH: int = 64  # Caracteres por llamada a SendInput
+    TEXT_PASTE_CHUNK_CHARS: int = 4000  # Por encima, pegado por trozos
+    TEXT_PASTE_SETTLE_S: float = 0.15  # Espera antes de restaurar el portapapeles del usuario
+    TEXT_VERIFY: bool = True  # Comprobar vía UIA que el texto aparece en el control enfocado
+    ROOT_SEARCH_WORKERS: int = 3  # Hilos para buscar controles en primer plano, popups y barra de tareas a la vez
+    ROOT_SEARCH_EARLY_SCORE: float = 0.9  # Un candidato con esta puntuación gana sin esperar al resto de raíces
+    ROOT_SEARCH_MAX_POPUPS: int = 4  # Ventanas emergentes de la ventana activa que también se recorren
+    CLICK_MEMORY_ENABLED: bool = True  # Recordar dónde estaba cada etiqueta por app (configs/click_memory.json)
+    CLICK_MEMORY_MAX_ENTRIES: int = 500  # Entradas LRU antes de olvidar las menos usadas
+    CLICK_VERIFY: bool = True  # Tras un clic, comprobar por diferencia de píxeles que la ventana cambió
+    CLICK_VERIFY_TIMEOUT_S: float = 0.4  # Plazo para ver el cambio antes de dar el clic por fallido
+    CLICK_VERIFY_DOWNSCALE: int = 4  # Submuestreo de la captura (1 de cada N píxeles por eje)
+    CLICK_VERIFY_MIN_CHANGE: float = 0.002  # Fracción mínima de píxeles cambiados para contar como cambio
+    MOTOR_TRACE_ENABLED: bool = True  # Traza por paso de cada plan (tests/replay_motor_trace.py)
+    MOTOR_TRACE_FILE: str = "motor_traces.jsonl"
+    MOTOR_TRACE_MAX_MB: int = 20  # Al superarlo se rota a .1
+
     # Porcupine
     PICOVOICE_ACCESS_KEY: str | None = None
 
     # Ear (HuggingFace)
     HUGGINGFACE_API_KEY: str | None = None
     HUGGINGFACE_WHISPER_URL: str = "https://api-inference.huggingface.co/models/openai/whisper-large-v3"
+    STT_PARTIAL_INTERVAL_S: float = 0.4  # Audio entre transcripciones parciales (0 = desactivado)
     
     # Voice
     ELEVENLABS_API_KEY: str | None = None
     ELEVENLABS_VOICE_ID: str | None = None
+    TTS_STREAMING: bool = True  # Kokoro por oraciones: suena la primera mientras se sintetiza el resto
+    TTS_STREAM_FIRST_CHARS: int = 80  # Si la primera oración es más larga, se corta por comas
+    TTS_STREAM_MIN_CHARS: int = 25  # Fragmentos más cortos se unen al siguiente (entonación)
+    TTS_CACHE_ENABLED: bool = True  # Audio de frases repetidas desde cache/tts en vez de re-sintetizar
+    TTS_CACHE_MEMORY_MB: int = 32  # LRU en memoria (float32)
+    TTS_CACHE_DISK_MB: int = 200  # Tope del directorio; se borran primero los menos usados
 
     model_config = SettingsConfigDict(
         env_file=".env",
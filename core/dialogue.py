@@ -0,0 +1,137 @@
+"""
+Dialogue Memory - Session-scoped conversation context for the Brain
+Keeps recent turns in a token-budgeted ring so prompt size stays bounded
+"""
+import json
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from core.config import settings
+from core.logger import nervous_system
+
+DEFAULT_SESSION = "local"
+
+Turn = namedtuple("Turn", "user_text plan plan_json tokens")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 chars per token for Llama tokenizers in es/en)"""
+    return max(1, len(text) // 4)
+
+
+def compact_plan(plan):
+    """Serialize a plan without the 'thought' field, in the same JSON shape the model must answer"""
+    return json.dumps(
+        {"action": plan.get("action"), "parameters": plan.get("parameters", {})},
+        ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def describe_plan(plan):
+    """One-line human summary of a plan, used when folding old turns"""
+    action = plan.get("action", "?")
+    params = plan.get("parameters", {}) or {}
+    if action == "chain":
+        return ", ".join(describe_plan(step) for step in params.get("steps", []))
+    args = ", ".join(str(v)[:30] for v in params.values() if isinstance(v, (str, int, float)))
+    return f"{action}({args})"
+
+
+class DialogueMemory:
+    """
+    Rolling history of (user utterance, plan) turns for one session.
+    When the token budget is exceeded the oldest turns are folded into a short
+    extractive summary; when the summary itself grows too large its oldest
+    lines are dropped.
+    """
+
+    def __init__(self, token_budget=None, summary_budget=None):
+        self.token_budget = token_budget or settings.DIALOGUE_TOKEN_BUDGET
+        self.summary_budget = summary_budget or self.token_budget // 4
+        self.turns = deque()  # Turn
+        self.summary_lines = deque()
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, user_text, plan):
+        """Store a completed turn and enforce the budget"""
+        plan_json = compact_plan(plan)
+        tokens = estimate_tokens(user_text) + estimate_tokens(plan_json)
+        with self._lock:
+            self.turns.append(Turn(user_text, plan, plan_json, tokens))
+            self.last_used = time.monotonic()
+            self._enforce_budget()
+
+    def messages(self):
+        """Chat messages to insert between the system prompt and the new user message"""
+        with self._lock:
+            self.last_used = time.monotonic()
+            messages = []
+            if self.summary_lines:
+                messages.append({
+                    "role": "system",
+                    "content": "Contexto previo (resumen):\n" + "\n".join(self.summary_lines)
+                })
+            for turn in self.turns:
+                messages.append({"role": "user", "content": turn.user_text})
+                messages.append({"role": "assistant", "content": turn.plan_json})
+            return messages
+
+    def token_count(self):
+        with self._lock:
+            return self._turn_tokens() + self._summary_tokens()
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.summary_lines.clear()
+
+    def _turn_tokens(self):
+        return sum(turn.tokens for turn in self.turns)
+
+    def _summary_tokens(self):
+        return sum(estimate_tokens(line) for line in self.summary_lines)
+
+    def _enforce_budget(self):
+        # Plegar los turnos más viejos en el resumen (siempre se conserva el último)
+        while len(self.turns) > 1 and self._turn_tokens() + self._summary_tokens() > self.token_budget:
+            turn = self.turns.popleft()
+            self.summary_lines.append(f"- \"{turn.user_text[:60]}\" -> {describe_plan(turn.plan)[:80]}")
+
+            while self.summary_lines and self._summary_tokens() > self.summary_budget:
+                self.summary_lines.popleft()
+
+
+class SessionStore:
+    """Per-session DialogueMemory with LRU cap and idle expiry"""
+
+    def __init__(self, max_sessions=None, ttl_s=None):
+        self.max_sessions = max_sessions or settings.DIALOGUE_MAX_SESSIONS
+        self.ttl_s = ttl_s or settings.DIALOGUE_SESSION_TTL_S
+        self.sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        session_id = session_id or DEFAULT_SESSION
+        with self._lock:
+            self._expire()
+            memory = self.sessions.get(session_id)
+            if memory is None:
+                memory = DialogueMemory()
+                self.sessions[session_id] = memory
+                while len(self.sessions) > self.max_sessions:
+                    evicted, _ = self.sessions.popitem(last=False)
+                    nervous_system.cognitive(f"Sesión de diálogo expulsada (LRU): {evicted}")
+            else:
+                self.sessions.move_to_end(session_id)
+            return memory
+
+    def reset(self, session_id=None):
+        with self._lock:
+            return self.sessions.pop(session_id or DEFAULT_SESSION, None) is not None
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [sid for sid, mem in self.sessions.items() if now - mem.last_used > self.ttl_s]
+        for sid in expired:
+            del self.sessions[sid]
@@ -1,12 +1,17 @@
+import inspect
 import speech_recognition as sr
 import requests
 import tempfile
 import os
 import pyaudio
+from concurrent.futures import ThreadPoolExecutor
 from core.config import settings
 from core.logger import nervous_system
 from core.tech_manager import tech_manager
 
+# listen(stream=True) llegó en SpeechRecognition 3.11; sin él no hay transcripciones parciales
+STREAM_LISTEN = "stream" in inspect.signature(sr.Recognizer.listen).parameters
+
 # Import local STT engine
 try:
     from core.engines.stt.faster_whisper_engine import FasterWhisperEngine
@@ -59,6 +64,10 @@ class Ear:
             except Exception as e:
                 nervous_system.error("SENSORY", f"Error inicializando Faster-Whisper: {e}")
         
+        # Transcripciones parciales durante la captura (un decode a la vez)
+        self.partial_executor = ThreadPoolExecutor(max_workers=1)
+        self._capturing = False
+        
         # Initialize Advanced Audio (VAD & Wake Word)
         self.vad_engine = None
         self.wake_word_engine = None
@@ -141,7 +150,12 @@ class Ear:
             nervous_system.error("SENSORY", f"Error al cambiar micrófono: {e}")
             return False
 
-    def listen(self, timeout=5, phrase_time_limit=10):
+    def listen(self, timeout=5, phrase_time_limit=10, on_partial=None):
+        """
+        Capture one phrase and transcribe it.
+        on_partial(text) receives interim transcripts while the user is still
+        speaking (local Faster-Whisper only).
+        """
         try:
             # Wake Word Loop (blocking if enabled)
             # TODO: Implement full wake word loop here. 
@@ -181,7 +195,11 @@ class Ear:
                     self.recognizer.pause_threshold = 0.8
                     self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
                 
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                if on_partial and STREAM_LISTEN and self.local_engine is not None \
+                        and settings.STT_PARTIAL_INTERVAL_S > 0:
+                    audio = self._listen_streaming(source, timeout, phrase_time_limit, on_partial)
+                else:
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
             
             # VAD Verification (Silero)
             if self.vad_engine:
@@ -234,6 +252,35 @@ class Ear:
 
             return ""
 
+    def _listen_streaming(self, source, timeout, phrase_time_limit, on_partial):
+        """recognizer.listen(), decoding the audio captured so far every STT_PARTIAL_INTERVAL_S"""
+        frames = bytearray()
+        interval_bytes = int(settings.STT_PARTIAL_INTERVAL_S * source.SAMPLE_RATE * source.SAMPLE_WIDTH)
+        next_at = interval_bytes
+        pending = None
+
+        self._capturing = True
+        try:
+            for chunk in self.recognizer.listen(source, timeout=timeout,
+                                                phrase_time_limit=phrase_time_limit, stream=True):
+                frames.extend(chunk.get_raw_data())
+                # Si el decode anterior sigue corriendo se salta este (no saturar la CPU)
+                if len(frames) >= next_at and (pending is None or pending.done()):
+                    next_at = len(frames) + interval_bytes
+                    snapshot = sr.AudioData(bytes(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    pending = self.partial_executor.submit(self._decode_partial, snapshot, on_partial)
+        finally:
+            # Parciales que lleguen tras la captura ya no sirven
+            self._capturing = False
+
+        return sr.AudioData(bytes(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def _decode_partial(self, audio, on_partial):
+        text = self.local_engine.transcribe(audio, language="es", beam_size=1)
+        if text and self._capturing:
+            nervous_system.sensory(f"… parcial: {text}")
+            on_partial(text)
+
 if __name__ == "__main__":
     ear = Ear()
     print(ear.listen())
@@ -1,5 +1,17 @@
 # Engines package
-from .stt.faster_whisper_engine import FasterWhisperEngine
-from .llm.ollama_engine import OllamaEngine
+# Importación diferida: cargar un motor no arrastra faster_whisper ni ollama
+import importlib
+
+_LAZY = {
+    'FasterWhisperEngine': '.stt.faster_whisper_engine',
+    'OllamaEngine': '.llm.ollama_engine',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ['FasterWhisperEngine', 'OllamaEngine']
@@ -3,17 +3,35 @@ Ollama LLaMA Engine - Local Language Model
 High-performance local LLM using Ollama
 """
 import json
+import threading
+import time
+import httpx
 import ollama
+from core.config import settings
+from core.dialogue import estimate_tokens
+from core.engines.llm.ollama_residency import residency
 from core.logger import nervous_system
 
 
 class OllamaEngine:
     """Local LLM using Ollama (LLaMA 3.1)"""
     
-    def __init__(self, model="llama3.2:1b"):
-        self.host = "http://localhost:11434"
+    def __init__(self, model="llama3.2:1b", keep_alive=None):
+        self.host = settings.OLLAMA_HOST
         self.model = model
         self.max_retries = 2
+        # keep_alive se envía en cada petición para que el daemon no descargue
+        # el modelo (y su KV cache) entre comandos
+        self.keep_alive = keep_alive or settings.OLLAMA_KEEP_ALIVE
+        # Clientes con pool keep-alive compartido (sync para el worker Qt, async para la API)
+        self.client = ollama.Client(host=self.host, timeout=settings.LLM_TIMEOUT_S)
+        self.async_client = None
+
+        # Stats de la última respuesta (ms), para confirmar hits de prefix cache
+        self.last_stats = {}
+        self._last_used = 0.0
+        self._keepalive_thread = None
+        self._keepalive_stop = threading.Event()
         
         try:
             nervous_system.cognitive(f"Inicializando Ollama ({self.model})...")
@@ -24,62 +42,40 @@ class OllamaEngine:
         if not self.is_available():
             nervous_system.error("COGNITIVE", "Ollama no está ejecutándose. Inicia Ollama Desktop.")
     
-    def think(self, user_message, system_prompt):
+    def think(self, user_message, system_prompt, history=None, record=None):
         """
         Generate response from LLM
         
         Args:
             user_message: User's command/query
-            system_prompt: System instructions
+            system_prompt: System instructions (keep it byte-identical between
+                           calls so llama.cpp can reuse the cached prefix)
+            history: Previous chat messages, inserted after the system prompt
+            record: Optional LLMCallRecord to fill with timings and token counts
         
         Returns:
             str: JSON response or None if failed
         """
         try:
             nervous_system.cognitive(f"Pensando con Ollama ({self.model})...")
+            self._last_used = time.monotonic()
             
             # Call Ollama
-            response = ollama.chat(
+            messages = self._build_messages(user_message, system_prompt, history)
+            response = self.client.chat(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=messages,
                 options={
                     "temperature": 0.3,  # Lower = more focused
                     "num_predict": 256,  # Max tokens
-                }
+                },
+                keep_alive=self.keep_alive
             )
+            self._last_used = time.monotonic()
+            self._record_stats(response, record, messages)
             
             # Extract response
-            content = response['message']['content']
-            
-            # Try to parse JSON (Ollama sometimes wraps in markdown)
-            if "```json" in content:
-                # Extract JSON from markdown code block
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            elif "```" in content:
-                # Generic code block
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            
-            # Validate JSON
-            try:
-                json.loads(content)
-                return content
-            except json.JSONDecodeError:
-                nervous_system.error("COGNITIVE", f"Respuesta no es JSON válido: {content}")
-                # Try to extract JSON object
-                if "{" in content and "}" in content:
-                    start = content.find("{")
-                    end = content.rfind("}") + 1
-                    extracted = content[start:end]
-                    json.loads(extracted)  # Validate
-                    return extracted
-                return None
+            return self._extract_json(response['message']['content'], record)
             
         except ollama.ResponseError as e:
             nervous_system.error("COGNITIVE", f"Error Ollama API: {e}")
@@ -88,30 +84,167 @@ class OllamaEngine:
             nervous_system.error("COGNITIVE", f"Error en Ollama: {e}")
             return None
     
+    async def athink(self, user_message, system_prompt, history=None, record=None):
+        """Async variant of think() using the shared AsyncClient connection pool"""
+        try:
+            nervous_system.cognitive(f"Pensando con Ollama async ({self.model})...")
+            self._last_used = time.monotonic()
+
+            messages = self._build_messages(user_message, system_prompt, history)
+            response = await self._get_async_client().chat(
+                model=self.model,
+                messages=messages,
+                options={
+                    "temperature": 0.3,
+                    "num_predict": 256,
+                },
+                keep_alive=self.keep_alive
+            )
+            self._last_used = time.monotonic()
+            self._record_stats(response, record, messages)
+            return self._extract_json(response['message']['content'], record)
+
+        except ollama.ResponseError as e:
+            nervous_system.error("COGNITIVE", f"Error Ollama API: {e}")
+            return None
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Error en Ollama: {e}")
+            return None
+
+    @staticmethod
+    def _build_messages(user_message, system_prompt, history):
+        # El system prompt va siempre primero: es el prefijo cacheado
+        return [{"role": "system", "content": system_prompt}, *(history or []),
+                {"role": "user", "content": user_message}]
+
+    def _get_async_client(self):
+        """Lazily create the AsyncClient inside the running event loop (httpx pools are loop-bound)"""
+        if self.async_client is None:
+            self.async_client = ollama.AsyncClient(
+                host=self.host,
+                timeout=settings.LLM_TIMEOUT_S,
+                limits=httpx.Limits(max_connections=settings.LLM_MAX_CONCURRENCY,
+                                    max_keepalive_connections=settings.LLM_MAX_CONCURRENCY)
+            )
+        return self.async_client
+
+    def _extract_json(self, content, record=None):
+        """Pull the JSON object out of the model output. Returns str or None"""
+        # Try to parse JSON (Ollama sometimes wraps in markdown)
+        if "```" in content and record is not None:
+            record.json_repairs += 1
+        if "```json" in content:
+            # Extract JSON from markdown code block
+            json_start = content.find("```json") + 7
+            json_end = content.find("```", json_start)
+            content = content[json_start:json_end].strip()
+        elif "```" in content:
+            # Generic code block
+            json_start = content.find("```") + 3
+            json_end = content.find("```", json_start)
+            content = content[json_start:json_end].strip()
+
+        # Validate JSON
+        try:
+            json.loads(content)
+            return content
+        except json.JSONDecodeError:
+            nervous_system.error("COGNITIVE", f"Respuesta no es JSON válido: {content}")
+            # Try to extract JSON object
+            if "{" in content and "}" in content:
+                if record is not None:
+                    record.json_repairs += 1
+                start = content.find("{")
+                end = content.rfind("}") + 1
+                extracted = content[start:end]
+                json.loads(extracted)  # Validate
+                return extracted
+            return None
+
+    def _record_stats(self, response, record=None, messages=None):
+        """Store Ollama timing stats (nanoseconds in the response) as milliseconds"""
+        def ms(key):
+            value = response.get(key)
+            return round(value / 1e6, 1) if value else 0.0
+
+        self.last_stats = {
+            "load_ms": ms("load_duration"),
+            "prompt_eval_ms": ms("prompt_eval_duration"),
+            "eval_ms": ms("eval_duration"),
+            "total_ms": ms("total_duration"),
+            "prompt_tokens": response.get("prompt_eval_count") or 0,
+            "completion_tokens": response.get("eval_count") or 0,
+        }
+        nervous_system.cognitive(
+            f"Ollama stats: carga {self.last_stats['load_ms']}ms | "
+            f"prompt-eval {self.last_stats['prompt_eval_ms']}ms "
+            f"({self.last_stats['prompt_tokens']} tok) | "
+            f"generación {self.last_stats['eval_ms']}ms"
+        )
+
+        if record is not None:
+            record.load_ms = self.last_stats["load_ms"]
+            record.prompt_eval_ms = self.last_stats["prompt_eval_ms"]
+            record.eval_ms = self.last_stats["eval_ms"]
+            record.prompt_tokens = self.last_stats["prompt_tokens"]
+            record.completion_tokens = self.last_stats["completion_tokens"]
+            if messages:
+                # Con prefijo cacheado Ollama solo evalúa lo nuevo (historial + mensaje), no el system
+                # prompt: el umbral queda a medio camino entre "solo lo nuevo" y "todo el prompt"
+                system_tokens = estimate_tokens(messages[0]["content"])
+                new_tokens = sum(estimate_tokens(m["content"]) for m in messages[1:])
+                record.prefix_cache_hit = record.prompt_tokens < new_tokens + system_tokens / 2
+
+    def warmup(self, system_prompt):
+        """
+        Load the model and evaluate the system prompt once, so the next real
+        request only pays prompt-eval for the user message.
+        """
+        try:
+            response = self.client.chat(
+                model=self.model,
+                messages=[{"role": "system", "content": system_prompt}],
+                options={"temperature": 0.3, "num_predict": 1},
+                keep_alive=self.keep_alive
+            )
+            self._last_used = time.monotonic()
+            self._record_stats(response)
+            return True
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Warmup Ollama falló: {e}")
+            return False
+
+    def start_keepalive(self, system_prompt, interval=None):
+        """
+        Background ping that re-warms the model when idle for `interval` seconds,
+        keeping both the weights and the cached system prompt resident.
+        """
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+        interval = interval or settings.OLLAMA_KEEPALIVE_INTERVAL
+        self._keepalive_stop.clear()
+
+        def _loop():
+            self.warmup(system_prompt)
+            while not self._keepalive_stop.wait(interval / 4):
+                if time.monotonic() - self._last_used >= interval:
+                    nervous_system.cognitive(f"Keepalive Ollama ({self.model})")
+                    self.warmup(system_prompt)
+
+        self._keepalive_thread = threading.Thread(target=_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def stop_keepalive(self):
+        """Stop the background keepalive ping"""
+        self._keepalive_stop.set()
+
     def is_available(self):
         """Check if Ollama is running and model is available"""
         try:
-            # Try to list models
-            response = ollama.list()
-            
-            # Response is an object with .models attribute
-            if hasattr(response, 'models'):
-                models = response.models
-                model_names = [m.model for m in models if hasattr(m, 'model')]
-            else:
-                nervous_system.error("COGNITIVE", f"Formato inesperado de ollama.list(): {response}")
-                return False
-            
-            # Check if our model is available (exact match or base name match)
-            if self.model in model_names:
+            # Lista de modelos cacheada (TTL) y compartida entre motores
+            if residency.has_model(self.model):
                 return True
             
-            # Check base name (e.g., "llama3.1" from "llama3.1:8b")
-            base_model = self.model.split(':')[0]
-            for name in model_names:
-                if name.startswith(base_model):
-                    return True
-            
             nervous_system.error("COGNITIVE", f"Modelo '{self.model}' no encontrado. Ejecuta: ollama pull {self.model}")
             return False
                 
@@ -131,5 +264,6 @@ if __name__ == "__main__":
         user = "What is 2+2?"
         result = engine.think(user, system)
         print(f"Result: {result}")
+        print(f"Stats: {engine.last_stats}")
     else:
         print("✗ Ollama no disponible")
@@ -0,0 +1,170 @@
+"""
+Ollama Residency Manager - Controls which models stay loaded in the daemon
+Preloads the active stack's models, pins them with keep_alive and unloads
+models outside the stack when system RAM runs low.
+"""
+import threading
+import time
+import ollama
+from core.config import settings
+from core.logger import nervous_system
+from core.tech_manager import tech_manager
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+class ModelResidencyManager:
+    """Shared view of the Ollama daemon: cached model list, preload/unload, RAM guard"""
+
+    def __init__(self, host=None, list_ttl=None):
+        self.client = ollama.Client(host=host or settings.OLLAMA_HOST)
+        self.list_ttl = list_ttl if list_ttl is not None else settings.OLLAMA_LIST_TTL_S
+        self._models = None
+        self._models_at = 0.0
+        self._lock = threading.Lock()
+        self._monitor_thread = None
+        self._monitor_stop = threading.Event()
+        self._evict_listeners = []
+
+        # Cambiar de stack en el panel => precargar lo nuevo y vigilar memoria
+        tech_manager.add_listener(self._on_config_changed)
+
+    # --- LISTA DE MODELOS (cache con TTL) ---
+
+    def list_models(self, refresh=False):
+        """Installed model names, queried at most once per TTL"""
+        with self._lock:
+            fresh = self._models is not None and time.monotonic() - self._models_at < self.list_ttl
+            if fresh and not refresh:
+                return self._models
+
+        response = self.client.list()
+        if not hasattr(response, 'models'):
+            raise ValueError(f"Formato inesperado de ollama.list(): {response}")
+        models = [m.model for m in response.models if hasattr(m, 'model')]
+
+        with self._lock:
+            self._models = models
+            self._models_at = time.monotonic()
+        return models
+
+    def has_model(self, model):
+        """Exact match or base name match (e.g. "llama3.1" for "llama3.1:8b")"""
+        names = self.list_models()
+        if model in names:
+            return True
+        base_model = model.split(':')[0]
+        return any(name.startswith(base_model) for name in names)
+
+    def running_models(self):
+        """Models currently loaded in memory by the daemon"""
+        try:
+            response = self.client.ps()
+            return [m.model for m in getattr(response, 'models', []) if hasattr(m, 'model')]
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"No se pudo consultar ollama ps: {e}")
+            return []
+
+    # --- RESIDENCIA ---
+
+    def active_models(self):
+        """Models the active stack needs resident (none when its LLM runs in the cloud)"""
+        stack = tech_manager.get_active_stack()
+        models = stack.get("ollama_models")
+        if models is not None:
+            return list(models)
+        # Stacks sin la lista explícita: solo un LLM local usa los niveles del router
+        if stack.get("llm") == "local_llama":
+            return [settings.LLM_FAST_MODEL, settings.LLM_FULL_MODEL]
+        return []
+
+    def preload(self, model):
+        """Load a model and pin it with keep_alive (empty prompt = load only)"""
+        try:
+            if not self.has_model(model):
+                return False
+            self.client.generate(model=model, prompt="", keep_alive=settings.OLLAMA_KEEP_ALIVE)
+            nervous_system.cognitive(f"Modelo residente: {model} (keep_alive {settings.OLLAMA_KEEP_ALIVE})")
+            return True
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Error precargando {model}: {e}")
+            return False
+
+    def unload(self, model):
+        """Ask the daemon to free a model right away (keep_alive=0)"""
+        try:
+            self.client.generate(model=model, prompt="", keep_alive=0)
+            nervous_system.cognitive(f"Modelo descargado de memoria: {model}")
+            return True
+        except Exception as e:
+            nervous_system.error("COGNITIVE", f"Error descargando {model}: {e}")
+            return False
+
+    def preload_active(self):
+        for model in self.active_models():
+            self.preload(model)
+
+    def memory_pressure(self):
+        """True when available system RAM is below the configured floor"""
+        if not PSUTIL_AVAILABLE:
+            return False
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        return available_mb < settings.OLLAMA_MIN_FREE_RAM_MB
+
+    def enforce(self):
+        """Under memory pressure, unload every resident model outside the active stack (all of them for cloud stacks)"""
+        if not self.memory_pressure():
+            return []
+        pinned = set(self.active_models())
+        evicted = [m for m in self.running_models() if m not in pinned]
+        for model in evicted:
+            self.unload(model)
+        if evicted:
+            nervous_system.cognitive(f"Presión de memoria: liberados {', '.join(evicted)}")
+            for callback in list(self._evict_listeners):
+                try:
+                    callback(evicted)
+                except Exception as e:
+                    nervous_system.error("COGNITIVE", f"Error notificando modelos liberados: {e}")
+        return evicted
+
+    def add_evict_listener(self, callback):
+        """Register callback(models) for models unloaded under memory pressure"""
+        self._evict_listeners.append(callback)
+
+    def start_monitor(self, interval=None):
+        """Background RAM guard"""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        interval = interval or settings.OLLAMA_RESIDENCY_CHECK_S
+        self._monitor_stop.clear()
+
+        def _loop():
+            while not self._monitor_stop.wait(interval):
+                try:
+                    self.enforce()
+                except Exception as e:
+                    nervous_system.error("COGNITIVE", f"Error en monitor de residencia: {e}")
+
+        self._monitor_thread = threading.Thread(target=_loop, daemon=True)
+        self._monitor_thread.start()
+
+    def stop_monitor(self):
+        self._monitor_stop.set()
+
+    def _on_config_changed(self, event):
+        if event not in ("stack", "llm"):
+            return
+        # En segundo plano: cargar un modelo puede tardar varios segundos
+        def _apply():
+            self.enforce()
+            self.preload_active()
+        threading.Thread(target=_apply, daemon=True).start()
+
+
+# Instancia global
+residency = ModelResidencyManager()
@@ -0,0 +1,27 @@
+# Motor backends (imported on demand: uiautomation/pyautogui only load on Windows backends)
+import importlib
+from core.config import settings
+from core.logger import nervous_system
+from .base import ControlRef, MotorBackend
+
+BACKENDS = {
+    "uiautomation": ("core.engines.motor.uiautomation_backend", "UIAutomationBackend"),
+    "simulated": ("core.engines.motor.simulated", "SimulatedDesktop"),
+}
+
+
+def create_motor_backend(name=None):
+    """Backend by name; default MOTOR_BACKEND, else the active stack's motor"""
+    if not name:
+        name = settings.MOTOR_BACKEND
+    if not name:
+        from core.tech_manager import tech_manager
+        name = tech_manager.get_active_engine("motor") or "uiautomation"
+    if name not in BACKENDS:
+        nervous_system.error("MOTOR", f"Motor '{name}' sin backend implementado, usando uiautomation")
+        name = "uiautomation"
+    module_name, class_name = BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+__all__ = ['ControlRef', 'MotorBackend', 'create_motor_backend']
@@ -0,0 +1,97 @@
+"""
+Motor Backend - Interface AutomationEngine dispatches desktop operations through
+A backend finds and clicks controls, types, sends hotkeys and launches or
+focuses apps; it also exposes a DesktopProbe for readiness waits.
+"""
+
+
+class ControlRef:
+    """Backend-neutral handle to a found control"""
+    __slots__ = ("name", "rect", "score", "native", "automation_id")
+
+    def __init__(self, name, rect=None, score=1.0, native=None, automation_id=""):
+        self.name = name
+        self.rect = rect      # (left, top, right, bottom) o None
+        self.score = score    # 1.0 = coincidencia exacta
+        self.native = native  # objeto propio del backend (Control UIA, SimControl)
+        self.automation_id = automation_id or ""
+
+    @property
+    def center(self):
+        if not self.rect:
+            return None
+        left, top, right, bottom = self.rect
+        if right <= left or bottom <= top:
+            return None
+        return (left + right) // 2, (top + bottom) // 2
+
+    def __repr__(self):
+        return f"ControlRef({self.name!r}, {self.rect}, {self.score:.2f})"
+
+
+class MotorBackend:
+    """
+    Methods raise NotImplementedError unless a backend provides them.
+    `probe` is the DesktopProbe used by Waiter.
+    """
+    name = "base"
+    probe = None
+
+    def init_thread(self):
+        """Per-thread setup (COM apartments...) for the motor worker thread"""
+
+    def screen_size(self):
+        raise NotImplementedError
+
+    def foreground_window(self):
+        """(handle, title) or None"""
+        return self.probe.foreground_window()
+
+    def find_control(self, name):
+        """Best ControlRef for `name` in the foreground window (exact, then fuzzy), or None"""
+        raise NotImplementedError
+
+    def click(self, control, on_hover=None):
+        """on_hover() runs once the pointer is over the target, right before the press"""
+        raise NotImplementedError
+
+    def type(self, text, strategy=None):
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        raise NotImplementedError
+
+    def activate(self, app_name):
+        """Bring a running instance of the app to the front; its window title, or None"""
+        raise NotImplementedError
+
+    def launch(self, app_name):
+        """Start the app; returns what was launched (path or command)"""
+        raise NotImplementedError
+
+    def window_context(self, window):
+        """(process, window class) of the window handle, the click memory key, or None"""
+        return None
+
+    def describe(self, control, window):
+        """
+        ClickTarget (automation id, path, rect relative to window) for a control
+        found in window, or None if it lies elsewhere (popup, taskbar)
+        """
+        return None
+
+    def locate(self, target, window):
+        """ControlRef for a remembered ClickTarget inside window, or None if it is gone"""
+        return None
+
+    def foreground_rect(self):
+        """(left, top, right, bottom) of the foreground window, or None"""
+        return None
+
+    def window_rect(self, control):
+        """(left, top, right, bottom) of the top-level window holding control, or None"""
+        return None
+
+    def grab(self, rect):
+        """Screenshot of a screen region as a (h, w, channels) uint8 array, or None if unsupported"""
+        return None
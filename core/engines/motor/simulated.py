@@ -0,0 +1,295 @@
+"""
+Simulated Desktop - Headless motor backend for tests and benchmarks
+In-memory windows with control trees, apps that take time to start and
+configurable per-operation latencies, so AutomationEngine chains run (and
+can be timed) on Linux without a display.
+"""
+import random
+import time
+import numpy as np
+from core.click_memory import ClickTarget
+from core.engines.motor.base import ControlRef, MotorBackend
+from core.name_index import NameIndex
+from core.root_search import RootSearch, SearchRoot, FOREGROUND, POPUP, TASKBAR
+from core.waits import FakeDesktopProbe
+
+# Latencias simuladas (ms)
+DEFAULT_LATENCY = {
+    "find_control": 1.0,          # por búsqueda
+    "find_per_1k_controls": 2.0,  # recorrido del árbol
+    "find_by_id": 0.3,            # FindFirst por AutomationId
+    "click": 4.0,
+    "hotkey": 1.0,
+    "type_per_char": 0.02,
+    "activate": 8.0,
+    "launch_process": 80.0,       # hasta que aparece el proceso
+    "launch_window": 350.0,       # hasta que aparece la ventana
+}
+
+# Apps conocidas: nombre -> (proceso, título, controles)
+DEFAULT_APPS = {
+    "notepad": ("notepad.exe", "Sin título: Bloc de notas",
+                ["Archivo", "Editar", "Ver", "Guardar", "Guardar como", "Abrir", "Nuevo", "Buscar"]),
+    "chrome": ("chrome.exe", "Nueva pestaña - Google Chrome",
+               ["Nueva pestaña", "Atrás", "Adelante", "Volver a cargar", "Barra de direcciones", "Marcadores"]),
+    "calculator": ("calc.exe", "Calculadora",
+                   ["Uno", "Dos", "Tres", "Más", "Menos", "Igual a", "Borrar"]),
+    "word": ("winword.exe", "Documento1 - Word",
+             ["Archivo", "Inicio", "Insertar", "Diseño", "Guardar", "Negrita", "Cursiva"]),
+}
+
+# La barra de tareas no es una ventana del modelo (no recibe foco ni alt+tab)
+TASKBAR_HANDLE = 1
+TASKBAR_CONTROLS = ["Inicio", "Buscar", "Vista de tareas", "Explorador de archivos", "Centro de notificaciones"]
+
+ALIASES = {"bloc de notas": "notepad", "calculadora": "calculator", "calc": "calculator"}
+
+# Tipos UIA (para desempates del índice de nombres)
+BUTTON, MENU_ITEM, TEXT = 50000, 50011, 50020
+
+
+class SimControl:
+    __slots__ = ("name", "control_type", "rect", "on_click", "clicks", "inert", "automation_id")
+
+    def __init__(self, name, control_type=BUTTON, rect=(0, 0, 10, 10), on_click=None, inert=False,
+                 automation_id=""):
+        self.name = name
+        self.automation_id = automation_id
+        self.control_type = control_type
+        self.rect = rect
+        self.on_click = on_click
+        self.clicks = 0
+        self.inert = inert  # Clic sin efecto visible (para probar la verificación visual)
+
+
+class SimulatedDesktop(FakeDesktopProbe, MotorBackend):
+    """
+    The desktop is its own probe (FakeDesktopProbe state), so Waiter sees
+    launches, focus changes and typed text as they happen. Every operation
+    appends to `events` for assertions.
+    """
+    name = "simulated"
+
+    def __init__(self, latency=None, apps=None, screen=(1920, 1080), desktop=True):
+        super().__init__()
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.apps = dict(DEFAULT_APPS if apps is None else apps)
+        self.screen = screen
+        self.window_controls = {}  # handle -> [SimControl]
+        self.window_process = {}   # handle -> proceso
+        self.window_owner = {}     # handle de popup -> handle de la ventana dueña
+        self.documents = {}        # handle -> texto escrito
+        self.events = []
+        self._next_handle = 100
+        self._indexes = {}         # handle -> NameIndex (se invalida al cambiar controles)
+        self.renders = 0           # Cambios visibles: cada uno cambia lo que devuelve grab()
+        self._frame = None
+        self.root_search = RootSearch(self._search_root)
+        if desktop:
+            # Como en Windows, siempre hay una ventana en primer plano (el escritorio) y una barra de tareas
+            self.window_controls[TASKBAR_HANDLE] = [SimControl(c, rect=_grid_rect(i, row=35))
+                                                    for i, c in enumerate(TASKBAR_CONTROLS)]
+            self.add_window("Program Manager", "explorer.exe", ["Papelera de reciclaje", "Este equipo"])
+
+    @property
+    def probe(self):
+        return self
+
+    # --- MODELO ---
+
+    def add_window(self, title, process="app.exe", controls=(), focus=True, owner=None):
+        """Open a window right away; controls are names or SimControl objects. owner: popup of that window"""
+        handle = self._next_handle
+        self._next_handle += 1
+        sims = [c if isinstance(c, SimControl) else SimControl(c, rect=_grid_rect(i), automation_id=f"c{i}")
+                for i, c in enumerate(controls)]
+        with self._lock:
+            self.window_controls[handle] = sims
+            self.window_process[handle] = process.lower()
+            self.documents[handle] = ""
+            self.processes.add(process.lower())
+            if owner is not None:
+                self.window_owner[handle] = owner
+            self.renders += 1
+        self.open_window(handle, title, focus=focus)
+        return handle
+
+    def populate(self, handle, count, seed=0, words=None):
+        """Add `count` synthetic controls to a window (large trees for benchmarks)"""
+        rng = random.Random(seed)
+        words = words or ["archivo", "editar", "ver", "insertar", "formato", "ayuda", "guardar", "abrir",
+                          "cerrar", "copiar", "pegar", "buscar", "opciones", "tabla", "imagen", "fuente"]
+        controls = self.window_controls[handle]
+        start = len(controls)
+        for i in range(count):
+            name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3))).capitalize()
+            controls.append(SimControl(name, rng.choice((BUTTON, MENU_ITEM, TEXT)), _grid_rect(start + i),
+                                       automation_id=f"c{start + i}"))
+        self._indexes.pop(handle, None)
+
+    def close_window(self, handle):
+        with self._lock:
+            self.windows.pop(handle, None)
+            self.window_controls.pop(handle, None)
+            process = self.window_process.pop(handle, None)
+            self.window_owner.pop(handle, None)
+            if process and process not in self.window_process.values():
+                self.processes.discard(process)
+            if self.foreground == handle:
+                self.foreground = next(reversed(self.windows), None)
+            self.renders += 1
+        self._indexes.pop(handle, None)
+
+    def _delay(self, op, units=1.0):
+        ms = self.latency.get(op, 0.0) * units
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    # --- DesktopProbe ---
+
+    def control_exists(self, name):
+        return self.find_control(name, fuzzy=False) is not None
+
+    def focused_value(self):
+        with self._lock:
+            return self.documents.get(self.foreground)
+
+    # --- MotorBackend ---
+
+    def screen_size(self):
+        return self.screen
+
+    def find_control(self, name, fuzzy=True):
+        """Foreground window, its popups and the taskbar, searched concurrently"""
+        handle = self.foreground
+        if handle is None:
+            return None
+        with self._lock:
+            popups = [h for h, owner in self.window_owner.items() if owner == handle]
+        roots = [SearchRoot(handle, FOREGROUND)] + [SearchRoot(h, POPUP) for h in popups]
+        if TASKBAR_HANDLE in self.window_controls:
+            roots.append(SearchRoot(TASKBAR_HANDLE, TASKBAR))
+        return self.root_search.find(roots, (name, fuzzy))
+
+    def _search_root(self, root, query, cancelled):
+        name, fuzzy = query
+        controls = self.window_controls.get(root.handle)
+        self._delay("find_control")
+        if not controls or cancelled.is_set():
+            return None
+        self._delay("find_per_1k_controls", len(controls) / 1000)
+        index = self._indexes.get(root.handle)
+        if index is None or len(index) != len(controls):
+            index = self._indexes[root.handle] = NameIndex([c.name for c in controls],
+                                                           [c.control_type for c in controls])
+        i, score = index.best(name, min_score=0.6 if fuzzy else 1.0)
+        if i is None:
+            return None
+        control = controls[i]
+        return ControlRef(control.name, control.rect, score, control, control.automation_id)
+
+    def click(self, control, on_hover=None):
+        if on_hover:
+            on_hover()
+        self._delay("click")
+        sim = control.native
+        self.events.append(("click", control.name))
+        if isinstance(sim, SimControl):
+            sim.clicks += 1
+            if not sim.inert:
+                self.renders += 1
+            if sim.on_click:
+                sim.on_click(self)
+        return True
+
+    def type(self, text, strategy=None):
+        self._delay("type_per_char", len(text))
+        with self._lock:
+            if self.foreground is None:
+                return False
+            self.documents[self.foreground] = self.documents.get(self.foreground, "") + text
+            # Documento sin guardar: "*" en el título, como el Bloc de notas
+            title = self.windows.get(self.foreground, "")
+            if not title.startswith("*"):
+                self.windows[self.foreground] = f"*{title}"
+            self.renders += 1
+        self.events.append(("type", text))
+        return True
+
+    def hotkey(self, *keys):
+        self._delay("hotkey")
+        combo = "+".join(keys)
+        self.events.append(("hotkey", combo))
+        self.renders += 1
+        if combo == "alt+f4" and self.foreground is not None:
+            self.close_window(self.foreground)
+        elif combo == "alt+tab" and len(self.windows) > 1:
+            handles = list(self.windows)
+            self.focus(handles[(handles.index(self.foreground) - 1) % len(handles)])
+        elif combo == "ctrl+s" and self.foreground is not None:
+            with self._lock:
+                title = self.windows[self.foreground]
+                self.windows[self.foreground] = title.lstrip("*")
+
+    def activate(self, app_name):
+        process = self._app(app_name)[0]
+        with self._lock:
+            handles = [h for h, p in self.window_process.items() if p == process]
+        if not handles:
+            return None
+        self._delay("activate")
+        self.focus(handles[-1])
+        self.renders += 1
+        self.events.append(("activate", app_name))
+        return self.windows.get(handles[-1])
+
+    def launch(self, app_name):
+        process, title, controls = self._app(app_name)
+        self.events.append(("launch", app_name))
+        # El proceso y la ventana aparecen más tarde, como en un escritorio real
+        self.schedule(self.latency["launch_process"] / 1000, self.start_process, process)
+        self.schedule(self.latency["launch_window"] / 1000, self.add_window, title, process, controls)
+        return process
+
+    def window_context(self, window):
+        with self._lock:
+            process = self.window_process.get(window)
+        return (process, "SimWindow") if process else None
+
+    def describe(self, control, window):
+        if control.native not in self.window_controls.get(window, ()):
+            return None  # Popup o barra de tareas
+        # Ventanas simuladas a pantalla completa: rect relativo = rect absoluto
+        return ClickTarget(control.name, control.automation_id, (), control.rect)
+
+    def locate(self, target, window):
+        self._delay("find_by_id")
+        for control in self.window_controls.get(window, ()):
+            if control.automation_id == target.automation_id and control.name == target.name:
+                return ControlRef(control.name, control.rect, 1.0, control, control.automation_id)
+        return None
+
+    def foreground_rect(self):
+        return (0, 0, *self.screen) if self.foreground is not None else None
+
+    def grab(self, rect):
+        """Flat frame whose colour encodes the render counter; buffer reused while the size holds"""
+        left, top, right, bottom = rect
+        shape = (bottom - top, right - left, 4)
+        if self._frame is None or self._frame.shape != shape:
+            self._frame = np.empty(shape, dtype=np.uint8)
+        self._frame.fill(self.renders * 40 % 256)
+        return self._frame
+
+    def _app(self, app_name):
+        app = app_name.lower().strip()
+        app = ALIASES.get(app, app)
+        if app in self.apps:
+            return self.apps[app]
+        return f"{app}.exe", app.capitalize(), []
+
+
+def _grid_rect(i, row=0):
+    """Distinct on-screen rects laid out on a grid"""
+    x, y = (i % 20) * 90, 40 + (row + i // 20) * 30
+    return x, y, x + 80, y + 24
@@ -0,0 +1,306 @@
+"""
+UIAutomation Motor Backend - Windows desktop through uiautomation + pyautogui
+Control search goes cached snapshot (exact) -> direct lookup + bulk snapshot
+on the foreground window, its popups and the taskbar in parallel -> per-element
+FindAll as last resort.
+"""
+import threading
+import uiautomation as auto
+import pyautogui
+from core.app_catalog import app_catalog
+from core.app_launcher import app_launcher
+from core.engines.motor.base import ControlRef, MotorBackend
+from core.click_memory import ClickTarget
+from core.config import settings
+from core.logger import nervous_system
+from core.motor_trace import motor_trace
+from core.name_index import NameIndex
+from core.root_search import RootSearch, SearchRoot, FOREGROUND, POPUP, TASKBAR
+from core.text_injection import TextInjector
+from core.uia_snapshot import uia_snapshots
+from core.visual_verify import ScreenGrabber
+from core.waits import Waiter, UIAutomationProbe
+from core.window_registry import window_registry
+
+# Aumentamos el timeout para búsquedas profundas si es necesario
+auto.SetGlobalSearchTimeout(5)
+
+
+class UIAutomationBackend(MotorBackend):
+    name = "uiautomation"
+
+    def __init__(self):
+        self.probe = UIAutomationProbe()
+        self._thread_state = threading.local()
+        # Escritura: portapapeles con restauración, SendInput Unicode o pegado por trozos según app
+        self.typist = TextInjector(Waiter(self.probe), app_of_foreground=self._foreground_process)
+        # Búsqueda concurrente por raíz, cada hilo con su propio apartamento UIA
+        self.root_search = RootSearch(self._search_root, init_thread=self.init_thread)
+        # Capturas de región para verificar clics (mss o Pillow)
+        self.grabber = ScreenGrabber()
+        # Catálogo de apps instaladas: carga/refresco incremental en segundo plano
+        app_catalog.warm()
+
+    def init_thread(self):
+        """COM/UIA init for threads other than the one that imported uiautomation (motor executor)"""
+        self._thread_state.uia = auto.UIAutomationInitializerInThread()
+
+    def screen_size(self):
+        return pyautogui.size()
+
+    # --- CONTROLES ---
+
+    def find_control(self, name):
+        window = auto.GetForegroundControl()
+        motor_trace.count("uia")
+        if not window:
+            nervous_system.error("MOTOR", "No hay ventana activa (Ceguera temporal).")
+            return None
+
+        # 0. Snapshot en memoria: clics repetidos en la misma ventana sin tocar COM
+        snapshot = uia_snapshots.peek(window.NativeWindowHandle)
+        if snapshot:
+            control = self._from_snapshot(snapshot, name, exact_only=True)
+            if control:
+                return control
+
+        # 1. Ventana activa, sus popups y la barra de tareas en paralelo (directa + snapshot por raíz)
+        control = self.root_search.find(self._search_roots(window), name)
+        if control:
+            return control
+
+        # 2. Último recurso: escaneo elemento a elemento de la ventana activa
+        nervous_system.motor("Objetivo no visible. Iniciando Escaneo Profundo (Deep Scan)...")
+        best_match = self._fuzzy_find_recursive(window, name, max_depth=10)
+        if best_match:
+            nervous_system.motor(f"Objetivo encontrado (Fuzzy Logic): '{best_match.Name}'")
+            return ControlRef(best_match.Name, _rect(best_match), 0.6, best_match, best_match.AutomationId)
+        return None
+
+    def _search_roots(self, window):
+        handle = window.NativeWindowHandle
+        roots = [SearchRoot(handle, FOREGROUND, window.Name or "")]
+        roots += [SearchRoot(h, POPUP) for h in window_registry.owned_popups(handle, settings.ROOT_SEARCH_MAX_POPUPS)]
+        taskbar = window_registry.taskbar()
+        if taskbar and taskbar != handle:
+            roots.append(SearchRoot(taskbar, TASKBAR))
+        return roots
+
+    def _search_root(self, root, name, cancelled):
+        """
+        Runs on a root-search thread with its own UIA apartment. Elements stay in
+        that thread: results carry only the rect, so the click goes by coordinates.
+        """
+        window = auto.ControlFromHandle(root.handle)
+        motor_trace.count("uia")
+        if not window:
+            return None
+        # Búsqueda directa sin reintentos: si no está, el snapshot la cubre
+        found = window.Control(Name=name, searchDepth=3)
+        motor_trace.count("uia")
+        if found.Exists(0, 0):
+            return ControlRef(found.Name, _rect(found), 1.0, automation_id=found.AutomationId)
+        if cancelled.is_set():
+            return None
+        return self._from_snapshot(uia_snapshots.get(window), name)
+
+    def click(self, control, on_hover=None):
+        """
+        Realiza un clic seguro.
+        Mueve el mouse visualmente hacia el objetivo antes de hacer clic (Feedback visual).
+        on_hover se llama con el cursor ya encima (el resaltado de hover no cuenta como cambio).
+        """
+        center = control.center
+        if center:
+            # Movimiento humano
+            nervous_system.motor(f"Moviendo extremidad a: {center}")
+            with motor_trace.sleeping():  # Animación del cursor: espera, no trabajo
+                pyautogui.moveTo(*center, duration=0.3)
+        else:
+            # Fallback si no tiene rect (raro)
+            nervous_system.motor("Clic ciego (sin coordenadas visuales).")
+        if on_hover:
+            on_hover()
+        if control.native is not None:
+            # Clic UIA (más robusto que pyautogui click)
+            control.native.Click()
+        elif center:
+            pyautogui.click(*center)
+        else:
+            return False
+        return True
+
+    def _from_snapshot(self, snapshot, name, exact_only=False):
+        """Best snapshot match with its cached rect. None if no usable match"""
+        index, score = snapshot.find(name)
+        if index is None or (exact_only and score < 1.0):
+            return None
+        control = ControlRef(snapshot.names[index], snapshot.rect(index), score,
+                             automation_id=snapshot.automation_ids[index])
+        if control.center is None:
+            return None
+        nervous_system.motor(f"Objetivo encontrado (Snapshot, {score:.2f}): '{control.name}'")
+        return control
+
+    def _fuzzy_find_recursive(self, root_control, target_text, max_depth=5):
+        """
+        Recorre el árbol de UI y busca el mejor match de texto.
+        Devuelve el Control si la similitud > 0.8
+        """
+        try:
+            # FIXED: TreeWalker no existe en uiautomation 2.0.29
+            # Usamos FindAll directamente que es más eficiente
+
+            # Optimization: Solo buscar tipos clickeables
+            conditions = auto.OrCondition(
+                auto.ControlTypeCondition(auto.ControlType.ButtonControl),
+                auto.ControlTypeCondition(auto.ControlType.MenuItemControl),
+                auto.ControlTypeCondition(auto.ControlType.TextControl),
+                auto.ControlTypeCondition(auto.ControlType.TabItemControl),
+                auto.ControlTypeCondition(auto.ControlType.HyperlinkControl)
+            )
+
+            # Buscar en todos los descendientes
+            matches = root_control.FindAll(auto.TreeScope.Descendants, conditions)
+            motor_trace.count("uia", 1 + len(matches))  # FindAll + lectura de Name por elemento
+
+            # Índice de trigramas en lugar de SequenceMatcher por elemento
+            index = NameIndex([el.Name or "" for el in matches])
+            best, _ = index.best(target_text, min_score=0.6)
+            best_control = matches[best] if best is not None else None
+
+            return best_control
+
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Error en escaneo profundo: {e}")
+            return None
+
+    # --- MEMORIA DE CLICS ---
+
+    def window_context(self, window):
+        known = window_registry.refresh().get(window)
+        control = auto.ControlFromHandle(window)
+        motor_trace.count("uia")
+        if not control:
+            return None
+        return (known.process if known else ""), control.ClassName or ""
+
+    def describe(self, control, window):
+        # El clic puede cambiar de ventana: el objetivo se describe antes, respecto a la suya
+        if window_registry.root_at(control.center) != window:
+            return None
+        root = auto.ControlFromHandle(window)
+        motor_trace.count("uia")
+        if not root:
+            return None
+        window_rect = _rect(root)
+        rel_rect = None
+        if control.rect and window_rect:
+            left, top = window_rect[0], window_rect[1]
+            rel_rect = (control.rect[0] - left, control.rect[1] - top, control.rect[2] - left, control.rect[3] - top)
+        path = _ancestor_path(control.native, window) if control.native is not None else []
+        return ClickTarget(control.name, control.automation_id, path, rel_rect)
+
+    def locate(self, target, window):
+        """Remembered element by automation id (one native FindFirst), then ancestor path, then rect + name"""
+        root = auto.ControlFromHandle(window)
+        motor_trace.count("uia")
+        if not root:
+            return None
+        found = None
+        if target.automation_id:
+            found = self._find_by_automation_id(root, target.automation_id)
+            if found is not None and target.name and found.Name != target.name:
+                found = None  # Ids reutilizados (listas, pestañas): el nombre debe coincidir
+        if found is None and target.path:
+            found = self._follow_path(root, target.path)
+        if found is None and target.rel_rect:
+            found = self._at_relative_rect(root, target)
+        if found is None:
+            return None
+        return ControlRef(found.Name, _rect(found), 1.0, found, found.AutomationId)
+
+    def _find_by_automation_id(self, window, automation_id):
+        uia = auto._AutomationClient.instance().IUIAutomation
+        condition = uia.CreatePropertyCondition(auto.PropertyId.AutomationIdPropertyId, automation_id)
+        element = window.Element.FindFirst(auto.TreeScope.Descendants, condition)
+        motor_trace.count("uia")
+        return auto.Control.CreateControlFromElement(element) if element else None
+
+    def _follow_path(self, window, path):
+        node = window
+        for control_type, name in path:
+            node = node.Control(searchDepth=1, ControlType=getattr(auto.ControlType, control_type, None), Name=name)
+            motor_trace.count("uia")
+            if not node.Exists(0, 0):
+                return None
+        return node
+
+    def _at_relative_rect(self, window, target):
+        window_rect = _rect(window)
+        if not window_rect:
+            return None
+        left, top, right, bottom = target.rel_rect
+        x, y = window_rect[0] + (left + right) // 2, window_rect[1] + (top + bottom) // 2
+        found = auto.ControlFromPoint(x, y)
+        motor_trace.count("uia")
+        return found if found and found.Name == target.name else None
+
+    # --- TECLADO ---
+
+    def type(self, text, strategy=None):
+        return self.typist.inject(text, strategy=strategy)
+
+    def hotkey(self, *keys):
+        if len(keys) == 1:
+            pyautogui.press(keys[0])
+        else:
+            pyautogui.hotkey(*keys)
+
+    # --- APLICACIONES ---
+
+    def activate(self, app_name):
+        processes = app_launcher.process_names(app_name)
+        display_name = None if processes else app_launcher.display_name(app_name)
+        window = window_registry.find(processes, display_name)
+        if window is not None and window_registry.activate(window):
+            return window.title
+        return None
+
+    def launch(self, app_name):
+        return app_launcher.launch(app_name)
+
+    def foreground_rect(self):
+        window = auto.GetForegroundControl()
+        motor_trace.count("uia")
+        return _rect(window) if window else None
+
+    def window_rect(self, control):
+        return window_registry.root_rect_at(control.center)
+
+    def grab(self, rect):
+        return self.grabber.grab(rect)
+
+    def _foreground_process(self):
+        fg = self.probe.foreground_window()
+        window = window_registry.refresh().get(fg[0]) if fg else None
+        return window.process if window else ""
+
+
+def _ancestor_path(element, window_handle, max_depth=12):
+    """[[ControlTypeName, Name], ...] from just below the window down to the element"""
+    path = []
+    try:
+        node = element
+        while node and len(path) < max_depth and node.NativeWindowHandle != window_handle:
+            path.append([node.ControlTypeName, node.Name])
+            node = node.GetParentControl()
+            motor_trace.count("uia")
+    except Exception:
+        return []
+    return path[::-1] if node and node.NativeWindowHandle == window_handle else []
+
+
+def _rect(control):
+    rect = control.BoundingRectangle
+    return (rect.left, rect.top, rect.right, rect.bottom) if rect else None
@@ -45,13 +45,14 @@ class FasterWhisperEngine:
                 nervous_system.error("SENSORY", f"Error cargando Whisper: {e}")
                 raise
     
-    def transcribe(self, audio_data, language="es"):
+    def transcribe(self, audio_data, language="es", beam_size=5):
         """
         Transcribe audio buffer to text
         
         Args:
             audio_data: SpeechRecognition AudioData object
             language: Language code (es, en, etc.)
+            beam_size: 5 for final transcripts, 1 (greedy) for cheap interim ones
         
         Returns:
             str: Transcribed text or None if failed
@@ -79,7 +80,7 @@ class FasterWhisperEngine:
             segments, info = self.model.transcribe(
                 temp_path,
                 language=language,
-                beam_size=5,
+                beam_size=beam_size,
                 vad_filter=True,  # Voice Activity Detection (filters silence)
                 vad_parameters=dict(min_silence_duration_ms=500)
             )
@@ -14,6 +14,7 @@ class KokoroEngine:
     def __init__(self):
         self.kokoro = None
         self.sample_rate = 24000
+        self.speed = 1.0
         self.voice_name = "es_pe" # Spanish voice (Peruvian accent is often neutral enough, or check available)
         # es_es is better if available in the model mix
         
@@ -119,7 +120,7 @@ class KokoroEngine:
                 lang = "en-gb"
             
             samples, sample_rate = self.kokoro.create(
-                text, voice=self.voice_name, speed=1.0, lang=lang
+                text, voice=self.voice_name, speed=self.speed, lang=lang
             )
             
             if output_file:
@@ -0,0 +1,132 @@
+"""
+Metrics - Rolling latency histograms for the nervous system
+Lightweight, dependency-free aggregation shared by Brain, Motor and API
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+
+
+class LatencyHistogram:
+    """Rolling window of latency samples (ms) with percentile queries"""
+
+    def __init__(self, window=256):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms):
+        with self._lock:
+            self.samples.append(float(value_ms))
+            self.count += 1
+
+    def percentile(self, p):
+        """Nearest-rank percentile over the window, None if empty"""
+        with self._lock:
+            data = sorted(self.samples)
+        if not data:
+            return None
+        rank = max(1, math.ceil(p / 100.0 * len(data)))
+        return data[min(rank, len(data)) - 1]
+
+    def snapshot(self):
+        with self._lock:
+            data = sorted(self.samples)
+            count = self.count
+        if not data:
+            return {"count": count, "window": 0}
+
+        def pct(p):
+            return round(data[max(1, math.ceil(p / 100.0 * len(data))) - 1], 1)
+
+        return {
+            "count": count,
+            "window": len(data),
+            "mean": round(sum(data) / len(data), 1),
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(data[-1], 1),
+        }
+
+
+@dataclass
+class LLMCallRecord:
+    """One LLM backend call, filled in by Brain and the engine that served it"""
+    backend: str
+    model: str
+    session_id: str | None = None
+    tier: str = ""
+    started: float = field(default_factory=time.time)
+    latency_ms: float = 0.0
+    load_ms: float = 0.0
+    prompt_eval_ms: float = 0.0
+    eval_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prefix_cache_hit: bool | None = None
+    json_repairs: int = 0
+    outcome: str = "ok"  # ok | invalid_json | no_action | error | cancelled
+    error: str = ""
+
+
+class MetricsRegistry:
+    """Named histograms and counters, created on first use"""
+
+    def __init__(self, recent=100):
+        self.histograms = {}
+        self.counters = {}
+        self.recent_calls = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def histogram(self, name, window=256):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram(window)
+            return self.histograms[name]
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_llm_call(self, record):
+        """Aggregate an LLMCallRecord into per-backend histograms and counters"""
+        prefix = f"llm.{record.backend}"
+        self.histogram(f"{prefix}.latency_ms").record(record.latency_ms)
+        if record.tier:
+            self.histogram(f"llm.tier.{record.tier}.latency_ms").record(record.latency_ms)
+        if record.prompt_eval_ms:
+            self.histogram(f"{prefix}.prompt_eval_ms").record(record.prompt_eval_ms)
+        if record.load_ms:
+            self.histogram(f"{prefix}.load_ms").record(record.load_ms)
+        if record.eval_ms:
+            self.histogram(f"{prefix}.eval_ms").record(record.eval_ms)
+
+        self.incr(f"{prefix}.calls")
+        self.incr(f"{prefix}.outcome.{record.outcome}")
+        self.incr(f"{prefix}.prompt_tokens", record.prompt_tokens)
+        self.incr(f"{prefix}.completion_tokens", record.completion_tokens)
+        if record.json_repairs:
+            self.incr(f"{prefix}.json_repairs", record.json_repairs)
+        if record.prefix_cache_hit is not None:
+            self.incr(f"{prefix}.prefix_cache.{'hit' if record.prefix_cache_hit else 'miss'}")
+
+        with self._lock:
+            self.recent_calls.append(asdict(record))
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self.histograms.items())
+            counters = dict(self.counters)
+            recent = list(self.recent_calls)
+        return {
+            "histograms": {name: hist.snapshot() for name, hist in items},
+            "counters": counters,
+            "recent_llm_calls": recent,
+        }
+
+
+# Instancia global
+metrics = MetricsRegistry()
@@ -0,0 +1,165 @@
+"""
+Motor Executor - Runs AutomationEngine plans off the listening loop
+Each plan becomes a MotorJob with progress and a cancel flag checked
+between chain steps, so the Ear keeps listening and "para" / "cancela"
+can stop a long chain.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.router import normalize_text
+
+# Órdenes de parada (sin acentos, ya normalizadas)
+STOP_WORDS = {"para", "parar", "detente", "deten", "alto", "cancela", "cancelar", "cancelalo",
+              "basta", "stop", "cancel", "abort", "aborta"}
+# Palabras que pueden acompañar a la orden ("para ya", "cancela eso por favor")
+STOP_FILLER = {"ya", "eso", "esto", "todo", "la", "tarea", "ahora", "por", "favor", "it", "now", "please"}
+
+_job_ids = itertools.count(1)
+
+
+def is_stop_intent(text):
+    """Stop word plus optional filler: "para", "cancela eso", "stop!" (but not "para abrir chrome")"""
+    words = normalize_text(text).replace(",", " ").replace("?", " ").replace("¿", " ").split()
+    return bool(words) and words[0] in STOP_WORDS and all(w in STOP_FILLER for w in words[1:])
+
+
+class MotorJob:
+    """Handle for one submitted plan"""
+
+    def __init__(self, plan, on_progress=None):
+        self.id = next(_job_ids)
+        self.plan = plan
+        self.status = "queued"  # queued | running | done | failed | cancelled
+        self.step = 0
+        self.total = 0
+        self.future = None
+        self.started = None
+        self.finished = None
+        self.cancel_reason = ""
+        self._cancel = threading.Event()
+        self._on_progress = on_progress
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self, reason="usuario"):
+        """Request cancellation; takes effect before the next step"""
+        if self.done():
+            return False
+        self.cancel_reason = reason
+        self._cancel.set()
+        # Si aún no empezó, no llega a ejecutarse
+        if self.future is not None:
+            self.future.cancel()
+        return True
+
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def report(self, step, total, description):
+        """Called by AutomationEngine before each step"""
+        self.step, self.total = step, total
+        if self._on_progress:
+            try:
+                self._on_progress(self, step, total, description)
+            except Exception as e:
+                nervous_system.error("MOTOR", f"Error notificando progreso: {e}")
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class MotorExecutor:
+    """
+    Single dedicated motor thread (the desktop is one). Jobs queue in order;
+    preempt=True makes a new submission cancel the running one first.
+    """
+
+    def __init__(self, hands, on_progress=None, on_finished=None):
+        self.hands = hands
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="motor",
+                                           initializer=hands.init_worker_thread)
+        self.jobs = []  # En curso + en cola, en orden de envío
+        self._lock = threading.RLock()  # future.cancel() llama a _finish en el mismo hilo
+
+    def submit(self, plan, preempt=False):
+        job = MotorJob(plan, self.on_progress)
+        with self._lock:
+            if preempt:
+                for pending in self.jobs:
+                    pending.cancel("nuevo comando")
+            self.jobs.append(job)
+            job.future = self.executor.submit(self._run, job)
+            job.future.add_done_callback(lambda f: self._on_future_done(job, f))
+        return job
+
+    def _on_future_done(self, job, future):
+        # Cancelada en cola: _run nunca se ejecuta, se notifica aquí
+        if future.cancelled():
+            self._finish(job)
+
+    @property
+    def current(self):
+        """Running job, else the next queued one"""
+        with self._lock:
+            return self.jobs[0] if self.jobs else None
+
+    def busy(self):
+        return self.current is not None
+
+    def cancel_current(self, reason="usuario"):
+        """Cancel the running job and everything queued behind it. Returns the running job or None"""
+        with self._lock:
+            jobs = list(self.jobs)
+        if not jobs:
+            return None
+        for job in jobs:
+            job.cancel(reason)
+        nervous_system.motor(f"Cancelando tarea #{jobs[0].id} ({reason}), {len(jobs) - 1} en cola...")
+        return jobs[0]
+
+    def _run(self, job):
+        if job.cancelled:
+            job.status = "cancelled"
+            self._finish(job)
+            return False
+        job.status = "running"
+        job.started = time.perf_counter()
+        try:
+            success = self.hands.execute_task(job.plan, job=job)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Tarea #{job.id} falló: {e}")
+            success = False
+        job.finished = time.perf_counter()
+
+        if job.cancelled:
+            job.status = "cancelled"
+            nervous_system.motor(f"Tarea #{job.id} cancelada en paso {job.step}/{job.total}")
+        else:
+            job.status = "done" if success else "failed"
+            metrics.incr(f"motor.jobs.{job.status}")
+        metrics.histogram("motor.job_ms").record((job.finished - job.started) * 1000)
+        self._finish(job)
+        return success and not job.cancelled
+
+    def _finish(self, job):
+        with self._lock:
+            if job in self.jobs:
+                self.jobs.remove(job)
+        if job.status == "queued":
+            job.status = "cancelled"  # Cancelada antes de empezar
+        if job.status == "cancelled":
+            # Un solo punto de cuenta: en cola, antes del primer paso o a mitad de la cadena
+            metrics.incr("motor.jobs.cancelled")
+        if self.on_finished:
+            try:
+                self.on_finished(job)
+            except Exception as e:
+                nervous_system.error("MOTOR", f"Error notificando fin de tarea: {e}")
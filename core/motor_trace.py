@@ -0,0 +1,167 @@
+"""
+Motor Trace - Per-step timing of AutomationEngine plans
+Every top-level execute_task becomes one JSON line: the full plan, steps with
+start/duration, time spent sleeping or polling vs real work, UIA query counts
+and outcome. tests/replay_motor_trace.py reads the file for budgets,
+comparisons and replay (the plan is re-executed, so it is stored unclipped).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from core.config import settings
+from core.logger import nervous_system
+
+
+class StepTrace:
+    __slots__ = ("action", "params", "start", "end", "sleep_ms", "counts", "ok", "depth")
+
+    def __init__(self, action, params, start, depth):
+        self.action = action
+        self.params = params
+        self.start = start
+        self.end = None
+        self.sleep_ms = 0.0
+        self.counts = {}
+        self.ok = None
+        self.depth = depth
+
+    def to_list(self, origin):
+        """[action, start_ms, dur_ms, sleep_ms, counts, ok, depth, params] relative to the trace start"""
+        return [self.action, round((self.start - origin) * 1000, 2), round((self.end - self.start) * 1000, 2),
+                round(self.sleep_ms, 2), self.counts, int(bool(self.ok)), self.depth, self.params]
+
+
+class MotorTrace:
+    def __init__(self, action, params):
+        self.id = f"{int(time.time() * 1000):x}"
+        self.wall = time.time()
+        self.action = action
+        self.params = params
+        self.start = time.perf_counter()
+        self.steps = []
+        self.ok = None
+        self._lock = threading.Lock()
+
+    def add(self, step):
+        with self._lock:
+            self.steps.append(step)
+
+    def to_json(self):
+        end = max((s.end for s in self.steps), default=self.start)
+        steps = sorted(self.steps, key=lambda s: s.start)
+        return json.dumps({
+            "id": self.id,
+            "ts": round(self.wall, 3),
+            "action": self.action,
+            "params": self.params,
+            "ok": int(bool(self.ok)),
+            "ms": round((end - self.start) * 1000, 2),
+            "steps": [s.to_list(self.start) for s in steps],
+        }, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class TraceRecorder:
+    """
+    The first execute_task on the motor thread opens a trace; nested calls
+    (chain steps, OS-lane steps on pool threads) add steps to it. Sleep time
+    and counters go to the innermost step of the calling thread.
+    """
+
+    def __init__(self, path=None, enabled=None):
+        self.path = path if path is not None else settings.MOTOR_TRACE_FILE
+        self.enabled = settings.MOTOR_TRACE_ENABLED if enabled is None else enabled
+        self.active = None
+        self.last = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def record(self, action, params=None):
+        """Wrap one execute_task; yields the StepTrace (set .ok)"""
+        if not self.enabled:
+            yield StepTrace(action, {}, 0.0, 0)
+            return
+
+        stack = self._stack()
+        owner = False
+        with self._lock:
+            if self.active is None:
+                self.active = MotorTrace(action, params or {})
+                owner = True
+            trace = self.active
+
+        step = StepTrace(action, params or {}, time.perf_counter(), len(stack))
+        stack.append(step)
+        try:
+            yield step
+        finally:
+            stack.pop()
+            step.end = time.perf_counter()
+            # Una cadena no es un paso: es la traza misma
+            if action != "chain":
+                trace.add(step)
+            if owner:
+                trace.ok = step.ok
+                with self._lock:
+                    self.active = None
+                self.last = trace
+                self._write(trace)
+
+    @contextmanager
+    def sleeping(self):
+        """Account the wrapped block (sleep, mouse animation) as waiting rather than work"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_sleep((time.perf_counter() - start) * 1000)
+
+    def sleep(self, seconds):
+        with self.sleeping():
+            time.sleep(seconds)
+
+    def add_sleep(self, ms):
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            stack[-1].sleep_ms += ms
+
+    def count(self, name, n=1):
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            counts = stack[-1].counts
+            counts[name] = counts.get(name, 0) + n
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _write(self, trace):
+        if not self.path:
+            return
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > settings.MOTOR_TRACE_MAX_MB * 1024 * 1024:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(trace.to_json() + "\n")
+        except Exception as e:
+            nervous_system.error("MOTOR", f"No se pudo escribir la traza: {e}")
+
+
+def load_traces(path):
+    """Parsed trace dicts from a trace file (bad lines skipped)"""
+    traces = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                traces.append(json.loads(line))
+            except ValueError:
+                continue
+    return traces
+
+
+# Instancia global
+motor_trace = TraceRecorder()
@@ -0,0 +1,116 @@
+"""
+Name Index - Trigram inverted index over control names
+Accent- and case-folded keys, top-k candidates scored by trigram overlap
+(Dice) with substring boosting; replaces per-element SequenceMatcher scans.
+"""
+import heapq
+import re
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from itertools import chain
+
+# Desempate determinista: tipos más "clickeables" primero (ids UIA ControlType)
+CONTROL_TYPE_PRIORITY = {
+    50000: 8,  # Button
+    50011: 7,  # MenuItem
+    50031: 7,  # SplitButton
+    50005: 6,  # Hyperlink
+    50019: 5,  # TabItem
+    50007: 4,  # ListItem
+    50002: 3,  # CheckBox
+    50020: 1,  # Text
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text):
+    """'Guardar Cómo…' -> 'guardar como'"""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(key, padded=True):
+    if padded:
+        key = f" {key} "
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class NameIndex:
+    """
+    Built once per window snapshot. Names are deduplicated by folded key, and
+    search() touches only the postings of the query's trigrams, so cost grows
+    with the number of distinct matching names, not with the number of controls.
+    """
+
+    def __init__(self, names, control_types=None, visible=None):
+        self.control_types = control_types
+        self.visible = visible
+        self.keys = []            # clave normalizada única
+        self.key_ids = []         # clave -> ids de control, mejor desempate primero
+        self.gram_counts = array("H")
+        self.exact = {}           # clave -> id de clave
+        postings = defaultdict(lambda: array("i"))
+
+        for i, name in enumerate(names):
+            key = fold(name)
+            if not key:
+                continue
+            kid = self.exact.get(key)
+            if kid is None:
+                kid = self.exact[key] = len(self.keys)
+                self.keys.append(key)
+                self.key_ids.append([])
+                grams = trigrams(key)
+                self.gram_counts.append(min(len(grams), 65535))
+                for gram in grams:
+                    postings[gram].append(kid)
+            self.key_ids[kid].append(i)
+
+        self.postings = dict(postings)
+        for ids in self.key_ids:
+            ids.sort(key=self._tiebreak, reverse=True)
+        self.size = len(names)
+
+    def __len__(self):
+        return self.size
+
+    def search(self, query, k=5, min_score=0.3):
+        """Top-k [(id, score)] ordered by score, control type, visibility, then document order"""
+        q = fold(query)
+        if not q:
+            return []
+
+        q_grams = trigrams(q)
+        inner_needed = len(trigrams(q, padded=False))  # todo substring los contiene
+        counts = Counter(chain.from_iterable(self.postings.get(g, ()) for g in q_grams))
+
+        scores = {}
+        exact = self.exact.get(q)
+        if exact is not None:
+            scores[exact] = 1.0
+        for kid, shared in counts.items():
+            if kid == exact:
+                continue
+            score = 2.0 * shared / (len(q_grams) + self.gram_counts[kid])
+            # Substring ("guardar" en "guardar todo"): misma bonificación que el escaneo clásico
+            if shared >= inner_needed and q in self.keys[kid]:
+                score = max(score, 0.9 if len(self.keys[kid]) < len(q) * 2 else 0.7)
+            if score >= min_score:
+                scores[kid] = score
+
+        top_keys = heapq.nlargest(k, scores, key=lambda kid: (scores[kid], *self._tiebreak(self.key_ids[kid][0])))
+        ranked = [(scores[kid], *self._tiebreak(i), i) for kid in top_keys for i in self.key_ids[kid][:k]]
+        return [(entry[-1], entry[0]) for entry in heapq.nlargest(k, ranked)]
+
+    def best(self, query, min_score=0.6):
+        """Single best (id, score), or (None, 0.0)"""
+        top = self.search(query, k=1, min_score=min_score)
+        return top[0] if top else (None, 0.0)
+
+    def _tiebreak(self, i):
+        priority = CONTROL_TYPE_PRIORITY.get(self.control_types[i], 0) if self.control_types is not None else 0
+        visible = 1 if self.visible is None or self.visible[i] else 0
+        return priority, visible, -i  # mayor gana: menor índice (orden del documento) primero
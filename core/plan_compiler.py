@@ -0,0 +1,191 @@
+"""
+Plan Compiler - Turns a validated chain into an execution DAG for the Motor
+Coalesces adjacent typing, drops redundant focus switches, lets OS-level
+steps (create_file) run concurrently with UI steps and replaces blind
+sleeps after launches with readiness waits.
+"""
+import os
+from dataclasses import dataclass, field
+from core.metrics import metrics
+
+# Pasos que no tocan la UI: pueden correr en paralelo con la cadena de UI
+OS_ACTIONS = {"create_file"}
+# Repetirlos seguidos no cambia nada (open_app, además, solo con la misma app y sin new_instance)
+REPEAT_NOOP_ACTIONS = {"save", "open_app"}
+
+# Estimación por defecto (ms) hasta tener muestras reales en motor.step.*
+STEP_COST_MS = {
+    "open_app": 300,
+    "wait_window": 1500,
+    "type": 300,
+    "press_key": 300,
+    "click": 800,
+    "create_file": 20,
+    "save": 500,
+    "minimize": 100,
+    "maximize": 100,
+    "close_window": 100,
+    "refresh": 100,
+    "screenshot": 100,
+    "switch_app": 500,
+}
+DEFAULT_COST_MS = 300
+MIN_SAMPLES = 5
+
+
+@dataclass
+class PlanNode:
+    id: int
+    step: dict
+    lane: str  # "ui" | "os"
+    deps: list = field(default_factory=list)
+    estimate_ms: float = 0.0
+
+    @property
+    def action(self):
+        return self.step.get("action")
+
+
+@dataclass
+class CompiledPlan:
+    nodes: list
+    source_steps: int
+    optimizations: list = field(default_factory=list)
+    predicted_ms: float = 0.0
+
+    def describe(self):
+        """One line per node, for the motor log"""
+        lines = []
+        for node in self.nodes:
+            deps = ",".join(str(d) for d in node.deps) or "-"
+            lines.append(f"  #{node.id} [{node.lane}] {node.action} {node.step.get('parameters', {})} "
+                         f"deps={deps} ~{node.estimate_ms:.0f}ms")
+        return "\n".join(lines)
+
+
+class PlanCompiler:
+    """Peephole passes over the step list, then DAG construction and critical-path estimate"""
+
+    def compile(self, steps):
+        optimizations = []
+        steps = [dict(s, parameters=dict(s.get("parameters") or {})) for s in steps if isinstance(s, dict)]
+        source = len(steps)
+
+        steps = self._coalesce_type(steps, optimizations)
+        steps = self._drop_redundant(steps, optimizations)
+        steps = self._insert_waits(steps, optimizations)
+
+        nodes = self._build_dag(steps)
+        plan = CompiledPlan(nodes, source, optimizations)
+        plan.predicted_ms = self._critical_path(nodes)
+        return plan
+
+    # --- PASADAS ---
+
+    @staticmethod
+    def _coalesce_type(steps, optimizations):
+        """type("a") + type("b") -> type("ab"): one paste instead of two"""
+        out = []
+        for step in steps:
+            prev = out[-1] if out else None
+            if prev and step.get("action") == "type" and prev.get("action") == "type":
+                prev["parameters"]["text"] = str(prev["parameters"].get("text", "")) + \
+                    str(step["parameters"].get("text", ""))
+                optimizations.append("type consecutivos fusionados")
+                continue
+            out.append(step)
+        return out
+
+    @staticmethod
+    def _drop_redundant(steps, optimizations):
+        """
+        True no-ops only:
+          switch_app, switch_app        -> Alt+Tab dos veces vuelve a la misma ventana
+          open_app X, open_app X / save, save   (new_instance pide otra ventana: se conserva)
+        A switch_app after open_app stays: the user may mean the previous window.
+        """
+        out = []
+        for step in steps:
+            action = step.get("action")
+            prev = out[-1] if out else None
+            prev_action = prev.get("action") if prev else None
+
+            if action == "switch_app" and prev_action == "switch_app":
+                out.pop()
+                optimizations.append("par de switch_app eliminado")
+                continue
+            if prev and action == prev_action and action in REPEAT_NOOP_ACTIONS \
+                    and step.get("parameters") == prev.get("parameters") \
+                    and not step.get("parameters", {}).get("new_instance"):
+                optimizations.append(f"{action} duplicado eliminado")
+                continue
+            out.append(step)
+        return out
+
+    @staticmethod
+    def _insert_waits(steps, optimizations):
+        """After a launch, wait for its window instead of sleeping a fixed time"""
+        out = []
+        for i, step in enumerate(steps):
+            out.append(step)
+            if step.get("action") != "open_app":
+                continue
+            # Solo si algo de UI viene detrás; si no, nadie necesita esperar
+            if not any(s.get("action") not in OS_ACTIONS for s in steps[i + 1:]):
+                continue
+            app_name = step["parameters"].get("app_name", "")
+            step["parameters"]["wait"] = False
+            out.append({"action": "wait_window", "parameters": {"title": app_name}})
+            optimizations.append(f"espera fija tras open_app '{app_name}' -> wait_window")
+        return out
+
+    # --- DAG ---
+
+    def _build_dag(self, steps):
+        nodes = []
+        last_ui = None
+        for i, step in enumerate(steps):
+            lane = "os" if step.get("action") in OS_ACTIONS else "ui"
+            node = PlanNode(i, step, lane, estimate_ms=self.estimate(step))
+            if lane == "ui":
+                if last_ui is not None:
+                    node.deps.append(last_ui.id)
+                # Un paso de UI que menciona un archivo creado antes debe esperarlo
+                node.deps.extend(n.id for n in nodes if n.lane == "os" and self._references(step, n.step))
+                last_ui = node
+            else:
+                # Escrituras a la misma ruta conservan su orden
+                path = step["parameters"].get("path")
+                node.deps.extend(n.id for n in nodes if n.lane == "os" and n.step["parameters"].get("path") == path)
+            nodes.append(node)
+        return nodes
+
+    @staticmethod
+    def _references(step, os_step):
+        path = os_step["parameters"].get("path")
+        if not path:
+            return False
+        names = {str(path).lower(), os.path.basename(str(path)).lower()}
+        values = " ".join(str(v) for v in step.get("parameters", {}).values()).lower()
+        return any(name and name in values for name in names)
+
+    @staticmethod
+    def _critical_path(nodes):
+        finish = {}
+        for node in nodes:  # ya en orden topológico
+            start = max((finish[d] for d in node.deps), default=0.0)
+            finish[node.id] = start + node.estimate_ms
+        return max(finish.values(), default=0.0)
+
+    @staticmethod
+    def estimate(step):
+        """p50 of the measured step latency, or the static table until enough samples exist"""
+        action = step.get("action")
+        hist = metrics.histograms.get(f"motor.step.{action}_ms")
+        if hist is not None and len(hist.samples) >= MIN_SAMPLES:
+            return hist.percentile(50)
+        return STEP_COST_MS.get(action, DEFAULT_COST_MS)
+
+
+# Instancia global
+plan_compiler = PlanCompiler()
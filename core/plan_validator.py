@@ -0,0 +1,209 @@
+"""
+Plan Validator - Typed action schema between Brain and AutomationEngine
+Checks LLM plans in microseconds and repairs trivial mistakes locally,
+so only genuinely broken plans cost another LLM round trip.
+"""
+import time
+from dataclasses import dataclass, field
+from core.metrics import metrics
+
+# action -> {parámetro: (tipo, requerido)}
+ACTION_SCHEMA = {
+    "open_app": {"app_name": (str, True), "new_instance": (bool, False)},
+    "type": {"text": (str, True)},
+    "press_key": {"key": (str, True)},
+    "click": {"element": (str, True)},
+    "create_file": {"path": (str, True), "content": (str, False)},
+    "save": {},
+    "minimize": {},
+    "maximize": {},
+    "close_window": {},
+    "refresh": {},
+    "screenshot": {},
+    "switch_app": {},
+    "chain": {"steps": (list, True)},
+    "unknown": {},
+    "chat": {"text": (str, True)},
+    "clarify": {"question": (str, True)},
+    "error": {},  # Interna (Brain sin plan); no se ofrece al LLM
+}
+
+ACTION_ALIASES = {
+    "open": "open_app", "launch": "open_app", "start_app": "open_app", "open_application": "open_app",
+    "run": "open_app", "abrir": "open_app", "abrir_app": "open_app",
+    "write": "type", "type_text": "type", "escribir": "type", "input_text": "type",
+    "press": "press_key", "key": "press_key", "keypress": "press_key", "hotkey": "press_key",
+    "presionar": "press_key", "press_keys": "press_key",
+    "click_element": "click", "clic": "click", "click_button": "click",
+    "write_file": "create_file", "create": "create_file", "crear_archivo": "create_file",
+    "save_file": "save", "guardar": "save",
+    "minimise": "minimize", "maximise": "maximize",
+    "close": "close_window", "close_app": "close_window", "cerrar": "close_window",
+    "reload": "refresh", "take_screenshot": "screenshot", "alt_tab": "switch_app",
+    "sequence": "chain", "steps": "chain", "multi": "chain", "multi_step": "chain",
+    "say": "chat", "respond": "chat", "reply": "chat", "answer": "chat", "speak": "chat",
+    "ask": "clarify", "question": "clarify",
+}
+
+PARAM_ALIASES = {
+    "open_app": {"app": "app_name", "application": "app_name", "name": "app_name",
+                 "program": "app_name", "path": "app_name", "target": "app_name"},
+    "type": {"content": "text", "value": "text", "texto": "text", "message": "text"},
+    "press_key": {"keys": "key", "hotkey": "key", "combination": "key", "shortcut": "key"},
+    "click": {"target": "element", "name": "element", "button": "element",
+              "label": "element", "element_name": "element"},
+    "create_file": {"file": "path", "filename": "path", "file_path": "path",
+                    "text": "content", "data": "content"},
+    "chat": {"message": "text", "response": "text", "answer": "text"},
+    "clarify": {"text": "question", "message": "question"},
+}
+
+KEY_ALIASES = {
+    "control": "ctrl", "ctl": "ctrl", "escape": "esc", "return": "enter", "intro": "enter",
+    "windows": "win", "super": "win", "cmd": "win", "del": "delete", "suprimir": "delete",
+    "espacio": "space", "tabulador": "tab", "mayus": "shift", "flecha arriba": "up",
+    "flecha abajo": "down", "pgup": "pageup", "pgdn": "pagedown",
+}
+
+
+@dataclass
+class ValidationResult:
+    plan: dict
+    ok: bool
+    repairs: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+
+class PlanValidator:
+    """Validate a plan against ACTION_SCHEMA, applying local repairs in place on a copy"""
+
+    def validate(self, plan):
+        start = time.perf_counter()
+        repairs, errors = [], []
+        fixed = self._check(plan, repairs, errors, path="plan")
+
+        metrics.histogram("plan.validate_us").record((time.perf_counter() - start) * 1e6)
+        metrics.incr("plan.validated")
+        if repairs:
+            metrics.incr("plan.repaired")
+            metrics.incr("plan.repairs", len(repairs))
+        if errors:
+            metrics.incr("plan.invalid")
+        return ValidationResult(fixed, not errors, repairs, errors)
+
+    def _check(self, plan, repairs, errors, path):
+        if not isinstance(plan, dict):
+            errors.append(f"{path}: debe ser un objeto JSON con 'action' y 'parameters'")
+            return plan
+        plan = dict(plan)
+
+        # Acción: normalizar y resolver alias
+        action = plan.get("action")
+        if not isinstance(action, str) or not action.strip():
+            errors.append(f"{path}: falta 'action'")
+            return plan
+        normalized = action.strip().lower().replace("-", "_").replace(" ", "_")
+        normalized = ACTION_ALIASES.get(normalized, normalized)
+        if normalized != action:
+            repairs.append(f"{path}: acción '{action}' -> '{normalized}'")
+            plan["action"] = normalized
+        action = normalized
+        if action not in ACTION_SCHEMA:
+            valid = ", ".join(a for a in ACTION_SCHEMA if a != "error")
+            errors.append(f"{path}: acción desconocida '{action}'. Válidas: {valid}")
+            return plan
+
+        # Parámetros: aceptar los que vinieron al nivel raíz
+        params = plan.get("parameters")
+        if params is None:
+            params = {}
+        if not isinstance(params, dict):
+            errors.append(f"{path}: 'parameters' debe ser un objeto")
+            return plan
+        params = dict(params)
+        for key in list(plan):
+            if key not in ("action", "parameters", "thought"):
+                params.setdefault(key, plan.pop(key))
+                repairs.append(f"{path}: '{key}' movido a parameters")
+
+        aliases = PARAM_ALIASES.get(action, {})
+        for key in list(params):
+            target = aliases.get(key)
+            if target and target not in params:
+                params[target] = params.pop(key)
+                repairs.append(f"{path}: parámetro '{key}' -> '{target}'")
+
+        if action == "press_key":
+            self._coerce_key(params, repairs, path)
+        elif action == "chain":
+            params, single = self._check_chain(params, repairs, errors, path)
+            if single is not None:
+                # Cadena de un solo paso: se desenvuelve
+                return single
+
+        for name, (expected, required) in ACTION_SCHEMA[action].items():
+            value = params.get(name)
+            if value is None or value == "":
+                if required:
+                    errors.append(f"{path}: '{action}' requiere '{name}'")
+                continue
+            if not isinstance(value, expected):
+                if expected is str and isinstance(value, (int, float, bool)):
+                    params[name] = str(value)
+                    repairs.append(f"{path}: '{name}' convertido a texto")
+                else:
+                    errors.append(f"{path}: '{name}' debe ser {expected.__name__}")
+
+        plan["parameters"] = params
+        return plan
+
+    def _coerce_key(self, params, repairs, path):
+        key = params.get("key")
+        if isinstance(key, (list, tuple)):
+            key = "+".join(str(k) for k in key)
+            repairs.append(f"{path}: lista de teclas unida con '+'")
+        if not isinstance(key, str):
+            return
+        parts = [p.strip().lower() for p in key.split("+")]
+        parts = [KEY_ALIASES.get(p, p) for p in parts if p]
+        coerced = "+".join(parts)
+        if coerced != params.get("key"):
+            if coerced != key:
+                repairs.append(f"{path}: tecla '{key}' -> '{coerced}'")
+            params["key"] = coerced
+
+    def _check_chain(self, params, repairs, errors, path):
+        steps = params.get("steps")
+        if not isinstance(steps, list) or not steps:
+            errors.append(f"{path}: 'chain' requiere una lista 'steps' no vacía")
+            return params, None
+
+        flat = []
+        for i, step in enumerate(steps):
+            step = self._check(step, repairs, errors, path=f"{path}.steps[{i}]")
+            # Aplanar cadenas anidadas
+            if isinstance(step, dict) and step.get("action") == "chain":
+                repairs.append(f"{path}.steps[{i}]: cadena anidada aplanada")
+                flat.extend(step.get("parameters", {}).get("steps", []))
+            else:
+                flat.append(step)
+
+        if len(flat) == 1 and isinstance(flat[0], dict):
+            repairs.append(f"{path}: cadena de un paso desenvuelta")
+            return params, flat[0]
+        params["steps"] = flat
+        return params, None
+
+
+def format_errors(errors):
+    """Targeted correction message for a re-prompt"""
+    listed = "\n".join(f"- {e}" for e in errors[:8])
+    return (
+        "Tu plan anterior no es válido:\n"
+        f"{listed}\n"
+        "Corrige SOLO esos problemas y responde únicamente con el JSON del plan corregido."
+    )
+
+
+# Instancia global
+plan_validator = PlanValidator()
@@ -39,6 +39,37 @@ class AudioPlayer:
         except Exception as e:
              nervous_system.error("PLAYER", f"Playback error: {e}")
 
+    def play_stream(self, chunks, samplerate, on_first_audio=None, block=2048, stop_event=None):
+        """
+        Gapless playback of consecutive mono chunks (any iterable, e.g. a
+        generator fed by synthesis) through a single OutputStream. stop_event
+        belongs to the caller and is only read: a stop requested for this
+        utterance before playback started is still honoured.
+        """
+        self.stop()
+        self.stop_event.clear()  # Solo el aviso de la reproducción anterior
+        stopped = self.stop_event.is_set if stop_event is None else \
+            (lambda: self.stop_event.is_set() or stop_event.is_set())
+        self.is_playing = True
+        try:
+            with sd.OutputStream(samplerate=samplerate, channels=1, dtype="float32") as stream:
+                self.stream = stream
+                for chunk in chunks:
+                    data = np.asarray(chunk, dtype=np.float32).reshape(-1, 1)
+                    # Escritura por bloques: stop() corta en como mucho un bloque
+                    for i in range(0, len(data), block):
+                        if stopped():
+                            return
+                        stream.write(data[i:i + block])
+                        if on_first_audio:
+                            on_first_audio()
+                            on_first_audio = None
+        except Exception as e:
+            nervous_system.error("PLAYER", f"Stream playback error: {e}")
+        finally:
+            self.stream = None
+            self.is_playing = False
+
     def play_file(self, filename):
         """Play an audio file"""
         try:
@@ -49,6 +80,13 @@ class AudioPlayer:
 
     def stop(self):
         """Stop current playback immediately"""
+        self.stop_event.set()
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.abort()  # Descarta lo pendiente en el buffer del dispositivo
+            except Exception:
+                pass
         if self.is_playing or True: # sounddevice tracks state globally mostly
             try:
                 sd.stop()
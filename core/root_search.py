@@ -0,0 +1,89 @@
+"""
+Root Search - Concurrent control lookup across candidate windows
+The foreground window, its owned popups and the taskbar are searched on a
+small thread pool. Candidates stream back as each root finishes; the first
+one at or above ROOT_SEARCH_EARLY_SCORE wins and the other roots are cancelled.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+
+# Prioridad en empates de puntuación: menor = preferida
+FOREGROUND, POPUP, TASKBAR = 0, 1, 2
+LABELS = {FOREGROUND: "foreground", POPUP: "popup", TASKBAR: "taskbar"}
+
+
+class SearchRoot:
+    __slots__ = ("handle", "kind", "title")
+
+    def __init__(self, handle, kind=FOREGROUND, title=""):
+        self.handle = handle
+        self.kind = kind
+        self.title = title
+
+    @property
+    def label(self):
+        return LABELS.get(self.kind, "other")
+
+    def __repr__(self):
+        return f"SearchRoot({self.handle}, {self.label})"
+
+
+class RootSearch:
+    """
+    search(root, query, cancelled) -> ControlRef or None runs on the pool
+    threads; init_thread runs once per pool thread (COM/UIA apartments).
+    Search functions should check `cancelled` between expensive stages.
+    """
+
+    def __init__(self, search, init_thread=None, max_workers=None, early_score=None):
+        self.search = search
+        self.early_score = settings.ROOT_SEARCH_EARLY_SCORE if early_score is None else early_score
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or settings.ROOT_SEARCH_WORKERS,
+                                       thread_name_prefix="root-search", initializer=init_thread)
+
+    def find(self, roots, query):
+        """Best ControlRef over all roots, or the first high-confidence one as soon as it appears"""
+        if not roots:
+            return None
+        start = time.perf_counter()
+        cancelled = threading.Event()
+        futures = {self.pool.submit(self._search_root, root, query, cancelled): root for root in roots}
+        best, best_root = None, None
+        try:
+            for future in as_completed(futures):
+                control, root = future.result(), futures[future]
+                if control is None:
+                    continue
+                if best is None or (control.score, -root.kind) > (best.score, -best_root.kind):
+                    best, best_root = control, root
+                if control.score >= self.early_score:
+                    break
+        finally:
+            # Las raíces aún en cola no llegan a empezar; las que corren ven el evento
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        label = best_root.label if best_root else "miss"
+        metrics.histogram(f"motor.find.resolve.{label}_ms").record(elapsed_ms)
+        if best is not None:
+            nervous_system.motor(f"Objetivo '{best.name}' en {label} ({best.score:.2f}) tras {elapsed_ms:.0f}ms "
+                                 f"[{len(roots)} raíces]")
+        return best
+
+    def _search_root(self, root, query, cancelled):
+        if cancelled.is_set():
+            return None
+        start = time.perf_counter()
+        try:
+            control = self.search(root, query, cancelled)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Búsqueda en {root.label} fallida: {e}")
+            control = None
+        metrics.histogram(f"motor.find.root.{root.label}_ms").record((time.perf_counter() - start) * 1000)
+        return control
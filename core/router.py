@@ -0,0 +1,90 @@
+"""
+Complexity Router - Picks the cheapest LLM tier able to handle an utterance
+fast (llama3.2:1b) -> full (llama3.1:8b) -> cloud (SambaNova 70B)
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+TIERS = ("fast", "full", "cloud")
+
+# Verbos de orden (infinitivo, imperativo y formas en inglés), sin acentos
+COMMAND_VERBS = {
+    "abre", "abrir", "abrime", "open", "lanza", "ejecuta", "inicia", "run", "launch", "start",
+    "escribe", "escribir", "teclea", "type", "write", "pon",
+    "presiona", "pulsa", "press", "oprime",
+    "clic", "click", "haz", "dale", "selecciona", "select",
+    "cierra", "cerrar", "close", "guarda", "guardar", "save",
+    "minimiza", "minimizar", "minimize", "maximiza", "maximizar", "maximize",
+    "actualiza", "recarga", "refresh", "reload", "captura", "screenshot",
+    "cambia", "switch", "crea", "crear", "create", "copia", "copy", "pega", "paste",
+    "busca", "buscar", "search", "find", "borra", "elimina", "delete", "deshaz", "undo",
+}
+
+CHAIN_MARKERS = re.compile(r"\b(y|luego|despues|entonces|tambien|ademas|and|then|after)\b|[,;]")
+QUESTION_WORDS = {"que", "como", "cual", "cuando", "donde", "quien", "porque", "por",
+                  "what", "how", "why", "who", "when", "where"}
+SOCIAL_WORDS = {"hola", "gracias", "adios", "buenos", "buenas", "hello", "hi", "thanks", "oye"}
+# Referencias que dependen del contexto ("eso", "lo mismo") => ambigüedad
+DEICTIC_WORDS = {"eso", "esto", "ese", "esa", "aquello", "ahi", "alli", "mismo", "otra", "otro",
+                 "it", "that", "this", "again"}
+
+
+def normalize_text(text):
+    """Lowercase, strip accents and punctuation except separators used as chain markers"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s,;?¿]", " ", text)
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    words: int
+    verbs: int
+    reasons: list = field(default_factory=list)
+
+
+class ComplexityRouter:
+    """
+    Cheap rule-based classifier over length, detected verbs and chain indicators.
+    Simple single-action commands go to the fast tier; multi-step, ambiguous
+    or conversational inputs are escalated.
+    """
+
+    def __init__(self, fast_max_words=8, cloud_min_verbs=4, cloud_min_words=30):
+        self.fast_max_words = fast_max_words
+        self.cloud_min_verbs = cloud_min_verbs
+        self.cloud_min_words = cloud_min_words
+
+    def route(self, utterance, has_history=False):
+        text = normalize_text(utterance)
+        words = text.replace(",", " ").replace(";", " ").replace("?", " ").replace("¿", " ").split()
+        verbs = sum(1 for w in words if w in COMMAND_VERBS)
+        reasons = []
+
+        is_question = "?" in text or "¿" in text or (words and words[0] in QUESTION_WORDS)
+        is_social = any(w in SOCIAL_WORDS for w in words)
+        has_chain = verbs >= 2 or (verbs >= 1 and CHAIN_MARKERS.search(text) is not None)
+        is_deictic = any(w in DEICTIC_WORDS for w in words)
+
+        if verbs == 0 and (is_question or is_social):
+            reasons.append("conversacional")
+            return RouteDecision("cloud", len(words), verbs, reasons)
+
+        if verbs >= self.cloud_min_verbs or len(words) >= self.cloud_min_words:
+            reasons.append("multi-paso largo")
+            return RouteDecision("cloud", len(words), verbs, reasons)
+
+        if has_chain:
+            reasons.append("cadena")
+        if is_deictic and has_history:
+            reasons.append("referencia al contexto")
+        if verbs == 0:
+            reasons.append("sin verbo de orden")
+        if len(words) > self.fast_max_words:
+            reasons.append("largo")
+
+        if reasons:
+            return RouteDecision("full", len(words), verbs, reasons)
+        return RouteDecision("fast", len(words), verbs, ["orden simple"])
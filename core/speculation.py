@@ -0,0 +1,131 @@
+"""
+Speculative Planner - Starts Brain.think on partial transcripts
+"abre chro..." begins planning while the user is still speaking; the plan is
+used only if the final transcript matches the partial after normalization.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.router import normalize_text
+
+
+def normalize_utterance(text):
+    """Comparison key for partial vs final transcripts (case, accents, punctuation, spacing)"""
+    return " ".join(normalize_text(text).replace(",", " ").replace(";", " ")
+                    .replace("?", " ").replace("¿", " ").split())
+
+
+class Speculation:
+    """One in-flight speculative think"""
+
+    def __init__(self, key, text, future):
+        self.key = key
+        self.text = text
+        self.future = future
+        self.started = None   # perf_counter al empezar/terminar el think
+        self.finished = None
+
+
+class SpeculativePlanner:
+    """
+    Fed with interim transcripts by the Ear; a partial is "stable" when the
+    same normalized text is seen twice in a row. Speculation runs on a small
+    pool (SPECULATION_MAX_CONCURRENCY workers, default 1) so the LLM does not
+    oversubscribe the CPU while STT is still decoding; superseded attempts
+    still queued are cancelled.
+    """
+
+    def __init__(self, brain, max_workers=None):
+        self.brain = brain
+        self.max_workers = max_workers or settings.SPECULATION_MAX_CONCURRENCY
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._lock = threading.Lock()
+        self._last_partial = None
+        self._current = None
+
+    def on_partial(self, text, session_id=None):
+        """Interim transcript callback (called from the Ear's decoding thread)"""
+        key = normalize_utterance(text)
+        if not key:
+            return
+
+        with self._lock:
+            stable = key == self._last_partial
+            self._last_partial = key
+            if not stable or (self._current and self._current.key == key):
+                return
+            # Partial estable distinto del especulado: el anterior ya no sirve
+            if self._current:
+                self._discard(self._current, "superseded")
+
+            metrics.incr("speculation.attempts")
+            nervous_system.cognitive(f"Especulando plan para parcial: '{text}'")
+            spec = Speculation(key, text, None)
+            spec.future = self.executor.submit(self._run, spec, session_id)
+            self._current = spec
+
+    def resolve(self, final_text, session_id=None):
+        """
+        Plan for the final transcript: the speculative one if it matches,
+        otherwise a fresh Brain.think (the stale speculation is cancelled)
+        """
+        key = normalize_utterance(final_text)
+        with self._lock:
+            spec, self._current = self._current, None
+            self._last_partial = None
+
+        if spec is not None and spec.key == key:
+            arrived = time.perf_counter()
+            try:
+                plan = spec.future.result()
+            except (CancelledError, Exception) as e:
+                nervous_system.error("COGNITIVE", f"Especulación fallida: {e}")
+                plan = None
+            if plan is not None:
+                # Ahorro = parte del think que ya había corrido cuando llegó el final
+                end = spec.finished or arrived
+                saved_ms = (min(arrived, end) - spec.started) * 1000
+                metrics.incr("speculation.hits")
+                metrics.histogram("speculation.saved_ms").record(saved_ms)
+                nervous_system.cognitive(f"✓ Plan especulativo reutilizado (ahorro {saved_ms:.0f}ms)")
+                self.brain.remember(final_text, plan, session_id)
+                return plan
+
+        if spec is not None:
+            metrics.incr("speculation.misses")
+            self._discard(spec, "mismatch")
+        return self.brain.think(final_text, session_id=session_id)
+
+    def reset(self):
+        """Drop any pending speculation (e.g. capture returned nothing)"""
+        with self._lock:
+            spec, self._current = self._current, None
+            self._last_partial = None
+        if spec is not None:
+            self._discard(spec, "abandoned")
+
+    def shutdown(self):
+        self.reset()
+        self.executor.shutdown(wait=False)
+
+    def _run(self, spec, session_id):
+        spec.started = time.perf_counter()
+        try:
+            return self.brain.think(spec.text, session_id=session_id, speculative=True)
+        finally:
+            spec.finished = time.perf_counter()
+
+    def _discard(self, spec, reason):
+        """Cancel if not started; otherwise its result is ignored and the compute is counted as wasted"""
+        if spec.future.cancel():
+            metrics.incr(f"speculation.cancelled.{reason}")
+            return
+        metrics.incr(f"speculation.wasted.{reason}")
+
+        def _account(_):
+            metrics.histogram("speculation.wasted_ms").record(
+                ((spec.finished or time.perf_counter()) - spec.started) * 1000)
+        spec.future.add_done_callback(_account)
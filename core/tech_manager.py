@@ -8,6 +8,14 @@ from pathlib import Path
 from typing import Dict, Tuple, Optional, Any
 from core.logger import nervous_system
 
+# Políticas de despacho del Brain entre LLM local y cloud
+#   local_only: solo Ollama (cloud únicamente si no hay motor local)
+#   hedged:     Ollama primero; cloud si no hay plan válido tras un retardo (p95)
+#   race:       ambos a la vez, gana el primer plan válido
+LLM_POLICIES = ("local_only", "hedged", "race")
+# Stacks privados/offline: nunca se les aplica una política que mande prompts a la nube
+OFFLINE_STACKS = ("local_only",)
+
 
 class TechnologyManager:
     """
@@ -24,6 +32,9 @@ class TechnologyManager:
         
         # Load or create default config
         self.active_config = self._load_config()
+
+        # Callbacks notificados al cambiar stack/motor/política (p.ej. residencia de modelos)
+        self._listeners = []
         
         nervous_system.system("Technology Manager initialized")
     
@@ -80,7 +91,9 @@ class TechnologyManager:
                     "llm": "sambanova",
                     "motor": "uiautomation",
                     "wake_word": "none",
-                    "vad": "none"
+                    "vad": "none",
+                    "llm_policy": "hedged",
+                    "ollama_models": []
                 },
                 "premium_cloud": {
                     "stt": "hf_whisper",
@@ -88,7 +101,9 @@ class TechnologyManager:
                     "llm": "openai_gpt4",
                     "motor": "omniparser",
                     "wake_word": "porcupine",
-                    "vad": "silero"
+                    "vad": "silero",
+                    "llm_policy": "race",
+                    "ollama_models": []
                 },
                 "local_only": {
                     "stt": "faster_whisper",
@@ -96,7 +111,9 @@ class TechnologyManager:
                     "llm": "local_llama",
                     "motor": "uiautomation",
                     "wake_word": "porcupine",
-                    "vad": "silero"
+                    "vad": "silero",
+                    "llm_policy": "local_only",
+                    "ollama_models": ["llama3.2:1b", "llama3.1:8b"]
                 },
                 "gaming": {
                     "stt": "faster_whisper",
@@ -104,7 +121,9 @@ class TechnologyManager:
                     "llm": "sambanova",
                     "motor": "pydirectinput",
                     "wake_word": "porcupine",
-                    "vad": "silero"
+                    "vad": "silero",
+                    "llm_policy": "race",
+                    "ollama_models": []
                 }
             },
             "technologies": {
@@ -237,6 +256,14 @@ class TechnologyManager:
                         "category": "Gaming",
                         "description": "Control games with DirectX input",
                         "install_cmd": "pip install pydirectinput"
+                    },
+                    "simulated": {
+                        "name": "Simulated Desktop (Headless)",
+                        "status": "active",
+                        "requires_key": False,
+                        "free": True,
+                        "category": "Testing",
+                        "description": "In-memory desktop for tests and benchmarks"
                     }
                 },
                 "wake_word": {
@@ -340,6 +367,17 @@ class TechnologyManager:
         except Exception as e:
             nervous_system.error("SYSTEM", f"Error saving config: {e}")
     
+    def add_listener(self, callback):
+        """Register callback(event) for configuration changes ("stack", "llm_policy" or an engine category)"""
+        self._listeners.append(callback)
+
+    def _notify(self, event: str):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                nervous_system.error("SYSTEM", f"Error in config listener: {e}")
+
     def get_active_stack(self) -> Dict:
         """Get currently active technology stack"""
         stack_name = self.active_config.get("active_stack", "default")
@@ -350,6 +388,28 @@ class TechnologyManager:
         stack = self.get_active_stack()
         return stack.get(category, "")
     
+    def get_llm_policy(self) -> str:
+        """Get the local/cloud dispatch policy of the active stack"""
+        if self.active_config.get("active_stack") in OFFLINE_STACKS:
+            return "local_only"
+        policy = self.get_active_stack().get("llm_policy", "hedged")
+        return policy if policy in LLM_POLICIES else "hedged"
+
+    def set_llm_policy(self, policy: str) -> bool:
+        """Set the local/cloud dispatch policy of the active stack"""
+        if policy not in LLM_POLICIES:
+            return False
+
+        stack_name = self.active_config["active_stack"]
+        if stack_name in OFFLINE_STACKS and policy != "local_only":
+            nervous_system.error("SYSTEM", f"El stack {stack_name} es offline: política '{policy}' rechazada")
+            return False
+        self.active_config["stacks"][stack_name]["llm_policy"] = policy
+        self._save_config()
+        nervous_system.system(f"LLM policy for {stack_name}: {policy}")
+        self._notify("llm_policy")
+        return True
+
     def switch_engine(self, category: str, engine_name: str) -> bool:
         """
         Hot-swap engine for a category
@@ -370,7 +430,7 @@ class TechnologyManager:
         self._save_config()
         
         nervous_system.system(f"Switched {category} to {engine_name}")
-        nervous_system.system(f"Switched {category} to {engine_name}")
+        self._notify(category)
         return True
 
     def set_advanced_module_status(self, module_id: str, status: str):
@@ -409,13 +469,15 @@ class TechnologyManager:
         else:
             return ("warning", "Engine status unknown")
     
-    def create_stack(self, stack_name: str, stt: str, tts: str, llm: str, motor: str) -> bool:
+    def create_stack(self, stack_name: str, stt: str, tts: str, llm: str, motor: str,
+                     llm_policy: str = "hedged") -> bool:
         """Create a new custom stack"""
         self.active_config["stacks"][stack_name] = {
             "stt": stt,
             "tts": tts,
             "llm": llm,
-            "motor": motor
+            "motor": motor,
+            "llm_policy": llm_policy if llm_policy in LLM_POLICIES else "hedged"
         }
         self._save_config()
         nervous_system.system(f"Created stack: {stack_name}")
@@ -429,6 +491,7 @@ class TechnologyManager:
         self.active_config["active_stack"] = stack_name
         self._save_config()
         nervous_system.system(f"Loaded stack: {stack_name}")
+        self._notify("stack")
         return True
     
     def get_all_stacks(self) -> Dict:
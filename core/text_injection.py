@@ -0,0 +1,292 @@
+"""
+Text Injection - Strategies for typing text into the focused control
+Clipboard paste (user clipboard saved and restored), batched Unicode SendInput
+(no clipboard, any script), chunked paste for very large text and a keypress
+fallback. The injector picks per target app, verifies through UIA when it can
+and learns which strategy is fastest for each app.
+"""
+import sys
+import time
+import pyautogui
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.motor_trace import motor_trace
+
+# Apps donde Ctrl+V no pega o pega distinto (consolas, escritorio remoto)
+APP_STRATEGIES = {
+    "windowsterminal": "sendinput",
+    "cmd": "sendinput",
+    "conhost": "sendinput",
+    "powershell": "sendinput",
+    "putty": "sendinput",
+    "mstsc": "sendinput",
+}
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+VK_RETURN = 0x0D
+VK_TAB = 0x09
+
+
+class PartialInjection(OSError):
+    """A strategy failed after part of the text went out; `remaining` is what was not typed"""
+
+    def __init__(self, message, remaining):
+        super().__init__(message)
+        self.remaining = remaining
+
+
+class ClipboardPaste:
+    """Ctrl+V through the clipboard; the previous clipboard content is restored afterwards"""
+    name = "clipboard"
+
+    def __init__(self, waiter):
+        self.waiter = waiter
+        try:
+            import pyperclip
+            self.pyperclip = pyperclip
+        except ImportError:
+            self.pyperclip = None
+
+    def available(self):
+        return self.pyperclip is not None
+
+    def inject(self, text):
+        saved = self._read()
+        try:
+            self._paste(text)
+        finally:
+            if saved is not None:
+                # La app lee el portapapeles de forma asíncrona tras Ctrl+V
+                motor_trace.sleep(settings.TEXT_PASTE_SETTLE_S)
+                self.pyperclip.copy(saved)
+        return True
+
+    def _paste(self, text):
+        self.pyperclip.copy(text)
+        self.waiter.for_clipboard(text)
+        pyautogui.hotkey("ctrl", "v")
+
+    def _read(self):
+        try:
+            return self.pyperclip.paste()
+        except Exception:
+            return None  # Contenido no textual (imagen): no se puede restaurar como texto
+
+
+class ChunkedPaste(ClipboardPaste):
+    """Paste in TEXT_PASTE_CHUNK_CHARS pieces (terminals and Electron apps drop huge single pastes)"""
+    name = "chunked"
+
+    def inject(self, text):
+        saved = self._read()
+        size = settings.TEXT_PASTE_CHUNK_CHARS
+        try:
+            for start in range(0, len(text), size):
+                try:
+                    self._paste(text[start:start + size])
+                except Exception as e:
+                    if start:
+                        raise PartialInjection(f"pegado cortado en {start}/{len(text)}: {e}", text[start:]) from e
+                    raise
+                motor_trace.sleep(settings.TEXT_PASTE_SETTLE_S)
+        finally:
+            if saved is not None:
+                self.pyperclip.copy(saved)
+        return True
+
+
+class UnicodeSendInput:
+    """
+    KEYEVENTF_UNICODE key events, TEXT_SENDINPUT_BATCH characters per
+    SendInput call. Works for accents, emoji (surrogate pairs) and apps that
+    ignore Ctrl+V; never touches the clipboard.
+    """
+    name = "sendinput"
+
+    def __init__(self):
+        self._send = None
+        if sys.platform != "win32":
+            return
+        import ctypes
+        from ctypes import wintypes
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                        ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        class _U(ctypes.Union):
+            _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]  # mi fija el tamaño real de INPUT
+
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("u", _U)]
+
+        self.ctypes = ctypes
+        self.INPUT = INPUT
+        self._send = ctypes.windll.user32.SendInput
+
+    def available(self):
+        return self._send is not None
+
+    def inject(self, text):
+        text = text.replace("\r\n", "\n")
+        size = settings.TEXT_SENDINPUT_BATCH
+        for start in range(0, len(text), size):
+            piece = text[start:start + size]
+            chunk = self._events(piece)
+            array = (self.INPUT * len(chunk))(*chunk)
+            sent = self._send(len(chunk), array, self.ctypes.sizeof(self.INPUT))
+            if sent != len(chunk):
+                message = f"SendInput bloqueado ({sent}/{len(chunk)} eventos; ¿UIPI?)"
+                done = start + self._chars_sent(piece, sent)
+                if done:
+                    raise PartialInjection(message, text[done:])  # Lo ya escrito no se repite
+                raise OSError(message)
+        return True
+
+    @staticmethod
+    def _chars_sent(piece, events):
+        """Characters of piece fully typed (key down and up) by the first `events` events"""
+        count = 0
+        for char in piece:
+            events -= 4 if ord(char) > 0xFFFF else 2  # Par sustituto: dos unidades UTF-16
+            if events < 0:
+                break
+            count += 1
+        return count
+
+    def _events(self, text):
+        events = []
+        units = text.encode("utf-16-le")
+        for i in range(0, len(units), 2):
+            code = units[i] | units[i + 1] << 8
+            if code == 0x0A:
+                vk, scan, flags = VK_RETURN, 0, 0
+            elif code == 0x09:
+                vk, scan, flags = VK_TAB, 0, 0
+            else:
+                vk, scan, flags = 0, code, KEYEVENTF_UNICODE
+            for up in (0, KEYEVENTF_KEYUP):
+                event = self.INPUT(type=INPUT_KEYBOARD)
+                event.u.ki.wVk, event.u.ki.wScan, event.u.ki.dwFlags = vk, scan, flags | up
+                events.append(event)
+        return events
+
+
+class KeyPress:
+    """pyautogui.write: last resort, ASCII only"""
+    name = "keypress"
+
+    def available(self):
+        return True
+
+    def inject(self, text):
+        if not text.isascii():
+            raise ValueError("keypress solo admite ASCII")
+        pyautogui.write(text, interval=0)
+        return True
+
+
+class TextInjector:
+    """
+    Chooses a strategy per (app, text size): short text -> SendInput, long ->
+    clipboard, very long -> chunked; APP_STRATEGIES and learned results
+    override. Each injection records chars/s per strategy and size bucket
+    (paste has a fixed cost, so its rate grows with the text), and a strategy
+    that fails verification twice in an app is skipped there. If a strategy
+    fails after typing part of the text, only the rest goes to the next one.
+    """
+
+    def __init__(self, waiter, app_of_foreground=None):
+        self.waiter = waiter
+        self.app_of_foreground = app_of_foreground
+        self.strategies = {s.name: s for s in (UnicodeSendInput(), ClipboardPaste(waiter),
+                                               ChunkedPaste(waiter), KeyPress())}
+        self.speed = {}     # (app, estrategia, tramo de tamaño) -> chars/s (media móvil)
+        self.failures = {}  # (app, estrategia) -> verificaciones fallidas
+
+    def inject(self, text, strategy=None):
+        if not text:
+            return True
+        app = self._app()
+        order = ([strategy] if strategy else []) + self._candidates(app, len(text))
+        pending = text
+        for name in dict.fromkeys(order):
+            impl = self.strategies.get(name)
+            if impl is None or not impl.available():
+                continue
+            start = time.perf_counter()
+            try:
+                impl.inject(pending)
+            except Exception as e:
+                nervous_system.error("MOTOR", f"Inyección '{name}' falló: {e}")
+                self.failures[(app, name)] = self.failures.get((app, name), 0) + 1
+                if isinstance(e, PartialInjection):
+                    metrics.incr("motor.type.partial")
+                    pending = e.remaining  # La siguiente estrategia continúa donde se cortó
+                continue
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            self._record(app, name, pending, elapsed, text)
+            return True
+        nervous_system.error("MOTOR", "Ninguna estrategia de escritura disponible")
+        return False
+
+    def _candidates(self, app, size):
+        if size > settings.TEXT_PASTE_CHUNK_CHARS:
+            order = ["chunked", "clipboard", "sendinput"]
+        elif size <= settings.TEXT_SENDINPUT_MAX_CHARS:
+            order = ["sendinput", "clipboard"]
+        else:
+            order = ["clipboard", "sendinput"]
+        preferred = APP_STRATEGIES.get(app)
+        if preferred:
+            if preferred in order:
+                order.remove(preferred)
+            order.insert(0, preferred)
+        else:
+            # Lo aprendido en esta app (para textos de este tamaño) manda sobre el orden por defecto
+            bucket = _size_bucket(size)
+            known = [name for name in order if (app, name, bucket) in self.speed]
+            if len(known) > 1:
+                best = max(known, key=lambda name: self.speed[(app, name, bucket)])
+                order.remove(best)
+                order.insert(0, best)
+        order = [name for name in order if self.failures.get((app, name), 0) < 2]
+        return order + ["keypress"]
+
+    def _record(self, app, name, typed, elapsed, text):
+        """typed: what this strategy wrote (the tail after a partial failure); text: the whole request"""
+        chars = len(typed)
+        cps = chars / elapsed
+        key = (app, name, _size_bucket(len(text)))
+        self.speed[key] = cps if key not in self.speed else 0.7 * self.speed[key] + 0.3 * cps
+        metrics.incr(f"motor.type.{name}")
+        metrics.histogram(f"motor.type.{name}.chars_per_s").record(cps)
+
+        verified = self.waiter.for_text(text) if settings.TEXT_VERIFY else None
+        if verified is False:
+            self.failures[(app, name)] = self.failures.get((app, name), 0) + 1
+            metrics.incr("motor.type.verify_failed")
+        nervous_system.motor(f"Texto escrito vía {name} en {app or '?'}: {chars} caracteres, {cps:,.0f} car/s"
+                             + (" (sin verificar)" if verified is None else "" if verified else " (VERIFICACIÓN FALLIDA)"))
+
+    def _app(self):
+        if self.app_of_foreground is None:
+            return ""
+        try:
+            return self.app_of_foreground() or ""
+        except Exception:
+            return ""
+
+
+def _size_bucket(size):
+    """0: SendInput range, 1: single paste, 2: chunked paste"""
+    if size <= settings.TEXT_SENDINPUT_MAX_CHARS:
+        return 0
+    return 1 if size <= settings.TEXT_PASTE_CHUNK_CHARS else 2
@@ -0,0 +1,288 @@
+"""
+TTS Cache - Content-addressed audio for phrases the agent repeats
+Key = sha1(engine, voice, speed, text). PCM (Kokoro) lives in an in-memory
+LRU of float32 arrays backed by .npy files (read into memory on load, so
+evicting a file never invalidates a cached array); compressed audio
+(edge-tts mp3) is kept as files. The disk store is capped and evicts least
+recently used files first.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+
+CACHE_DIR = Path(__file__).parent.parent / "cache" / "tts"
+
+# Saludo de arranque y respuestas fijas de main.py ("No entendí.", error, "Cancelado.")
+# más la pregunta de aclaración por defecto; se sintetizan en segundo plano al arrancar
+PREWARM_PHRASES = (
+    "Sistema en línea.",
+    "No entendí.",
+    "Hubo un error en mi proceso cognitivo.",
+    "Cancelado.",
+    "¿Puedes repetir?",
+)
+
+
+class TTSCache:
+    """
+    get/put for PCM (samples, sample_rate); get_file/put_file for encoded
+    audio. Files are named <key>.<sample_rate>.npy or <key><ext>; their
+    mtime is the LRU clock on disk.
+    """
+
+    def __init__(self, directory=CACHE_DIR, memory_mb=None, disk_mb=None):
+        self.directory = Path(directory) if directory else None
+        self.memory_limit = (settings.TTS_CACHE_MEMORY_MB if memory_mb is None else memory_mb) * 1024 * 1024
+        self.disk_limit = (settings.TTS_CACHE_DISK_MB if disk_mb is None else disk_mb) * 1024 * 1024
+        self.memory = OrderedDict()  # clave -> (samples, sample_rate)
+        self.memory_bytes = 0
+        self.files = {}              # clave -> ruta (índice del disco)
+        self.disk_bytes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._scanned = False
+
+    @staticmethod
+    def key(engine, voice, speed, text):
+        raw = f"{engine}|{voice}|{float(speed):.2f}|{' '.join(text.split())}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def contains(self, engine, voice, speed, text):
+        """Stored in memory or on disk (no hit/miss accounting)"""
+        key = self.key(engine, voice, speed, text)
+        with self._lock:
+            if key in self.memory:
+                return True
+        return self._file(key) is not None
+
+    # --- PCM ---
+
+    def get(self, engine, voice, speed, text):
+        """(samples, sample_rate) or None"""
+        key = self.key(engine, voice, speed, text)
+        with self._lock:
+            item = self.memory.get(key)
+            if item is not None:
+                self.memory.move_to_end(key)
+                self._hit("memory")
+                return item
+        path = self._file(key)
+        if path is None or path.suffix != ".npy":
+            self._miss()
+            return None
+        try:
+            # Lectura completa, sin mmap: en Windows un mmap abierto impide borrar el fichero
+            samples = np.load(path)
+            item = (samples, int(path.suffixes[-2][1:]))
+        except Exception as e:
+            nervous_system.error("VOCAL", f"Audio en caché ilegible ({path.name}): {e}")
+            self._drop_file(key)
+            self._miss()
+            return None
+        self._touch(path)
+        self._remember(key, item)
+        self._hit("disk")
+        return item
+
+    def put(self, engine, voice, speed, text, samples, sample_rate):
+        key = self.key(engine, voice, speed, text)
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self._remember(key, (samples, sample_rate))
+        if self.directory is None:
+            return
+        path = self.directory / f"{key}.{sample_rate}.npy"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self.directory / f"{key}.tmp.npy"
+            np.save(tmp, samples)
+            os.replace(tmp, path)
+        except Exception as e:
+            nervous_system.error("VOCAL", f"No se pudo guardar audio en caché: {e}")
+            return
+        self._index(key, path)
+
+    # --- AUDIO CODIFICADO (mp3) ---
+
+    def get_file(self, engine, voice, speed, text):
+        """Path of a cached encoded file, or None"""
+        key = self.key(engine, voice, speed, text)
+        path = self._file(key)
+        if path is None or path.suffix == ".npy":
+            self._miss()
+            return None
+        self._touch(path)
+        self._hit("disk")
+        return str(path)
+
+    def put_file(self, engine, voice, speed, text, source, ext=".mp3"):
+        """Move an encoded file into the cache; returns its cached path (or source if disabled)"""
+        if self.directory is None:
+            return source
+        key = self.key(engine, voice, speed, text)
+        path = self.directory / f"{key}{ext}"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            os.replace(source, path)
+        except Exception as e:
+            nervous_system.error("VOCAL", f"No se pudo guardar audio en caché: {e}")
+            return source
+        self._index(key, path)
+        return str(path)
+
+    # --- PRE-CARGA / ESTADÍSTICAS ---
+
+    def prewarm(self, phrases, cached, synthesize):
+        """
+        Background pass over phrases: cached(text) says whether it is already
+        stored, synthesize(text) stores it (through put/put_file).
+        """
+        def run():
+            start = time.perf_counter()
+            done = 0
+            for text in phrases:
+                try:
+                    if not cached(text):
+                        synthesize(text)
+                        done += 1
+                except Exception as e:
+                    nervous_system.error("VOCAL", f"Pre-carga de '{text}' fallida: {e}")
+            if done:
+                nervous_system.vocal(f"Frases frecuentes pre-sintetizadas: {done} en "
+                                     f"{time.perf_counter() - start:.1f}s")
+
+        threading.Thread(target=run, daemon=True, name="tts-prewarm").start()
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_mb": round(self.memory_bytes / 1048576, 1),
+                "disk_mb": round(self.disk_bytes / 1048576, 1),
+                "files": len(self.files),
+            }
+
+    # --- INTERNOS ---
+
+    def _hit(self, tier):
+        with self._lock:
+            self.hits[tier] += 1
+        metrics.incr(f"tts.cache.{tier}_hits")
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+        metrics.incr("tts.cache.misses")
+
+    def _remember(self, key, item):
+        size = item[0].nbytes
+        if size > self.memory_limit:
+            return
+        with self._lock:
+            old = self.memory.pop(key, None)
+            if old is not None:
+                self.memory_bytes -= old[0].nbytes
+            self.memory[key] = item
+            self.memory_bytes += size
+            while self.memory_bytes > self.memory_limit:
+                _, (samples, _) = self.memory.popitem(last=False)
+                self.memory_bytes -= samples.nbytes
+
+    def _scan(self):
+        """Index the disk store once (first lookup)"""
+        if self._scanned or self.directory is None:
+            return
+        with self._lock:
+            if self._scanned:
+                return
+            if self.directory.exists():
+                for path in self.directory.iterdir():
+                    if ".tmp" in path.suffixes:
+                        continue
+                    self.files[path.name.split(".")[0]] = path
+                    self.disk_bytes += path.stat().st_size
+            self._scanned = True
+
+    def _file(self, key):
+        self._scan()
+        with self._lock:
+            return self.files.get(key)
+
+    def _index(self, key, path):
+        self._scan()
+        with self._lock:
+            old = self.files.get(key)
+            if old is not None and old != path:
+                self._unlink(old)
+            elif old is not None:
+                self.disk_bytes -= self._size(old, default=0)
+            self.files[key] = path
+            self.disk_bytes += self._size(path)
+            if self.disk_bytes > self.disk_limit:
+                self._evict()
+
+    def _evict(self):
+        """Oldest mtime first until 90% of the cap (hysteresis: no eviction on every put)"""
+        by_age = sorted(self.files.items(), key=lambda kv: self._mtime(kv[1]))
+        target = self.disk_limit * 0.9
+        for key, path in by_age:
+            if self.disk_bytes <= target:
+                break
+            if self._unlink(path):  # Si no se puede borrar (en uso) sigue indexado y contando
+                del self.files[key]
+                metrics.incr("tts.cache.evictions")
+
+    def _drop_file(self, key):
+        with self._lock:
+            path = self.files.get(key)
+            if path is not None and self._unlink(path):
+                del self.files[key]
+
+    def _unlink(self, path):
+        """Delete a cached file; disk_bytes only shrinks if it is really gone"""
+        size = self._size(path, default=0)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        self.disk_bytes -= size
+        return True
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _size(path, default=0):
+        try:
+            return path.stat().st_size
+        except OSError:
+            return default
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return 0.0
+
+
+# Instancia global
+tts_cache = TTSCache()
@@ -0,0 +1,121 @@
+"""
+TTS Stream - Sentence-level streaming synthesis for local TTS engines
+Text is split into sentences (the first one also at clauses, so it is short),
+a worker synthesizes chunks in order while the player writes earlier ones
+into a single output stream. Speech starts after one short chunk instead of
+the whole answer; time-to-first-audio is recorded as tts.first_audio_ms.
+"""
+import queue
+import re
+import threading
+import time
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+
+# Fin de oración (incluye puntos suspensivos y saltos de línea) y cortes de cláusula
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+_DONE = object()
+
+
+def split_sentences(text, first_max=None, min_chars=None):
+    """
+    Chunks in speaking order. Pieces shorter than min_chars are merged with
+    the next one (prosody); the first chunk is cut at clauses if longer than first_max.
+    """
+    first_max = settings.TTS_STREAM_FIRST_CHARS if first_max is None else first_max
+    min_chars = settings.TTS_STREAM_MIN_CHARS if min_chars is None else min_chars
+    pieces = [p.strip() for p in SENTENCE_END.split(text or "") if p and p.strip()]
+    if pieces and len(pieces[0]) > first_max:
+        clauses = [c for c in CLAUSE_END.split(pieces[0]) if c]
+        pieces[:1] = clauses
+
+    chunks, pending = [], ""
+    for piece in pieces:
+        pending = f"{pending} {piece}" if pending else piece
+        # El primer trozo sale en cuanto hay algo que decir: es el que fija la latencia
+        if len(pending) >= min_chars or (not chunks and len(pending) >= first_max // 4):
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks and len(pending) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+class StreamingSpeaker:
+    """
+    synthesize(text) -> (samples, sample_rate) or None/False; player provides
+    play_stream(chunks, sample_rate, on_first_audio, stop_event) and stop().
+    """
+
+    def __init__(self, synthesize, player):
+        self.synthesize = synthesize
+        self.player = player
+        self.stop_event = threading.Event()
+
+    def speak(self, text):
+        """Blocks until everything was played (or stop()); False if nothing could be synthesized"""
+        chunks = split_sentences(text)
+        if not chunks:
+            return True
+        self.stop_event.clear()
+        start = time.perf_counter()
+        audio = queue.Queue()
+        worker = threading.Thread(target=self._synthesize_all, args=(chunks, audio), daemon=True,
+                                  name="tts-stream")
+        worker.start()
+
+        first = audio.get()
+        if first is _DONE:
+            return False
+        if self.stop_event.is_set():
+            return True  # stop() llegó durante la síntesis del primer fragmento
+        samples, sample_rate = first
+        first_ms = (time.perf_counter() - start) * 1000
+
+        def on_first_audio():
+            ttfa = (time.perf_counter() - start) * 1000
+            metrics.histogram("tts.first_audio_ms").record(ttfa)
+            nervous_system.vocal(f"Primer audio en {ttfa:.0f}ms ({len(chunks)} fragmentos, "
+                                 f"1º sintetizado en {first_ms:.0f}ms)")
+
+        self.player.play_stream(self._chunks(samples, audio), sample_rate, on_first_audio=on_first_audio,
+                                stop_event=self.stop_event)
+        self.stop_event.set()  # El worker no sigue sintetizando si la reproducción se cortó
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        self.player.stop()
+
+    def _chunks(self, first, audio):
+        if self.stop_event.is_set():
+            return
+        yield first
+        while not self.stop_event.is_set():
+            if audio.empty():
+                metrics.incr("tts.stream.underruns")  # El audio llegó al final antes que la síntesis
+            item = audio.get()
+            if item is _DONE:
+                return
+            yield item[0]
+
+    def _synthesize_all(self, chunks, audio):
+        try:
+            for chunk in chunks:
+                if self.stop_event.is_set():
+                    break
+                start = time.perf_counter()
+                result = self.synthesize(chunk)
+                metrics.histogram("tts.synth_ms").record((time.perf_counter() - start) * 1000)
+                if not result:
+                    nervous_system.error("VOCAL", f"Fragmento sin audio: '{chunk[:40]}'")
+                    continue
+                audio.put(result)
+        finally:
+            audio.put(_DONE)
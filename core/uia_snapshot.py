@@ -0,0 +1,240 @@
+"""
+UIA Snapshot Cache - Clickable subtree of a window fetched once, served from memory
+One FindAllBuildCache round trip (UIA CacheRequest) retrieves name, control
+type, automation id and bounding rect of every clickable descendant, instead of
+reading el.Name over cross-process COM per element. Snapshots are dropped on
+focus, structure-change, move/resize and scroll WinEvents (or after a TTL if
+hooks are unavailable): a hit is clicked at its cached rect, so any event
+that can move elements on screen invalidates the window.
+"""
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.motor_trace import motor_trace
+from core.name_index import NameIndex
+
+# Tipos clickeables (mismos que el escaneo profundo)
+CLICKABLE_TYPES = ("ButtonControl", "MenuItemControl", "TextControl", "TabItemControl",
+                   "HyperlinkControl", "ListItemControl", "CheckBoxControl", "SplitButtonControl")
+
+# WinEvents (winuser.h)
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MOVESIZESTART = 0x000A
+EVENT_SYSTEM_MOVESIZEEND = 0x000B
+EVENT_SYSTEM_SCROLLINGSTART = 0x0012
+EVENT_SYSTEM_SCROLLINGEND = 0x0013
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_REORDER = 0x8004
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_CARET = -8
+OBJID_CURSOR = -9
+GA_ROOT = 2
+
+
+class UIASnapshot:
+    """Array-backed element table: parallel lists/arrays indexed by element position"""
+
+    def __init__(self, handle, title):
+        self.handle = handle
+        self.title = title
+        self.names = []
+        self.automation_ids = []
+        self.control_types = array("i")
+        self.rects = array("i")  # left, top, right, bottom por elemento
+        self.created = time.monotonic()
+        self.hits = 0
+        self._index = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, control_type, automation_id, rect):
+        self.names.append(name)
+        self.automation_ids.append(automation_id)
+        self.control_types.append(control_type)
+        self.rects.extend(rect)
+        self._index = None
+
+    def rect(self, i):
+        return tuple(self.rects[i * 4:i * 4 + 4])
+
+    def center(self, i):
+        left, top, right, bottom = self.rect(i)
+        if right <= left or bottom <= top:
+            return None
+        return (left + right) // 2, (top + bottom) // 2
+
+    @property
+    def index(self):
+        """Trigram index over names, built on first lookup"""
+        if self._index is None:
+            visible = [self.center(i) is not None for i in range(len(self))]
+            self._index = NameIndex(self.names, self.control_types, visible)
+        return self._index
+
+    def find(self, target, min_ratio=0.6):
+        """Best element index for target (exact > substring > fuzzy). Returns (index, score) or (None, 0.0)"""
+        return self.index.best(target, min_score=min_ratio)
+
+
+class UIASnapshotCache:
+    """Per-window snapshots (LRU), invalidated by WinEvent hooks or TTL"""
+
+    def __init__(self, max_windows=8, ttl_s=30.0):
+        self.max_windows = max_windows
+        self.ttl_s = ttl_s
+        self.snapshots = OrderedDict()  # handle -> UIASnapshot
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()  # Varios hilos de búsqueda pueden construir a la vez
+        self._auto = None
+        self._cache_request = None
+        self._condition = None
+        self._hooks_active = False
+        self._hook_thread = None
+
+    # --- API ---
+
+    def get(self, window):
+        """Snapshot of a uiautomation window Control, built with one bulk call on miss"""
+        handle = window.NativeWindowHandle
+        with self._lock:
+            snap = self.snapshots.get(handle)
+            if snap is not None and self._fresh(snap):
+                self.snapshots.move_to_end(handle)
+                snap.hits += 1
+                metrics.incr("uia.snapshot.hits")
+                return snap
+            self.snapshots.pop(handle, None)
+
+        metrics.incr("uia.snapshot.misses")
+        start = time.perf_counter()
+        snap = self._build(window)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.histogram("uia.snapshot.build_ms").record(elapsed_ms)
+        nervous_system.motor(f"Snapshot UIA de '{snap.title}': {len(snap)} elementos en {elapsed_ms:.0f}ms")
+
+        with self._lock:
+            self.snapshots[handle] = snap
+            while len(self.snapshots) > self.max_windows:
+                self.snapshots.popitem(last=False)
+        return snap
+
+    def peek(self, handle):
+        """Valid cached snapshot without building one"""
+        with self._lock:
+            snap = self.snapshots.get(handle)
+            return snap if snap is not None and self._fresh(snap) else None
+
+    def invalidate(self, handle=None):
+        with self._lock:
+            if handle is None:
+                self.snapshots.clear()
+            elif self.snapshots.pop(handle, None) is not None:
+                metrics.incr("uia.snapshot.invalidations")
+
+    def _fresh(self, snap):
+        # Con hooks, la validez la deciden los eventos; el TTL es una red de seguridad
+        ttl = self.ttl_s * (10 if self._hooks_active else 1)
+        return time.monotonic() - snap.created < ttl
+
+    # --- CONSTRUCCIÓN (CacheRequest) ---
+
+    def _init_uia(self):
+        if self._cache_request is not None:
+            return
+        with self._init_lock:
+            if self._cache_request is None:
+                self._create_requests()
+
+    def _create_requests(self):
+        import uiautomation as auto
+        self._auto = auto
+        client = auto._AutomationClient.instance()
+        uia = client.IUIAutomation
+
+        request = uia.CreateCacheRequest()
+        for prop in (auto.PropertyId.NamePropertyId, auto.PropertyId.ControlTypePropertyId,
+                     auto.PropertyId.AutomationIdPropertyId, auto.PropertyId.BoundingRectanglePropertyId):
+            request.AddProperty(prop)
+        request.AutomationElementMode = 0  # AutomationElementMode_None: solo propiedades cacheadas
+
+        condition = None
+        for name in CLICKABLE_TYPES:
+            cond = uia.CreatePropertyCondition(auto.PropertyId.ControlTypePropertyId,
+                                               getattr(auto.ControlType, name))
+            condition = cond if condition is None else uia.CreateOrCondition(condition, cond)
+        self._condition = condition
+        self._cache_request = request  # Último: marca la inicialización como completa
+        self._start_hooks()
+
+    def _build(self, window):
+        self._init_uia()
+        snap = UIASnapshot(window.NativeWindowHandle, window.Name or "")
+        elements = window.Element.FindAllBuildCache(self._auto.TreeScope.Descendants,
+                                                    self._condition, self._cache_request)
+        motor_trace.count("uia")  # Una sola ida y vuelta para todo el subárbol
+        for i in range(elements.Length if elements else 0):
+            el = elements.GetElement(i)
+            rect = el.CachedBoundingRectangle
+            snap.add(el.CachedName or "", el.CachedControlType, el.CachedAutomationId or "",
+                     (rect.left, rect.top, rect.right, rect.bottom))
+        return snap
+
+    # --- INVALIDACIÓN POR EVENTOS ---
+
+    def _start_hooks(self):
+        """WinEvent hooks (foreground, structure, move/resize, scroll, location) on a message-loop thread"""
+        if sys.platform != "win32" or self._hook_thread is not None:
+            return
+        self._hook_thread = threading.Thread(target=self._hook_loop, daemon=True)
+        self._hook_thread.start()
+
+    def _hook_loop(self):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, timestamp):
+            if event == EVENT_SYSTEM_FOREGROUND:
+                self.invalidate(hwnd)
+                return
+            # LOCATIONCHANGE es muy frecuente: sin snapshots no hay nada que invalidar
+            if id_object in (OBJID_CARET, OBJID_CURSOR) or not hwnd or not self.snapshots:
+                return
+            root = user32.GetAncestor(hwnd, GA_ROOT)
+            if root in self.snapshots:
+                self.invalidate(root)
+
+        callback = WinEventProc(on_event)  # Referencia viva mientras corre el loop
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, callback, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_OBJECT_CREATE, EVENT_OBJECT_REORDER, 0, callback, 0, 0, flags),
+            # Los aciertos se clican en el rect guardado: mover, redimensionar o desplazar lo invalida
+            user32.SetWinEventHook(EVENT_SYSTEM_MOVESIZESTART, EVENT_SYSTEM_MOVESIZEEND, 0, callback, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_SYSTEM_SCROLLINGSTART, EVENT_SYSTEM_SCROLLINGEND, 0, callback, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_LOCATIONCHANGE, 0, callback, 0, 0,
+                                   flags),
+        ]
+        if not all(hooks):
+            nervous_system.error("MOTOR", "No se pudieron registrar WinEvent hooks; snapshots por TTL")
+            return
+        self._hooks_active = True
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) != 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+
+# Instancia global
+uia_snapshots = UIASnapshotCache()
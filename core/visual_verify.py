@@ -0,0 +1,134 @@
+"""
+Visual Verify - OCR-free "did the click do anything?" check
+Grabs the target window region before and after an action, downscales it to
+a small luminance image inside preallocated NumPy buffers and counts pixels
+that changed beyond a noise threshold. No allocation per frame after the
+first one, so a check costs the screen grab plus well under a millisecond.
+"""
+import threading
+import time
+import numpy as np
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.waits import wait_until
+
+# Diferencia mínima por píxel en luminancia B+2G+R (0..1020): ignora ruido y antialiasing
+PIXEL_THRESHOLD = 24
+
+
+class ScreenGrabber:
+    """Region screenshots as (h, w, 3|4) uint8 arrays: mss (BGRA, no copy) if installed, else PIL"""
+
+    def __init__(self):
+        self._local = threading.local()  # mss no es thread-safe: una instancia por hilo
+        try:
+            import mss
+            self._mss = mss
+        except ImportError:
+            self._mss = None
+        self._image_grab = None
+        if self._mss is None:
+            try:
+                from PIL import ImageGrab
+                self._image_grab = ImageGrab
+            except ImportError:
+                nervous_system.error("MOTOR", "Sin mss ni Pillow: verificación visual desactivada")
+
+    def available(self):
+        return self._mss is not None or self._image_grab is not None
+
+    def grab(self, rect):
+        left, top, right, bottom = rect
+        if right <= left or bottom <= top:
+            return None
+        if self._mss is not None:
+            sct = getattr(self._local, "sct", None)
+            if sct is None:
+                sct = self._local.sct = self._mss.mss()
+            shot = sct.grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
+            return np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        if self._image_grab is not None:
+            return np.asarray(self._image_grab.grab(bbox=rect, all_screens=True))
+        return None
+
+
+class VisualVerifier:
+    """
+    arm(rect) captures the reference frame; wait_change(timeout) polls until
+    enough of the region differs. grab is a callable rect -> ndarray or None.
+    """
+
+    def __init__(self, grab, downscale=None, min_change=None):
+        self.grab = grab
+        self.downscale = downscale or settings.CLICK_VERIFY_DOWNSCALE
+        self.min_change = settings.CLICK_VERIFY_MIN_CHANGE if min_change is None else min_change
+        self.rect = None
+        self.last_fraction = 0.0
+        self._shape = None
+        self._before = self._after = self._diff = self._mask = None
+
+    def arm(self, rect):
+        """Capture the reference frame; False if the region cannot be grabbed"""
+        self.rect = None
+        if rect is None:
+            return False
+        frame = self._grab(rect)
+        if frame is None:
+            return False
+        self._ensure_buffers(frame)
+        self._to_gray(frame, self._before)
+        self.rect = rect
+        return True
+
+    def wait_change(self, timeout=None):
+        """True once the region changed, False at the deadline, None if nothing was armed"""
+        if self.rect is None:
+            return None
+        timeout = settings.CLICK_VERIFY_TIMEOUT_S if timeout is None else timeout
+        changed = bool(wait_until(self._changed, timeout, initial_interval=0.015, max_interval=0.06,
+                                  name="visual_change"))
+        metrics.incr("motor.verify.changed" if changed else "motor.verify.unchanged")
+        return changed
+
+    def _changed(self):
+        start = time.perf_counter()
+        frame = self._grab(self.rect)
+        if frame is None:
+            return False
+        if self._view(frame).shape[:2] != self._shape:
+            return True  # La región cambió de tamaño: la ventana cambió
+        self._to_gray(frame, self._after)
+        np.subtract(self._after, self._before, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        np.greater(self._diff, PIXEL_THRESHOLD, out=self._mask)
+        self.last_fraction = np.count_nonzero(self._mask) / self._mask.size
+        metrics.histogram("motor.verify.frame_ms").record((time.perf_counter() - start) * 1000)
+        return self.last_fraction >= self.min_change
+
+    def _grab(self, rect):
+        try:
+            return self.grab(rect)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Captura de región fallida: {e}")
+            return None
+
+    def _view(self, frame):
+        # Submuestreo por stride: vista sin copia
+        return frame[::self.downscale, ::self.downscale]
+
+    def _ensure_buffers(self, frame):
+        shape = self._view(frame).shape[:2]
+        if shape != self._shape:
+            self._shape = shape
+            self._before = np.empty(shape, dtype=np.int16)
+            self._after = np.empty(shape, dtype=np.int16)
+            self._diff = np.empty(shape, dtype=np.int16)
+            self._mask = np.empty(shape, dtype=bool)
+
+    def _to_gray(self, frame, out):
+        """B+2G+R (or R+2G+B; the difference is symmetric) into `out` without temporaries"""
+        view = self._view(frame)
+        np.add(view[..., 0], view[..., 2], out=out, dtype=np.int16)
+        out += view[..., 1]
+        out += view[..., 1]
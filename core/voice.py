@@ -1,5 +1,6 @@
 import os
 import asyncio
+import uuid
 import edge_tts
 import playsound
 from elevenlabs import stream
@@ -11,6 +12,11 @@ import pyttsx3
 from core.config import settings
 from core.logger import nervous_system
 from core.tech_manager import tech_manager
+from core.tts_cache import tts_cache, PREWARM_PHRASES
+from core.tts_stream import StreamingSpeaker
+
+# Voz sugerida: es-AR-TomasNeural o es-ES-AlvaroNeural para masculino, es-MX-DaliaNeural para femenino
+EDGE_VOICE = "es-MX-DaliaNeural"
 
 # Import Kokoro Engine
 try:
@@ -48,6 +54,7 @@ class Voice:
              self.player = AudioPlayer()
         except Exception:
              self.player = None
+        self.streamer = None  # Kokoro por oraciones (se crea con el motor)
 
         self.eleven = None
         # Only init ElevenLabs if explicitly active or key present AND user wants it
@@ -57,8 +64,23 @@ class Voice:
             except Exception:
                 pass
 
+        if settings.TTS_CACHE_ENABLED:
+            self.prewarm()
+
+    def prewarm(self, phrases=PREWARM_PHRASES):
+        """Synthesize the agent's fixed phrases into the TTS cache in the background"""
+        active_engine = tech_manager.get_active_engine("tts")
+        if active_engine == "kokoro" and self.kokoro and self.kokoro.kokoro:
+            cached = lambda text: tts_cache.contains("kokoro", self.kokoro.voice_name, self.kokoro.speed, text)
+            tts_cache.prewarm(phrases, cached, self._kokoro_synth)
+        elif active_engine == "edge_tts":
+            cached = lambda text: tts_cache.contains("edge_tts", EDGE_VOICE, 1.0, text)
+            tts_cache.prewarm(phrases, cached, lambda text: asyncio.run(self._edge_tts_file(text, keep=True)))
+
     def stop(self):
         """Stop current speech immediately"""
+        if self.streamer:
+            self.streamer.stop()
         if self.player:
             self.player.stop()
         if self.engine:
@@ -104,9 +126,17 @@ class Voice:
         """Usa Kokoro TTS (Local High Quality)"""
         if not self.kokoro:
             self.kokoro = KokoroEngine()
-        
+
+        # Streaming: la primera oración suena mientras se sintetizan las siguientes
+        if settings.TTS_STREAMING and self.player and hasattr(self.player, "play_stream"):
+            if self.streamer is None:
+                self.streamer = StreamingSpeaker(self._kokoro_synth, self.player)
+            if not self.streamer.speak(text):
+                raise Exception("Fallo generación Kokoro")
+            return
+
         # Now returns audio data tuple (samples, sample_rate) or False
-        result = self.kokoro.generate(text, return_data=True)
+        result = self._kokoro_synth(text)
         
         if result:
             samples, sample_rate = result
@@ -117,6 +147,18 @@ class Voice:
         else:
             raise Exception("Fallo generación Kokoro")
 
+    def _kokoro_synth(self, text):
+        """(samples, sample_rate) for one phrase or chunk, from the TTS cache when possible"""
+        voice, speed = self.kokoro.voice_name, self.kokoro.speed
+        if settings.TTS_CACHE_ENABLED:
+            cached = tts_cache.get("kokoro", voice, speed, text)
+            if cached is not None:
+                return cached
+        result = self.kokoro.generate(text, return_data=True)
+        if result and settings.TTS_CACHE_ENABLED:
+            tts_cache.put("kokoro", voice, speed, text, *result)
+        return result
+
     def _speak_elevenlabs(self, text):
         output_file = "temp_eleven.mp3"
         try:
@@ -147,21 +189,33 @@ class Voice:
 
     async def _speak_edge_tts(self, text):
         """Voz neuronal gratuita de Microsoft Edge (Excelente calidad local-ish)"""
-        output_file = "temp_speech.mp3"
-        # Voz sugerida: es-AR-TomasNeural o es-ES-AlvaroNeural para masculino, es-MX-DaliaNeural para femenino
-        communicate = edge_tts.Communicate(text, "es-MX-DaliaNeural")
-        await communicate.save(output_file)
-        
+        output_file, temporary = await self._edge_tts_file(text)
         try:
             playsound.playsound(output_file)
         except Exception as e:
             nervous_system.error("VOCAL", f"Error reproduciendo audio: {e}")
         finally:
-            if os.path.exists(output_file):
+            # El mp3 en caché se queda; solo se borra el temporal
+            if temporary and os.path.exists(output_file):
                 try:
                     os.remove(output_file)
                 except: pass
 
+    async def _edge_tts_file(self, text, keep=False):
+        """(mp3 path, is_temporary): cached copy, or a fresh download moved into the cache"""
+        if settings.TTS_CACHE_ENABLED:
+            cached = tts_cache.get_file("edge_tts", EDGE_VOICE, 1.0, text)
+            if cached:
+                return cached, False
+        # Nombre único: la pre-carga descarga en paralelo con speak()
+        output_file = f"temp_speech_{uuid.uuid4().hex[:8]}.mp3"
+        communicate = edge_tts.Communicate(text, EDGE_VOICE)
+        await communicate.save(output_file)
+        if settings.TTS_CACHE_ENABLED or keep:
+            cached = tts_cache.put_file("edge_tts", EDGE_VOICE, 1.0, text, output_file)
+            return cached, cached == output_file
+        return output_file, True
+
 if __name__ == "__main__":
     voice = Voice()
     voice.speak("Prueba de sistema vocal.")
@@ -0,0 +1,259 @@
+"""
+Waits - Event-driven readiness for the Motor
+wait_until() polls a condition with exponential backoff and returns as soon
+as it holds. Conditions read the desktop through a pluggable probe:
+UIAutomationProbe on Windows, FakeDesktopProbe anywhere (tests, benchmarks).
+"""
+import threading
+import time
+from core.logger import nervous_system
+from core.metrics import metrics
+from core.motor_trace import motor_trace
+
+
+def wait_until(condition, timeout=5.0, initial_interval=0.02, max_interval=0.25, backoff=1.5, name="condition"):
+    """
+    Poll condition() until it returns a truthy value or timeout expires.
+    Returns that value, or None on timeout. Latency and timeouts are
+    recorded as motor.wait.<name>_ms / motor.wait.<name>.timeouts.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = initial_interval
+    while True:
+        try:
+            value = condition()
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Error evaluando espera '{name}': {e}")
+            value = None
+        now = time.monotonic()
+        if value:
+            metrics.histogram(f"motor.wait.{name}_ms").record((now - start) * 1000)
+            return value
+        if now >= deadline:
+            metrics.incr(f"motor.wait.{name}.timeouts")
+            return None
+        motor_trace.sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+
+class DesktopProbe:
+    """
+    Read-only view of the desktop used by wait conditions.
+    Methods may return None when the backend cannot answer (e.g. no psutil).
+    """
+
+    def process_running(self, name):
+        raise NotImplementedError
+
+    def foreground_window(self):
+        """(handle, title) of the foreground window, or None"""
+        raise NotImplementedError
+
+    def control_exists(self, name):
+        raise NotImplementedError
+
+    def clipboard_text(self):
+        raise NotImplementedError
+
+    def focused_value(self):
+        """Text of the focused control (Value or Text pattern), or None"""
+        raise NotImplementedError
+
+
+class UIAutomationProbe(DesktopProbe):
+    """Windows probe: uiautomation for windows/controls, psutil for processes, pyperclip for clipboard"""
+
+    def __init__(self):
+        import uiautomation as auto
+        self.auto = auto
+        try:
+            import psutil
+            self.psutil = psutil
+        except ImportError:
+            self.psutil = None
+        try:
+            import pyperclip
+            self.pyperclip = pyperclip
+        except ImportError:
+            self.pyperclip = None
+
+    def process_running(self, name):
+        if self.psutil is None:
+            return None
+        base = _process_base(name)
+        for proc in self.psutil.process_iter(["name"]):
+            proc_name = (proc.info.get("name") or "").lower()
+            if proc_name.startswith(base):
+                return True
+        return False
+
+    def foreground_window(self):
+        window = self.auto.GetForegroundControl()
+        motor_trace.count("uia")
+        if not window:
+            return None
+        return window.NativeWindowHandle, window.Name or ""
+
+    def control_exists(self, name):
+        window = self.auto.GetForegroundControl()
+        motor_trace.count("uia", 2)
+        if not window:
+            return False
+        return window.Control(Name=name, searchDepth=3).Exists(0, 0)
+
+    def clipboard_text(self):
+        return self.pyperclip.paste() if self.pyperclip else None
+
+    def focused_value(self):
+        control = self.auto.GetFocusedControl()
+        motor_trace.count("uia", 2)
+        if not control:
+            return None
+        for read in (lambda: control.GetValuePattern().Value,
+                     lambda: control.GetTextPattern().DocumentRange.GetText(-1)):
+            try:
+                value = read()
+            except Exception:
+                continue
+            if value is not None:
+                return value
+        return None
+
+
+class FakeDesktopProbe(DesktopProbe):
+    """
+    In-memory desktop model. Events can be scheduled to happen later, so
+    waits can be exercised on Linux:
+        desk.schedule(0.4, desk.start_process, "notepad.exe")
+        desk.schedule(0.9, desk.open_window, 42, "Sin título: Bloc de notas")
+    """
+
+    def __init__(self):
+        self.processes = set()
+        self.windows = {}  # handle -> title
+        self.foreground = None
+        self.controls = set()
+        self.clipboard = ""
+        self.focused_text = None  # None = el control enfocado no expone texto
+        self._lock = threading.Lock()
+        self._timers = []
+
+    def schedule(self, delay, fn, *args):
+        timer = threading.Timer(delay, fn, args)
+        timer.daemon = True
+        self._timers.append(timer)
+        timer.start()
+        return timer
+
+    def start_process(self, name):
+        with self._lock:
+            self.processes.add(name.lower())
+
+    def open_window(self, handle, title, focus=True):
+        with self._lock:
+            self.windows[handle] = title
+            if focus:
+                self.foreground = handle
+
+    def focus(self, handle):
+        with self._lock:
+            self.foreground = handle if handle in self.windows else self.foreground
+
+    def add_control(self, name):
+        with self._lock:
+            self.controls.add(name)
+
+    def set_clipboard(self, text):
+        with self._lock:
+            self.clipboard = text
+
+    # --- DesktopProbe ---
+
+    def process_running(self, name):
+        base = _process_base(name)
+        with self._lock:
+            return any(p.startswith(base) for p in self.processes)
+
+    def foreground_window(self):
+        with self._lock:
+            if self.foreground is None:
+                return None
+            return self.foreground, self.windows.get(self.foreground, "")
+
+    def control_exists(self, name):
+        with self._lock:
+            return name in self.controls
+
+    def clipboard_text(self):
+        with self._lock:
+            return self.clipboard
+
+    def focused_value(self):
+        with self._lock:
+            return self.focused_text
+
+
+def _process_base(name):
+    name = name.lower().strip().strip('"')
+    return name[:-4] if name.endswith(".exe") else name
+
+
+class Waiter:
+    """Readiness conditions over a DesktopProbe"""
+
+    def __init__(self, probe):
+        self.probe = probe
+
+    def for_process(self, name, timeout=5.0):
+        """True once a process named like `name` runs; True right away if the probe cannot tell"""
+        if self.probe.process_running(name) is None:
+            return True
+        return bool(wait_until(lambda: self.probe.process_running(name), timeout, name="process"))
+
+    def for_window(self, title="", timeout=8.0, changed_from=None):
+        """
+        Foreground window whose title contains `title`, or (when changed_from is
+        given) any foreground window other than that handle. Returns (handle, title) or None.
+        """
+        title = title.lower()
+
+        def ready():
+            fg = self.probe.foreground_window()
+            if not fg:
+                return None
+            handle, name = fg
+            if title and title in name.lower():
+                return fg
+            if changed_from is not None and handle != changed_from:
+                return fg
+            return None
+
+        return wait_until(ready, timeout, name="window")
+
+    def for_foreground_change(self, before, timeout=0.5):
+        """Wait until the foreground (handle, title) differs from `before` (dialog opened, title updated)"""
+        def changed():
+            fg = self.probe.foreground_window()
+            return fg if fg and fg != before else None
+
+        return wait_until(changed, timeout, name="foreground_change")
+
+    def for_control(self, name, timeout=3.0):
+        return bool(wait_until(lambda: self.probe.control_exists(name), timeout, name="control"))
+
+    def for_text(self, text, timeout=0.5):
+        """
+        Typed text visible in the focused control: True/False, or None when
+        the control exposes no text (verification not possible).
+        """
+        tail = text.replace("\r", "").strip()[-64:]
+        if not tail or self.probe.focused_value() is None:
+            return None
+        return bool(wait_until(lambda: tail in (self.probe.focused_value() or "").replace("\r", ""),
+                               timeout, name="text"))
+
+    def for_clipboard(self, text, timeout=1.0):
+        if self.probe.clipboard_text() is None:
+            return True
+        return bool(wait_until(lambda: self.probe.clipboard_text() == text, timeout, name="clipboard"))
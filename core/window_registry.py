@@ -0,0 +1,257 @@
+"""
+Window Registry - Live table of top-level windows and their processes
+Refreshed by cheap EnumWindows passes (a few ms) whenever the table is older
+than WINDOW_REGISTRY_MAX_AGE_S, so open_app can focus a running instance
+instead of spawning a new one.
+"""
+import os
+import sys
+import threading
+import time
+from core.config import settings
+from core.logger import nervous_system
+from core.metrics import metrics
+
+GW_OWNER = 4
+SW_RESTORE = 9
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+VK_MENU = 0x12
+KEYEVENTF_KEYUP = 0x0002
+GA_ROOT = 2
+
+
+class WindowInfo:
+    __slots__ = ("handle", "title", "pid", "process", "class_name", "last_active")
+
+    def __init__(self, handle, title, pid, process, class_name=""):
+        self.handle = handle
+        self.title = title
+        self.pid = pid
+        self.process = process  # nombre base en minúsculas: "chrome"
+        self.class_name = class_name
+        self.last_active = 0.0
+
+    def __repr__(self):
+        return f"WindowInfo({self.handle}, {self.title!r}, {self.process})"
+
+
+class Win32Windows:
+    """EnumWindows/SetForegroundWindow through ctypes (no pywin32 needed)"""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self._process_names = {}  # pid -> nombre base (los pids vivos no cambian de ejecutable)
+
+    def enumerate(self):
+        """Visible, titled, unowned top-level windows"""
+        ctypes, wintypes, user32 = self.ctypes, self.wintypes, self.user32
+        found = []
+        buf = ctypes.create_unicode_buffer(512)
+        cls = ctypes.create_unicode_buffer(256)
+        pid = wintypes.DWORD()
+
+        def on_window(hwnd, _):
+            if not user32.IsWindowVisible(hwnd) or user32.GetWindow(hwnd, GW_OWNER):
+                return True
+            if not user32.GetWindowTextW(hwnd, buf, len(buf)):
+                return True
+            user32.GetClassNameW(hwnd, cls, len(cls))
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            found.append(WindowInfo(hwnd, buf.value, pid.value, self._process_name(pid.value), cls.value))
+            return True
+
+        callback = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)(on_window)
+        user32.EnumWindows(callback, 0)
+
+        alive = {w.pid for w in found}
+        for stale in [p for p in self._process_names if p not in alive]:
+            del self._process_names[stale]
+        return found
+
+    def foreground(self):
+        return self.user32.GetForegroundWindow() or None
+
+    def owned(self, owner):
+        """Visible top-level windows owned by `owner` (dialogs, popups), in z-order"""
+        ctypes, wintypes, user32 = self.ctypes, self.wintypes, self.user32
+        found = []
+
+        def on_window(hwnd, _):
+            if user32.IsWindowVisible(hwnd) and user32.GetWindow(hwnd, GW_OWNER) == owner:
+                found.append(hwnd)
+            return True
+
+        callback = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)(on_window)
+        user32.EnumWindows(callback, 0)
+        return found
+
+    def taskbar(self):
+        return self.user32.FindWindowW("Shell_TrayWnd", None) or None
+
+    def root_at(self, x, y):
+        """Handle of the top-level window under a screen point (popup, taskbar or app window)"""
+        hwnd = self.user32.WindowFromPoint(self.wintypes.POINT(x, y))
+        return (self.user32.GetAncestor(hwnd, GA_ROOT) or None) if hwnd else None
+
+    def root_rect_at(self, x, y):
+        """Rect of the top-level window under a screen point"""
+        wintypes, user32 = self.wintypes, self.user32
+        root = self.root_at(x, y)
+        rect = wintypes.RECT()
+        if not root or not user32.GetWindowRect(root, self.ctypes.byref(rect)):
+            return None
+        return (rect.left, rect.top, rect.right, rect.bottom)
+
+    def activate(self, handle):
+        user32 = self.user32
+        if user32.IsIconic(handle):
+            user32.ShowWindow(handle, SW_RESTORE)
+        # Windows solo cede el primer plano al proceso con la última entrada: un Alt sintético lo desbloquea
+        user32.keybd_event(VK_MENU, 0, 0, 0)
+        user32.keybd_event(VK_MENU, 0, KEYEVENTF_KEYUP, 0)
+        user32.SetForegroundWindow(handle)
+        return user32.GetForegroundWindow() == handle
+
+    def _process_name(self, pid):
+        name = self._process_names.get(pid)
+        if name is not None:
+            return name
+        ctypes, wintypes = self.ctypes, self.wintypes
+        name = ""
+        handle = self.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if handle:
+            try:
+                buf = ctypes.create_unicode_buffer(1024)
+                size = wintypes.DWORD(len(buf))
+                if self.kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                    name = os.path.splitext(os.path.basename(buf.value))[0].lower()
+            finally:
+                self.kernel32.CloseHandle(handle)
+        self._process_names[pid] = name
+        return name
+
+
+class WindowRegistry:
+    """
+    handle -> WindowInfo. The backend provides enumerate(), foreground(),
+    activate(handle), owned(handle) and taskbar(); None (non-Windows) makes
+    the registry always empty.
+    """
+
+    def __init__(self, backend=None, max_age_s=None):
+        self.backend = backend
+        self.max_age_s = settings.WINDOW_REGISTRY_MAX_AGE_S if max_age_s is None else max_age_s
+        self.windows = {}
+        self.refreshed = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        if self.backend is None:
+            return self.windows
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self.refreshed < self.max_age_s:
+                return self.windows
+            start = time.perf_counter()
+            try:
+                current = {w.handle: w for w in self.backend.enumerate()}
+            except Exception as e:
+                nervous_system.error("MOTOR", f"Error enumerando ventanas: {e}")
+                return self.windows
+            # Conservar el historial de activación de ventanas ya conocidas
+            for handle, window in current.items():
+                known = self.windows.get(handle)
+                if known is not None:
+                    window.last_active = known.last_active
+            foreground = current.get(self.backend.foreground())
+            if foreground is not None:
+                foreground.last_active = now
+            self.windows = current
+            self.refreshed = now
+            metrics.histogram("motor.windows.refresh_ms").record((time.perf_counter() - start) * 1000)
+            return self.windows
+
+    def find(self, process_names=(), display_name=None):
+        """
+        Best window for an app: its process name must match. Only when the
+        app's processes are unknown is the title matched, against the catalog's
+        display name ("Google Chrome"), never the spoken name. Ties go to the
+        most recently active window.
+        """
+        processes = {p.lower() for p in process_names if p}
+        title = (display_name or "").lower().strip()
+        if processes:
+            candidates = [w for w in self.refresh().values() if w.process in processes]
+        elif title:
+            candidates = [w for w in self.refresh().values() if title in w.title.lower()]
+        else:
+            return None
+        if not candidates:
+            return None
+        return max(candidates, key=lambda w: (w.last_active, w.handle))
+
+    def owned_popups(self, handle, limit=None):
+        """Handles of the popups owned by a window (not kept in the table: they come and go)"""
+        if self.backend is None or not handle:
+            return []
+        try:
+            popups = self.backend.owned(handle)
+        except Exception as e:
+            nervous_system.error("MOTOR", f"Error enumerando ventanas emergentes: {e}")
+            return []
+        return popups[:limit] if limit else popups
+
+    def taskbar(self):
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.taskbar()
+        except Exception:
+            return None
+
+    def root_at(self, point):
+        if self.backend is None or point is None:
+            return None
+        try:
+            return self.backend.root_at(*point)
+        except Exception:
+            return None
+
+    def root_rect_at(self, point):
+        if self.backend is None or point is None:
+            return None
+        try:
+            return self.backend.root_rect_at(*point)
+        except Exception:
+            return None
+
+    def activate(self, window):
+        start = time.perf_counter()
+        try:
+            ok = bool(self.backend.activate(window.handle))
+        except Exception as e:
+            nervous_system.error("MOTOR", f"No se pudo activar '{window.title}': {e}")
+            ok = False
+        metrics.histogram("motor.windows.activate_ms").record((time.perf_counter() - start) * 1000)
+        if ok:
+            window.last_active = time.monotonic()
+        return ok
+
+
+def _default_backend():
+    if sys.platform != "win32":
+        return None
+    try:
+        return Win32Windows()
+    except Exception as e:
+        nervous_system.error("MOTOR", f"Registro de ventanas no disponible: {e}")
+        return None
+
+
+# Instancia global
+window_registry = WindowRegistry(_default_backend())
@@ -9,6 +9,8 @@ from core.ear import Ear
 from core.brain import Brain
 from core.voice import Voice
 from core.action_engine import AutomationEngine
+from core.speculation import SpeculativePlanner
+from core.motor_executor import MotorExecutor, is_stop_intent
 from ui.overlay import ControlPanel
 from core.logger import nervous_system
 
@@ -16,6 +18,7 @@ from core.logger import nervous_system
 class AgentWorker(QObject):
     status_changed = Signal(str, str) # Mensaje, Estado
     text_recognized = Signal(str, str) # Mensaje, Tipo (user/agent)
+    progress_changed = Signal(int, int, str) # Paso, Total, Descripción
     
     def __init__(self):
         super().__init__()
@@ -24,6 +27,11 @@ class AgentWorker(QObject):
         self.voice = Voice()
         self.brain = Brain()
         self.hands = AutomationEngine()
+        # El Motor corre en su propio hilo: el oído sigue escuchando ("para", "cancela")
+        self.motor = MotorExecutor(self.hands, on_progress=self._on_motor_progress,
+                                   on_finished=self._on_motor_finished)
+        # Planificación especulativa sobre transcripciones parciales
+        self.speculator = SpeculativePlanner(self.brain) if settings.SPECULATION_ENABLED else None
         self.wake_word = settings.WAKE_WORD.lower()
         self.running = True
         self.paused = False
@@ -42,6 +50,27 @@ class AgentWorker(QObject):
         self.status_changed.emit(status, "idle")
         self.text_recognized.emit(f"Sistema {status.lower()}.", "agent")
 
+    def _to_command(self, text):
+        return text.lower().replace(self.wake_word, "").strip()
+
+    def _on_partial(self, text):
+        command = self._to_command(text)
+        if command:
+            self.speculator.on_partial(command)
+
+    def _on_motor_progress(self, job, step, total, description):
+        self.progress_changed.emit(step, total, description)
+
+    def _on_motor_finished(self, job):
+        self.progress_changed.emit(0, 0, "")
+        if job.status == "done":
+            self.status_changed.emit("Listo", "idle")
+        elif job.status == "cancelled":
+            self.status_changed.emit("Cancelado", "idle")
+        else:
+            nervous_system.error("SYSTEM", "Fallo durante la ejecución.")
+            self.status_changed.emit("Error", "idle")
+
     def run(self):
         nervous_system.system("Agente activo y listo.")
         self.status_changed.emit("Iniciado. Di 'Computadora'", "idle")
@@ -54,9 +83,11 @@ class AgentWorker(QObject):
 
             # Estado IDLE / ESCUCHANDO
             self.status_changed.emit("Escuchando...", "listening")
-            user_text = self.ear.listen()
+            user_text = self.ear.listen(on_partial=self._on_partial if self.speculator else None)
 
             if not user_text:
+                if self.speculator:
+                    self.speculator.reset()
                 self.status_changed.emit("...", "idle")
                 time.sleep(0.5)
                 continue
@@ -68,14 +99,29 @@ class AgentWorker(QObject):
             self.text_recognized.emit(user_text, "user")
             
             if self.wake_word in user_text or True: # Demo mode: siempre activo
-                command = user_text.replace(self.wake_word, "").strip()
-                if not command: continue
+                command = self._to_command(user_text)
+                if not command:
+                    if self.speculator:
+                        self.speculator.reset()
+                    continue
+
+                # PARADA: no pasa por el Cerebro
+                if is_stop_intent(command):
+                    if self.speculator:
+                        self.speculator.reset()
+                    if self.motor.cancel_current("voz"):
+                        self.status_changed.emit("Cancelando...", "idle")
+                        threading.Thread(target=self.voice.speak, args=("Cancelado.",), daemon=True).start()
+                    continue
 
                 # PENSANDO
                 self.status_changed.emit("Procesando...", "thinking")
                 
                 # Inteligencia
-                action_plan = self.brain.think(command)
+                if self.speculator:
+                    action_plan = self.speculator.resolve(command)
+                else:
+                    action_plan = self.brain.think(command)
                 self.text_recognized.emit(f"Plan: {action_plan}", "agent")
                 
                 # ACTUANDO
@@ -107,13 +153,8 @@ class AgentWorker(QObject):
                          speak_async("Hubo un error en mi proceso cognitivo.")
                          
                     else:
-                        # Acción física (Motor) - Estas sí bloquean por seguridad
-                        success = self.hands.execute_task(action_plan)
-                        if success:
-                            self.status_changed.emit("Listo", "idle")
-                        else:
-                            nervous_system.error("SYSTEM", "Fallo durante la ejecución.")
-                            self.status_changed.emit("Error", "idle")
+                        # Acción física (Motor) - En cola del hilo motor; el fin se notifica por callback
+                        self.motor.submit(action_plan, preempt=settings.MOTOR_PREEMPT_ON_COMMAND)
                 else:
                     speak_async("No entendí.")
                     self.status_changed.emit("No entendido", "idle")
@@ -159,6 +200,7 @@ def main():
     # Signals Worker -> UI
     worker.status_changed.connect(overlay.update_status)
     worker.text_recognized.connect(overlay.append_log)
+    worker.progress_changed.connect(overlay.update_progress)
     
     # Signals UI -> Worker
     overlay.microphone_changed.connect(worker.change_microphone)
@@ -0,0 +1,161 @@
+"""
+Brain Benchmark - Deterministic end-to-end latency of Brain.think
+Runs Brain against the offline fake LLM server (tests/fake_llm_server.py)
+through the local/hedge/race/fallback/prefix-cache paths and reports
+p50/p95/p99 per scenario. No Ollama daemon or cloud key needed.
+
+Usage:
+    python tests/benchmark_brain.py [--iterations 50] [--seed 7] [--only hedge_tail] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from tests.fake_llm_server import start_server
+
+COMMANDS = [
+    "abre chrome",
+    "abre el bloc de notas",
+    "escribe hola mundo",
+    "guarda el archivo",
+    "abre el bloc de notas y escribe hola mundo",
+    "hola, ¿qué tal?",
+]
+
+# nombre, política, perfil del servidor, opciones del escenario
+SCENARIOS = [
+    ("local_steady", "hedged",
+     {"ollama": {"latency": "lognormal:5.0:0.25"}, "openai": {"latency": "uniform:500:900"}}, {}),
+    ("hedge_tail", "hedged",
+     {"ollama": {"latency": "lognormal:5.3:0.9"}, "openai": {"latency": "uniform:300:600"}}, {}),
+    ("local_failure_fallback", "hedged",
+     {"ollama": {"latency": "fixed:150", "fail_rate": 0.3}, "openai": {"latency": "uniform:300:600"}}, {}),
+    ("invalid_json_repair", "hedged",
+     {"ollama": {"latency": "fixed:150", "invalid_json_rate": 0.2}, "openai": {"latency": "fixed:500"}}, {}),
+    ("race", "race",
+     {"ollama": {"latency": "lognormal:5.5:0.5"}, "openai": {"latency": "uniform:200:700"}}, {}),
+    ("local_only", "local_only",
+     {"ollama": {"latency": "lognormal:5.0:0.4"}, "openai": {"latency": "fixed:500"}}, {}),
+    ("prefix_cache_cold", "local_only",
+     {"ollama": {"latency": "fixed:100", "prompt_ms_per_token": 2.0}}, {"reset_cache": True}),
+    ("prefix_cache_warm", "local_only",
+     {"ollama": {"latency": "fixed:100", "prompt_ms_per_token": 2.0}}, {}),
+    ("dialogue_history", "local_only",
+     {"ollama": {"latency": "fixed:100", "prompt_ms_per_token": 2.0}}, {"same_session": True}),
+]
+
+DEFAULT_PROFILE = {"latency": "fixed:150", "fail_rate": 0.0, "invalid_json_rate": 0.0,
+                   "hang_rate": 0.0, "prompt_ms_per_token": 0.5}
+
+
+def control(base_url, payload):
+    request = urllib.request.Request(f"{base_url}/_control", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def run_scenario(brain, base_url, name, policy, profile, options, iterations):
+    from core.metrics import metrics, LatencyHistogram
+    from core.tech_manager import tech_manager
+
+    # Estado limpio: sin histórico de latencias (retardo de hedge) ni contadores previos
+    metrics.histograms.clear()
+    metrics.counters.clear()
+    control(base_url, {
+        "ollama": {**DEFAULT_PROFILE, **profile.get("ollama", {})},
+        "openai": {**DEFAULT_PROFILE, "latency": "fixed:600", **profile.get("openai", {})},
+        "reset_stats": True,
+    })
+    # Solo en memoria: no se toca configs/tech_stack.json
+    tech_manager.get_active_stack()["llm_policy"] = policy
+
+    e2e = LatencyHistogram(window=max(iterations, 1))
+    errors = 0
+    for i in range(iterations):
+        if options.get("reset_cache"):
+            control(base_url, {"reset_cache": True})
+        session_id = "bench" if options.get("same_session") else f"{name}-{i}"
+        command = COMMANDS[i % len(COMMANDS)]
+
+        start = time.perf_counter()
+        plan = brain.think(command, session_id=session_id)
+        e2e.record((time.perf_counter() - start) * 1000)
+        if not plan or plan.get("action") == "error":
+            errors += 1
+        if not options.get("same_session"):
+            brain.reset_session(session_id)
+    brain.reset_session("bench")
+
+    counters = metrics.snapshot()["counters"]
+    return {
+        "scenario": name,
+        "policy": policy,
+        "e2e_ms": e2e.snapshot(),
+        "errors": errors,
+        "winners": {k.split(".")[-1]: v for k, v in counters.items() if k.startswith("brain.winner.")},
+        "fallbacks": {k.split(".")[-1]: v for k, v in counters.items() if k.startswith("brain.fallback.")},
+        "prefix_cache": {k.split(".")[-1]: v for k, v in counters.items() if ".prefix_cache." in k},
+    }
+
+
+def print_report(results):
+    print("\n" + "=" * 96)
+    print(f"{'ESCENARIO':<24}{'POLÍTICA':<12}{'N':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'ERR':>6}  GANADOR / FALLBACK")
+    print("-" * 96)
+    for r in results:
+        h = r["e2e_ms"]
+        winners = ",".join(f"{k}={v}" for k, v in r["winners"].items()) or "-"
+        fallbacks = ",".join(f"{k}={v}" for k, v in r["fallbacks"].items())
+        print(f"{r['scenario']:<24}{r['policy']:<12}{h.get('count', 0):>5}"
+              f"{h.get('p50', 0):>9}{h.get('p95', 0):>9}{h.get('p99', 0):>9}{r['errors']:>6}  "
+              f"{winners}{' / ' + fallbacks if fallbacks else ''}")
+    print("=" * 96)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brain.think latency benchmark (offline)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", help="Run a single scenario by name")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    server, _, base_url = start_server()
+
+    # Configurar ANTES de importar core (settings se lee al importar)
+    os.environ["OLLAMA_HOST"] = base_url
+    os.environ["SAMBANOVA_URL"] = f"{base_url}/v1"
+    os.environ["SAMBANOVA_API_KEY"] = "benchmark"
+    os.environ.setdefault("OLLAMA_KEEPALIVE_INTERVAL", "3600")
+
+    from core.brain import Brain
+    print("========================================")
+    print("        HABLAME BRAIN BENCHMARK         ")
+    print(f"   fake LLM server: {base_url}")
+    print("========================================")
+    brain = Brain()
+
+    results = []
+    for name, policy, profile, options in SCENARIOS:
+        if args.only and name != args.only:
+            continue
+        print(f"\n[SCENARIO] {name} ({policy}, {args.iterations} iteraciones)...")
+        results.append(run_scenario(brain, base_url, name, policy, profile, options, args.iterations))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.json}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
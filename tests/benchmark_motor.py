@@ -0,0 +1,119 @@
+"""
+Motor Benchmark - AutomationEngine hot paths on the simulated desktop
+Runs real AutomationEngine code (plan compiler, waits, click search, typing
+dispatch, trace recorder) against core/engines/motor/simulated.py, so it
+needs no display or Windows. Reports p50/p95 per scenario; latencies of the
+simulated desktop can be scaled to model slower machines.
+
+Usage:
+    python tests/benchmark_motor.py [--iterations 20] [--latency-scale 1.0] [--only click_10k]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.action_engine import AutomationEngine
+from core.click_memory import ClickMemory
+from core.engines.motor.simulated import SimulatedDesktop, SimControl, DEFAULT_LATENCY
+from core.metrics import LatencyHistogram, metrics
+from core.motor_trace import motor_trace
+
+
+def notepad_chain(text):
+    return {"action": "chain", "parameters": {"steps": [
+        {"action": "open_app", "parameters": {"app_name": "bloc de notas"}},
+        {"action": "type", "parameters": {"text": text}},
+        {"action": "save", "parameters": {}},
+    ]}}
+
+
+def setup_tree(size):
+    def setup(desk):
+        handle = desk.add_window(f"Árbol {size}", "tree.exe", ["Insertar tabla", "Formato de celdas"])
+        desk.populate(handle, size, seed=size)
+    return setup
+
+
+def setup_popup(desk):
+    """Target in a dialog owned by a large foreground window"""
+    owner = desk.add_window("Árbol 10000", "tree.exe")
+    desk.populate(owner, 10000, seed=1)
+    desk.add_window("Buscar y reemplazar", "tree.exe", ["Reemplazar todo", "Cancelar"], focus=False, owner=owner)
+
+
+# nombre, preparación del escritorio, plan
+SCENARIOS = [
+    ("open_app_cold", None, {"action": "open_app", "parameters": {"app_name": "notepad"}}),
+    ("open_app_focus", lambda d: d.add_window("Sin título: Bloc de notas", "notepad.exe", focus=False),
+     {"action": "open_app", "parameters": {"app_name": "notepad"}}),
+    ("type_short", lambda d: d.add_window("Doc", "notepad.exe"),
+     {"action": "type", "parameters": {"text": "hola mundo, ¿qué tal?"}}),
+    ("type_10k", lambda d: d.add_window("Doc", "notepad.exe"),
+     {"action": "type", "parameters": {"text": "lorem ipsum " * 850}}),
+    ("click_100", setup_tree(100), {"action": "click", "parameters": {"element": "Insertar tabla"}}),
+    ("click_10k", setup_tree(10000), {"action": "click", "parameters": {"element": "Insertar tabla"}}),
+    ("click_fuzzy_10k", setup_tree(10000), {"action": "click", "parameters": {"element": "formato celdas"}}),
+    # Misma etiqueta en la misma app: desde la 2ª iteración la resuelve la memoria de clics
+    ("click_10k_remembered", setup_tree(10000), {"action": "click", "parameters": {"element": "formato celdas"}}),
+    ("click_popup", setup_popup, {"action": "click", "parameters": {"element": "Reemplazar todo"}}),
+    ("click_taskbar", setup_tree(10000), {"action": "click", "parameters": {"element": "Vista de tareas"}}),
+    # Clic que no cambia nada en pantalla: vence el plazo de verificación y queda como no verificado
+    ("click_no_change", lambda d: d.add_window("Inerte", "app.exe", [SimControl("Aceptar", inert=True)]),
+     {"action": "click", "parameters": {"element": "Aceptar"}}),
+    ("chain_notepad", None, notepad_chain("hola desde el benchmark")),
+]
+
+
+def run(scenario, iterations, latency_scale):
+    name, setup, plan = scenario
+    hist = LatencyHistogram(window=iterations)
+    ok = 0
+    shared_memory = ClickMemory(cache_file=None) if name.endswith("_remembered") else None
+    for _ in range(iterations):
+        desk = SimulatedDesktop(latency={k: v * latency_scale for k, v in DEFAULT_LATENCY.items()})
+        if setup:
+            setup(desk)
+        engine = AutomationEngine(desk)
+        engine.click_memory = shared_memory or ClickMemory(cache_file=None)
+        start = time.perf_counter()
+        ok += bool(engine.execute_task(plan))
+        hist.record((time.perf_counter() - start) * 1000)
+    if shared_memory:
+        stats = shared_memory.stats()
+        print(f"  memoria de clics: acierto {stats['hit_rate']:.0%}, ahorro {stats['saved_ms']:.0f}ms")
+    return hist.snapshot(), ok / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutomationEngine benchmark on the simulated desktop")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--only", help="Run a single scenario")
+    args = parser.parse_args()
+
+    motor_trace.path = ""  # Sin fichero de trazas durante el benchmark
+    print("========================================")
+    print("        HABLAME MOTOR BENCHMARK         ")
+    print("========================================")
+    print(f"{'ESCENARIO':<22}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'OK':>6}")
+    for scenario in SCENARIOS:
+        if args.only and scenario[0] != args.only:
+            continue
+        snap, ok = run(scenario, args.iterations, args.latency_scale)
+        print(f"{scenario[0]:<22}{snap['p50']:>9.1f}{snap['p95']:>9.1f}{snap['max']:>9.1f}{ok:>6.0%}")
+    for label in ("foreground", "popup", "taskbar"):
+        root = metrics.histogram(f"motor.find.root.{label}_ms").snapshot()
+        resolve = metrics.histogram(f"motor.find.resolve.{label}_ms").snapshot()
+        if root.get("count"):
+            print(f"Búsqueda en {label:<10}: raíz p50 {root['p50']:.1f}ms | resuelto ahí {resolve.get('count', 0)} "
+                  f"veces, p50 {resolve.get('p50', 0):.1f}ms")
+    frame = metrics.histogram("motor.verify.frame_ms").snapshot()
+    if frame.get("count"):
+        print(f"Verificación visual por captura: p50 {frame['p50']:.2f}ms p95 {frame['p95']:.2f}ms | "
+              f"clics sin verificar: {metrics.counters.get('motor.click.unverified', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Name Index Benchmark - Trigram index vs per-element SequenceMatcher
+Synthetic control trees from 100 to 50,000 names (es/en labels, accents,
+duplicates). Reports build time, query p50/p95 (index in µs, difflib in ms)
+and agreement with the classic difflib scan. Pure stdlib, runs anywhere.
+
+Usage:
+    python tests/benchmark_name_index.py [--sizes 100,1000,5000,10000,50000] [--queries 200]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.name_index import NameIndex, fold
+from core.metrics import LatencyHistogram
+
+WORDS = ["guardar", "archivo", "edición", "ver", "insertar", "formato", "herramientas", "ayuda",
+         "nuevo", "abrir", "cerrar", "imprimir", "copiar", "pegar", "cortar", "buscar", "reemplazar",
+         "save", "file", "edit", "view", "insert", "format", "tools", "help", "new", "open",
+         "close", "print", "copy", "paste", "cut", "find", "replace", "pestaña", "configuración",
+         "opciones", "diseño", "revisar", "correspondencia", "referencias", "página", "fuente",
+         "párrafo", "estilos", "tabla", "imagen", "gráfico", "vínculo", "comentario", "zoom"]
+CONTROL_TYPES = [50000, 50011, 50005, 50019, 50007, 50002, 50020]
+
+
+def make_tree(size, rng):
+    names, types, visible = [], [], []
+    for _ in range(size):
+        label = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            label = label.capitalize()
+        if rng.random() < 0.05:
+            label += "..."
+        names.append(label)
+        types.append(rng.choice(CONTROL_TYPES))
+        visible.append(rng.random() > 0.1)
+    return names, types, visible
+
+
+def make_queries(names, count, rng):
+    """Exact names, prefixes, accent-stripped and one-typo variants"""
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.25:
+            queries.append(name)
+        elif kind < 0.5:
+            queries.append(name.split()[0])
+        elif kind < 0.75:
+            queries.append(fold(name))
+        else:
+            pos = rng.randrange(len(name))
+            queries.append(name[:pos] + name[pos + 1:])
+    return queries
+
+
+def difflib_best(names, target):
+    """The classic _fuzzy_find_recursive scoring, for comparison"""
+    target_lower = target.lower()
+    best, best_ratio = None, 0.0
+    for i, name in enumerate(names):
+        name_lower = name.lower()
+        if target_lower == name_lower:
+            return i
+        if target_lower in name_lower:
+            ratio = 0.9 if len(name_lower) < len(target_lower) * 2 else 0.7
+        else:
+            ratio = difflib.SequenceMatcher(None, target_lower, name_lower).ratio()
+            if ratio <= 0.6:
+                continue
+        if ratio > best_ratio:
+            best, best_ratio = i, ratio
+    return best
+
+
+def run(size, query_count, difflib_limit, rng):
+    names, types, visible = make_tree(size, rng)
+    queries = make_queries(names, query_count, rng)
+
+    start = time.perf_counter()
+    index = NameIndex(names, types, visible)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    indexed = LatencyHistogram(window=query_count)
+    agree = found = 0
+    for query in queries:
+        start = time.perf_counter()
+        best, _ = index.best(query)
+        indexed.record((time.perf_counter() - start) * 1e6)
+        if best is not None:
+            found += 1
+            # Mismo texto normalizado que el mejor de difflib = acuerdo
+            if size <= difflib_limit:
+                ref = difflib_best(names, query)
+                agree += ref is not None and fold(names[ref]) == fold(names[best])
+
+    scan = LatencyHistogram(window=query_count)
+    if size <= difflib_limit:
+        for query in queries[:min(query_count, 50)]:
+            start = time.perf_counter()
+            difflib_best(names, query)
+            scan.record((time.perf_counter() - start) * 1000)
+
+    return {
+        "size": size,
+        "build_ms": build_ms,
+        "index": indexed.snapshot(),
+        "difflib": scan.snapshot(),
+        "found": found / len(queries),
+        "agreement": (agree / found) if size <= difflib_limit and found else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigram name index benchmark")
+    parser.add_argument("--sizes", default="100,1000,5000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--difflib-limit", type=int, default=10000,
+                        help="Skip the (slow) difflib baseline above this size")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("========================================")
+    print("      HABLAME NAME INDEX BENCHMARK      ")
+    print("========================================")
+    print(f"{'CONTROLES':>10}{'BUILD ms':>10}{'IDX p50µs':>11}{'IDX p95µs':>11}"
+          f"{'DIFF p50':>10}{'DIFF p95':>10}{'FOUND':>8}{'ACUERDO':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = run(size, args.queries, args.difflib_limit, rng)
+        diff = r["difflib"]
+        agreement = f"{r['agreement']:.0%}" if r["agreement"] is not None else "-"
+        print(f"{size:>10}{r['build_ms']:>10.1f}{r['index']['p50']:>11.1f}{r['index']['p95']:>11.1f}"
+              f"{diff.get('p50', float('nan')):>10.2f}{diff.get('p95', float('nan')):>10.2f}"
+              f"{r['found']:>8.0%}{agreement:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Fake LLM Server - Offline stand-in for Ollama and SambaNova/OpenAI
+Speaks Ollama /api/chat (+ /api/tags, /api/ps, /api/generate) and OpenAI
+/v1/chat/completions, returning scripted plans with configurable latency
+distributions, streaming chunking, prefix-cache simulation and failure injection.
+
+Usage:
+    python tests/fake_llm_server.py --port 11500 --ollama-latency lognormal:5.3:0.4 \
+        --openai-latency uniform:300:900 --ollama-fail-rate 0.05
+
+    Then point the agent at it:
+        OLLAMA_HOST=http://127.0.0.1:11500
+        SAMBANOVA_URL=http://127.0.0.1:11500/v1  SAMBANOVA_API_KEY=fake
+
+Runtime control (used by benchmark_brain.py):
+    POST /_control  {"ollama": {...}, "openai": {...}, "script": {...}}
+    GET  /_stats
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Respuestas por defecto: subcadena del último mensaje de usuario -> plan
+DEFAULT_SCRIPT = {
+    "chrome": {"thought": "abrir navegador", "action": "open_app", "parameters": {"app_name": "chrome"}},
+    "notepad": {"thought": "abrir bloc", "action": "open_app", "parameters": {"app_name": "notepad"}},
+    "bloc": {"thought": "abrir bloc", "action": "open_app", "parameters": {"app_name": "notepad"}},
+    "escribe": {"thought": "escribir", "action": "type", "parameters": {"text": "hola mundo"}},
+    "guarda": {"thought": "guardar", "action": "press_key", "parameters": {"key": "ctrl+s"}},
+    "hola": {"thought": "saludo", "action": "chat", "parameters": {"text": "¡Hola! ¿En qué te ayudo?"}},
+}
+FALLBACK_PLAN = {"thought": "no reconocido", "action": "clarify", "parameters": {"question": "¿Puedes repetir?"}}
+
+
+def parse_latency(spec):
+    """
+    Latency distribution spec (milliseconds):
+        fixed:200 | uniform:100:400 | normal:300:50 | lognormal:mu:sigma (of ln ms)
+    """
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: args[0]
+    if kind == "uniform":
+        return lambda: random.uniform(args[0], args[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(args[0], args[1]))
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(args[0], args[1])
+    raise ValueError(f"Distribución desconocida: {spec}")
+
+
+class BackendProfile:
+    """Latency and failure behaviour of one protocol"""
+
+    def __init__(self, latency="fixed:150", fail_rate=0.0, invalid_json_rate=0.0,
+                 hang_rate=0.0, hang_s=30.0, chunk_chars=8, prompt_ms_per_token=0.5):
+        self.configure(latency=latency, fail_rate=fail_rate, invalid_json_rate=invalid_json_rate,
+                       hang_rate=hang_rate, hang_s=hang_s, chunk_chars=chunk_chars,
+                       prompt_ms_per_token=prompt_ms_per_token)
+
+    def configure(self, **options):
+        for key, value in options.items():
+            if key == "latency":
+                self.latency_spec = value
+                self.sample_latency = parse_latency(value)
+            else:
+                setattr(self, key, value)
+
+    def describe(self):
+        return {k: v for k, v in vars(self).items() if k != "sample_latency"}
+
+
+class FakeLLMState:
+    """Shared server state: profiles, script, simulated prefix cache and counters"""
+
+    def __init__(self, models=("llama3.2:1b", "llama3.1:8b")):
+        self.models = list(models)
+        self.ollama = BackendProfile()
+        self.openai = BackendProfile(latency="fixed:600")
+        self.script = dict(DEFAULT_SCRIPT)
+        self.cached_prefixes = set()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def reply_for(self, messages):
+        user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        lowered = user.lower()
+        for pattern, plan in self.script.items():
+            if pattern in lowered:
+                return json.dumps(plan, ensure_ascii=False)
+        return json.dumps(FALLBACK_PLAN, ensure_ascii=False)
+
+    def prefix_hit(self, messages):
+        """Simulated llama.cpp prompt cache keyed by the system prompt"""
+        system = messages[0].get("content", "") if messages and messages[0].get("role") == "system" else ""
+        with self._lock:
+            hit = system in self.cached_prefixes
+            self.cached_prefixes.add(system)
+        return hit, max(1, len(system) // 4)
+
+
+def tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    state: FakeLLMState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Silencioso: el benchmark imprime su propio informe
+
+    # --- HTTP ---
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json(200, {"models": [{"name": m, "model": m} for m in self.state.models]})
+        elif self.path == "/api/ps":
+            self._json(200, {"models": [{"name": m, "model": m} for m in self.state.models]})
+        elif self.path == "/_stats":
+            self._json(200, {"requests": self.state.stats,
+                             "ollama": self.state.ollama.describe(),
+                             "openai": self.state.openai.describe()})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._read_json()
+        if self.path == "/api/chat":
+            self._ollama_chat(body)
+        elif self.path == "/api/generate":
+            self.state.count("ollama.generate")
+            self._json(200, {"model": body.get("model"), "response": "", "done": True})
+        elif self.path in ("/v1/chat/completions", "/chat/completions"):
+            self._openai_chat(body)
+        elif self.path == "/_control":
+            self._control(body)
+        else:
+            self._json(404, {"error": "not found"})
+
+    # --- PROTOCOLOS ---
+
+    def _ollama_chat(self, body):
+        profile = self.state.ollama
+        self.state.count("ollama.chat")
+        if self._inject_failure(profile, "ollama"):
+            return
+
+        messages = body.get("messages", [])
+        content = self._content(profile, messages)
+        hit, system_tokens = self.state.prefix_hit(messages)
+        prompt_tokens = sum(tokens(m.get("content", "")) for m in messages)
+        evaluated = prompt_tokens - system_tokens if hit else prompt_tokens
+        prompt_ms = evaluated * profile.prompt_ms_per_token
+        total_ms = profile.sample_latency() + prompt_ms
+        stats = {
+            "total_duration": int(total_ms * 1e6),
+            "load_duration": int(1e6),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(prompt_ms * 1e6),
+            "eval_count": tokens(content),
+            "eval_duration": int((total_ms - prompt_ms) * 1e6),
+        }
+        base = {"model": body.get("model"), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+        if body.get("stream"):
+            chunks = self._chunks(content, profile.chunk_chars)
+            self._start_stream("application/x-ndjson")
+            for chunk, delay in zip(chunks, self._spread(total_ms, len(chunks))):
+                time.sleep(delay)
+                self._write_chunk(json.dumps({**base, "message": {"role": "assistant", "content": chunk},
+                                              "done": False}) + "\n")
+            self._write_chunk(json.dumps({**base, "message": {"role": "assistant", "content": ""},
+                                          "done": True, "done_reason": "stop", **stats}) + "\n")
+            self._end_stream()
+            return
+
+        time.sleep(total_ms / 1000)
+        self._json(200, {**base, "message": {"role": "assistant", "content": content},
+                         "done": True, "done_reason": "stop", **stats})
+
+    def _openai_chat(self, body):
+        profile = self.state.openai
+        self.state.count("openai.chat")
+        if self._inject_failure(profile, "openai"):
+            return
+
+        messages = body.get("messages", [])
+        content = self._content(profile, messages)
+        total_ms = profile.sample_latency()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {"prompt_tokens": sum(tokens(m.get("content", "")) for m in messages),
+                 "completion_tokens": tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            chunks = self._chunks(content, profile.chunk_chars)
+            self._start_stream("text/event-stream")
+            for chunk, delay in zip(chunks, self._spread(total_ms, len(chunks))):
+                time.sleep(delay)
+                event = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": body.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": body.get("model"), "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self._write_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+            self._end_stream()
+            return
+
+        time.sleep(total_ms / 1000)
+        self._json(200, {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _control(self, body):
+        for name in ("ollama", "openai"):
+            if name in body:
+                getattr(self.state, name).configure(**body[name])
+        if "script" in body:
+            self.state.script = {**DEFAULT_SCRIPT, **body["script"]}
+        if "models" in body:
+            self.state.models = list(body["models"])
+        if body.get("reset_cache"):
+            self.state.cached_prefixes.clear()
+        if body.get("reset_stats"):
+            self.state.stats.clear()
+        self._json(200, {"ok": True})
+
+    # --- INYECCIÓN DE FALLOS ---
+
+    def _inject_failure(self, profile, name):
+        roll = random.random()
+        if roll < profile.fail_rate:
+            self.state.count(f"{name}.injected_error")
+            self._json(500, {"error": "injected failure"})
+            return True
+        if roll < profile.fail_rate + profile.hang_rate:
+            self.state.count(f"{name}.injected_hang")
+            time.sleep(profile.hang_s)
+            self._json(504, {"error": "injected hang"})
+            return True
+        return False
+
+    def _content(self, profile, messages):
+        if random.random() < profile.invalid_json_rate:
+            self.state.count("invalid_json")
+            return '{"action": "open_app", "parameters": {"app_name": '
+        return self.state.reply_for(messages)
+
+    # --- UTILIDADES ---
+
+    @staticmethod
+    def _chunks(content, size):
+        size = max(1, int(size))
+        return [content[i:i + size] for i in range(0, len(content), size)] or [""]
+
+    @staticmethod
+    def _spread(total_ms, n):
+        """First chunk carries half the latency (time to first token), the rest is even"""
+        if n <= 1:
+            return [total_ms / 1000]
+        first = total_ms / 2
+        rest = (total_ms - first) / (n - 1)
+        return [first / 1000] + [rest / 1000] * (n - 1)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            return {}
+
+    def _json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def start_server(port=0, state=None):
+    """Start in a daemon thread. Returns (server, state, base_url)"""
+    state = state or FakeLLMState()
+    handler = type("BoundFakeLLMHandler", (FakeLLMHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Ollama/OpenAI stand-in")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ollama-latency", default="fixed:150")
+    parser.add_argument("--openai-latency", default="fixed:600")
+    parser.add_argument("--ollama-fail-rate", type=float, default=0.0)
+    parser.add_argument("--openai-fail-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-json-rate", type=float, default=0.0)
+    parser.add_argument("--script", help="JSON file {substring: plan} with recorded replies")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    state = FakeLLMState()
+    state.ollama.configure(latency=args.ollama_latency, fail_rate=args.ollama_fail_rate,
+                           invalid_json_rate=args.invalid_json_rate)
+    state.openai.configure(latency=args.openai_latency, fail_rate=args.openai_fail_rate,
+                           invalid_json_rate=args.invalid_json_rate)
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            state.script.update(json.load(f))
+
+    server, _, url = start_server(args.port, state)
+    print(f"Fake LLM server en {url}  (Ollama: {url}  |  OpenAI: {url}/v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
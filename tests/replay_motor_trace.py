@@ -0,0 +1,261 @@
+"""
+Motor Trace Replay - Budgets, comparisons and mock replay of recorded chains
+Reads the JSON-lines file written by core/motor_trace.py and reports, per
+action, p50/p95 duration, share of time spent waiting vs working, UIA
+queries per step and how often the compiler's STEP_COST_MS budget is
+exceeded. --compare diffs two trace files (before/after a motor change);
+--replay re-executes every recorded plan through the real AutomationEngine
+on the simulated desktop, with the desktop's latencies taken from the trace,
+so changes to the click, wait or typing code show up in the replay time.
+
+Usage:
+    python tests/replay_motor_trace.py [motor_traces.jsonl] [--compare base.jsonl]
+    python tests/replay_motor_trace.py traces.jsonl --replay --latency-scale 0.5
+    python tests/replay_motor_trace.py --demo 40 --replay   # synthetic traces, runs anywhere
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.action_engine import AutomationEngine
+from core.click_memory import ClickMemory
+from core.config import settings
+from core.engines.motor.simulated import SimulatedDesktop, ALIASES, DEFAULT_APPS, DEFAULT_LATENCY
+from core.metrics import LatencyHistogram
+from core.motor_trace import TraceRecorder, load_traces, motor_trace
+from core.plan_compiler import STEP_COST_MS, DEFAULT_COST_MS
+
+# Columnas de cada paso en la traza
+ACTION, START, DUR, SLEEP, COUNTS, OK, DEPTH, PARAMS = range(8)
+
+
+def percentile(values, p):
+    hist = LatencyHistogram(window=max(1, len(values)))
+    for v in values:
+        hist.record(v)
+    return hist.snapshot().get(f"p{p}", 0.0)
+
+
+def action_stats(traces):
+    by_action = defaultdict(list)
+    for trace in traces:
+        for step in trace["steps"]:
+            by_action[step[ACTION]].append(step)
+    stats = {}
+    for action, steps in by_action.items():
+        durations = [s[DUR] for s in steps]
+        total = sum(durations) or 1e-9
+        budget = STEP_COST_MS.get(action, DEFAULT_COST_MS)
+        stats[action] = {
+            "n": len(steps),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "sleep_share": sum(s[SLEEP] for s in steps) / total,
+            "uia": sum(s[COUNTS].get("uia", 0) for s in steps) / len(steps),
+            "fail": sum(1 for s in steps if not s[OK]) / len(steps),
+            "budget": budget,
+            "over": sum(1 for d in durations if d > budget) / len(steps),
+        }
+    return stats
+
+
+def report(traces, title):
+    totals = [t["ms"] for t in traces]
+    work = sum(s[DUR] - s[SLEEP] for t in traces for s in t["steps"])
+    sleep = sum(s[SLEEP] for t in traces for s in t["steps"])
+    print("========================================")
+    print(f"  {title}")
+    print("========================================")
+    print(f"Trazas: {len(traces)} | OK: {sum(t['ok'] for t in traces) / max(1, len(traces)):.0%} | "
+          f"total p50 {percentile(totals, 50):.0f}ms p95 {percentile(totals, 95):.0f}ms | "
+          f"espera {sleep / max(1e-9, work + sleep):.0%} del tiempo de pasos")
+    print(f"{'ACCIÓN':<14}{'N':>6}{'p50 ms':>9}{'p95 ms':>9}{'ESPERA':>8}{'UIA/p':>7}{'FALLO':>7}"
+          f"{'BUDGET':>8}{'>BUDGET':>9}")
+    stats = action_stats(traces)
+    for action, s in sorted(stats.items(), key=lambda kv: -kv[1]["p50"] * kv[1]["n"]):
+        print(f"{action:<14}{s['n']:>6}{s['p50']:>9.1f}{s['p95']:>9.1f}{s['sleep_share']:>8.0%}{s['uia']:>7.1f}"
+              f"{s['fail']:>7.0%}{s['budget']:>8}{s['over']:>9.0%}")
+
+    print("\nCadenas más lentas:")
+    for trace in sorted(traces, key=lambda t: -t["ms"])[:3]:
+        steps = ", ".join(f"{s[ACTION]} {s[DUR]:.0f}ms" for s in trace["steps"])
+        print(f"  {trace['ms']:>8.0f}ms  {trace['action']}: {steps}")
+    return stats
+
+
+def compare(base, current):
+    base_stats, cur_stats = action_stats(base), action_stats(current)
+    print("\nComparación (p50 actual vs base):")
+    print(f"{'ACCIÓN':<14}{'BASE':>9}{'ACTUAL':>9}{'DELTA':>9}")
+    for action in sorted(set(base_stats) | set(cur_stats)):
+        b = base_stats.get(action, {}).get("p50")
+        c = cur_stats.get(action, {}).get("p50")
+        delta = f"{(c - b) / b:+.0%}" if b and c is not None else "-"
+        print(f"{action:<14}{b if b is not None else '-':>9}{c if c is not None else '-':>9}{delta:>9}")
+    b, c = percentile([t["ms"] for t in base], 50), percentile([t["ms"] for t in current], 50)
+    print(f"{'TOTAL':<14}{b:>9.0f}{c:>9.0f}{(c - b) / b if b else 0:>+9.0%}")
+
+
+def work_ms(steps, action):
+    """Recorded work (duration minus waits) of every step of one action"""
+    return [max(0.0, s[DUR] - s[SLEEP]) for s in steps if s[ACTION] == action]
+
+
+def trace_latency(traces, scale=1.0):
+    """
+    Simulated-desktop latencies (ms) from the recorded steps: p50 work of
+    clicks and key presses, per-character typing cost and the
+    launch-to-window time of open_app + wait_window (an upper bound: it
+    includes the recorded polling slack). Missing actions keep the
+    simulator's defaults.
+    """
+    steps = [s for t in traces for s in t["steps"]]
+    latency = dict(DEFAULT_LATENCY)
+    clicks = work_ms(steps, "click")
+    if clicks:
+        # Búsqueda + clic; el ratón animado se graba como espera y aquí no existe
+        latency["find_control"] = max(0.0, percentile(clicks, 50) - latency["click"])
+    keys = work_ms(steps, "press_key") + work_ms(steps, "save")
+    if keys:
+        latency["hotkey"] = percentile(keys, 50)
+    per_char = [max(0.0, s[DUR] - s[SLEEP]) / len(s[PARAMS]["text"]) for s in steps
+                if s[ACTION] == "type" and isinstance(s[PARAMS], dict) and s[PARAMS].get("text")]
+    if per_char:
+        latency["type_per_char"] = percentile(per_char, 50)
+    launches = [sum(s[DUR] for s in t["steps"] if s[ACTION] in ("open_app", "wait_window"))
+                for t in traces if any(s[ACTION] == "wait_window" for s in t["steps"])]
+    if launches:
+        latency["launch_window"] = percentile(launches, 50)
+        latency["launch_process"] = min(latency["launch_process"], latency["launch_window"] / 2)
+    return {k: v * scale for k, v in latency.items()}
+
+
+def plan_of(trace):
+    """The recorded top-level plan, or None for traces written before plans were stored whole"""
+    if not isinstance(trace.get("params"), dict):
+        return None
+    return {"action": trace["action"], "parameters": trace["params"]}
+
+
+def flat_steps(plan):
+    if plan["action"] == "chain":
+        return [s for s in plan["parameters"].get("steps", []) if isinstance(s, dict)]
+    return [plan]
+
+
+def desktop_for(plan, latency, workdir):
+    """
+    Simulated desktop where the plan can run: every app it opens is known, and
+    each window has the controls the plan clicks while that window is in front.
+    create_file paths are redirected into workdir.
+    """
+    apps = {name: (process, title, list(controls)) for name, (process, title, controls) in DEFAULT_APPS.items()}
+    current, first = None, []
+    for step in flat_steps(plan):
+        params = step.get("parameters") or {}
+        if step.get("action") == "open_app":
+            current = params.get("app_name", "").lower().strip()
+            current = ALIASES.get(current, current)
+            apps.setdefault(current, (f"{current}.exe", current.capitalize(), []))
+        elif step.get("action") == "click":
+            (apps[current][2] if current else first).append(params.get("element", ""))
+        elif step.get("action") == "create_file" and params.get("path"):
+            params["path"] = os.path.join(workdir, os.path.basename(params["path"]))
+    desk = SimulatedDesktop(latency=latency, apps=apps)
+    desk.add_window("Replay", "replay.exe", first)
+    return desk
+
+
+def replay(traces, latency_scale):
+    latency = trace_latency(traces, latency_scale)
+    workdir = tempfile.mkdtemp()
+    motor_trace.path = ""  # El replay no añade trazas al fichero
+    recorded, replayed, ok, skipped = [], [], 0, 0
+    for trace in traces:
+        plan = plan_of(trace)
+        if plan is None:
+            skipped += 1
+            continue
+        engine = AutomationEngine(desktop_for(plan, latency, workdir))
+        engine.click_memory = ClickMemory(cache_file=None)
+        start = time.perf_counter()
+        ok += bool(engine.execute_task(plan))
+        replayed.append((time.perf_counter() - start) * 1000)
+        recorded.append(trace["ms"])
+    if not replayed:
+        print(f"\nReplay: ninguna traza tiene el plan completo ({skipped} omitidas)")
+        return
+    print(f"\nReplay sobre AutomationEngine + escritorio simulado (latencias de la traza x{latency_scale}):")
+    print("  " + ", ".join(f"{k} {latency[k]:.2f}ms" for k in ("find_control", "click", "hotkey",
+                                                                  "type_per_char", "launch_window")))
+    print(f"  registrado p50 {percentile(recorded, 50):.0f}ms p95 {percentile(recorded, 95):.0f}ms | "
+          f"replay p50 {percentile(replayed, 50):.0f}ms p95 {percentile(replayed, 95):.0f}ms | "
+          f"OK {ok / len(replayed):.0%}" + (f" | {skipped} sin plan completo omitidas" if skipped else ""))
+
+
+def make_demo(path, count, seed):
+    """Synthetic chains recorded through the real TraceRecorder"""
+    rng = random.Random(seed)
+    recorder = TraceRecorder(path=path, enabled=True)
+    costs = {"open_app": (40, 300), "wait_window": (5, 600), "type": (15, 150), "press_key": (5, 20),
+             "click": (60, 300), "save": (10, 200), "create_file": (3, 0)}
+    params = {"open_app": {"app_name": "notepad"}, "wait_window": {"title": "notepad"},
+              "type": {"text": "hola desde la traza"}, "press_key": {"key": "enter"},
+              "click": {"element": "Archivo"}, "save": {}, "create_file": {"path": "demo.txt", "content": "demo"}}
+
+    def step(action):
+        work, wait = costs[action]
+        with recorder.record(action, params[action]) as s:
+            time.sleep(rng.uniform(0.5, 1.5) * work / 1000 / 20)
+            recorder.count("uia", rng.randint(0, 4) if action in ("click", "wait_window") else 0)
+            recorder.sleep(rng.uniform(0.2, 1.8) * wait / 1000 / 20)
+            s.ok = rng.random() > 0.03
+
+    chains = [["open_app", "wait_window", "type", "save"], ["click", "type", "press_key"],
+              ["create_file", "open_app", "wait_window"], ["click"], ["type", "press_key", "click", "save"]]
+    for _ in range(count):
+        actions = rng.choice(chains)
+        plan = {"steps": [{"action": a, "parameters": params[a]} for a in actions if a != "wait_window"]}
+        with recorder.record("chain", plan) as chain:
+            for action in actions:
+                step(action)
+            chain.ok = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor trace report and replay")
+    parser.add_argument("trace", nargs="?", default=settings.MOTOR_TRACE_FILE)
+    parser.add_argument("--compare", help="Baseline trace file")
+    parser.add_argument("--replay", action="store_true",
+                        help="Re-execute the recorded plans through AutomationEngine on the simulated desktop")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier for the latencies derived from the trace")
+    parser.add_argument("--demo", type=int, default=0, help="Generate N synthetic traces (timings /20) first")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    path = args.trace
+    if args.demo:
+        path = os.path.join(tempfile.mkdtemp(), "demo_traces.jsonl")
+        make_demo(path, args.demo, args.seed)
+        print(f"Trazas sintéticas: {path}")
+    if not os.path.exists(path):
+        print(f"No existe {path}. Ejecuta el agente con MOTOR_TRACE_ENABLED=true o usa --demo N.")
+        return 1
+
+    traces = load_traces(path)
+    report(traces, f"MOTOR TRACE: {os.path.basename(path)}")
+    if args.compare:
+        compare(load_traces(args.compare), traces)
+    if args.replay:
+        replay(traces, args.latency_scale)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
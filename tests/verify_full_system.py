@@ -68,6 +68,29 @@ class SystemVerifier:
         except:
             self.log("ActionEngine API call failed", "FAIL")
 
+    def run_privacy_check(self):
+        """Offline stacks must never get a policy that sends prompts to the cloud"""
+        sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        from core.tech_manager import TechnologyManager, LLM_POLICIES, OFFLINE_STACKS
+
+        manager = TechnologyManager()  # Solo se modifica en memoria: configs/ no se reescribe
+        for stack in OFFLINE_STACKS:
+            if stack not in manager.active_config.get("stacks", {}):
+                self.log(f"Offline stack '{stack}' missing from config", "FAIL")
+                continue
+            manager.active_config["active_stack"] = stack
+            for configured in LLM_POLICIES:
+                manager.active_config["stacks"][stack]["llm_policy"] = configured
+                policy = manager.get_llm_policy()
+                if policy == "local_only":
+                    self.log(f"{stack}: configured '{configured}' -> local_only", "PASS")
+                else:
+                    self.log(f"{stack}: configured '{configured}' -> {policy} (cloud!)", "FAIL")
+            if manager.set_llm_policy("hedged"):
+                self.log(f"{stack}: set_llm_policy('hedged') accepted", "FAIL")
+            else:
+                self.log(f"{stack}: cloud policy rejected", "PASS")
+
     def generate_report(self):
         print("\n" + "="*40)
         print("   HABLAME FINAL DIAGNOSTIC REPORT")
@@ -89,6 +112,7 @@ class SystemVerifier:
 
 if __name__ == "__main__":
     verifier = SystemVerifier()
+    verifier.run_privacy_check()
     verifier.run_api_check()
     verifier.run_audio_check()
     verifier.generate_report()
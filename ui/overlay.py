@@ -287,6 +287,16 @@ class ControlPanel(QWidget):
         # Compatibility with main.py
         self.log(f"STATUS: {text} ({state})", "sys")
 
+    def update_progress(self, step, total, text):
+        """Motor progress from main.py; total=0 means the job ended"""
+        if total == 0:
+            self.lbl_status.setText("● ACTIVE")
+            self.lbl_status.setStyleSheet(f"color: {THEME['success']};")
+            return
+        self.lbl_status.setText(f"▶ {step}/{total}")
+        self.lbl_status.setStyleSheet(f"color: {THEME['accent']};")
+        self.log(f"[{step}/{total}] {text}", "sys")
+
     # Draggable
     def mousePressEvent(self, event):
         self.old_pos = event.globalPos()